@@ -0,0 +1,60 @@
+"""
+API endpoints for bulk dataset exports
+"""
+from __future__ import annotations
+
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from services.export import FILE_EXTENSIONS, MEDIA_TYPES, export_stream
+from services.profiling import ProfiledRoute
+
+router = APIRouter(prefix="/export", tags=["export"], route_class=ProfiledRoute)
+
+FORMAT_PATTERN = "^(ndjson|csv|arrow)$"
+
+
+def _export_response(kind: str, fmt: str, columns: Optional[str],
+                     start_date: Optional[date], end_date: Optional[date]) -> StreamingResponse:
+    try:
+        chunks = export_stream(kind, fmt, columns, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{kind}.{FILE_EXTENSIONS[fmt]}"'}
+    )
+
+
+@router.get("/fights")
+def export_fights(
+    format: str = Query("ndjson", regex=FORMAT_PATTERN),
+    columns: Optional[str] = Query(None, description="Comma-separated column names (default: all)"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+):
+    """
+    Stream every fight (with both fighters' names) as NDJSON, CSV or Arrow
+    Ordered by fight id; start_date/end_date are inclusive
+    """
+    return _export_response('fights', format, columns, start_date, end_date)
+
+
+@router.get("/fighters")
+def export_fighters(
+    format: str = Query("ndjson", regex=FORMAT_PATTERN),
+    columns: Optional[str] = Query(None, description="Comma-separated column names (default: all)"),
+    start_date: Optional[date] = Query(None, description="Only fighters with a fight on or after this date"),
+    end_date: Optional[date] = Query(None, description="Only fighters with a fight on or before this date"),
+):
+    """
+    Stream every fighter as NDJSON, CSV or Arrow, ordered by fighter id
+    """
+    return _export_response('fighters', format, columns, start_date, end_date)
@@ -3,23 +3,24 @@ API endpoints for fighter operations
 """
 from __future__ import annotations
 
-from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func
 from typing import List, Optional
 
 from database.config import get_db
-from database.schema import Fighter, Fight
+from database.schema import Fighter, Fight, FighterFight
 from models.schemas import (
     FighterStats,
     FighterProfile,
     FighterSearchRequest,
-    FighterSearchResponse,
-    FightSummary
+    FighterSearchResponse
 )
+from services.profiling import ProfiledRoute
+from services.serialization import FastJSONResponse, row_dicts
+from services.snapshot import get_snapshot
 
-router = APIRouter(prefix="/fighters", tags=["fighters"])
+router = APIRouter(prefix="/fighters", tags=["fighters"], route_class=ProfiledRoute)
 
 
 @router.get("/search", response_model=FighterSearchResponse)
@@ -32,6 +33,12 @@ def search_fighters(
     Search fighters by name (case-insensitive)
     Free tier: Available to all users
     """
+    # Served from the shared snapshot when one is mapped (no database round trip)
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        fighters = [snapshot.stats(row) for row in snapshot.search(query, limit)]
+        return FighterSearchResponse(fighters=fighters, total=len(fighters))
+
     fighters = db.query(Fighter).filter(
         Fighter.name.ilike(f"%{query}%")
     ).order_by(
@@ -44,6 +51,70 @@ def search_fighters(
     )
 
 
+# Fighter columns behind FighterStats, in response field order
+STATS_COLUMNS = (
+    Fighter.id, Fighter.name, Fighter.total_fights, Fighter.wins, Fighter.losses, Fighter.draws,
+    Fighter.win_percentage, Fighter.ko_tko_wins, Fighter.submission_wins, Fighter.decision_wins,
+    Fighter.avg_fight_duration_secs, Fighter.elo_rating
+)
+STATS_KEYS = tuple(column.key for column in STATS_COLUMNS)
+
+RedFighter = aliased(Fighter)
+BlueFighter = aliased(Fighter)
+
+
+def _fighter_fights(db: Session, fighter_id: int, newest_first: bool):
+    """
+    Every fight of a fighter as plain rows with both corners' names: one range
+    scan of fighter_fights. Within a date, red-corner fights come first.
+    """
+    date_order = FighterFight.date.desc() if newest_first else FighterFight.date.asc()
+    return db.query(
+        Fight.id, FighterFight.date, RedFighter.name, BlueFighter.name, Fight.winner,
+        Fight.finish_method, Fight.finish_round, Fight.location, FighterFight.corner, FighterFight.result
+    ).select_from(FighterFight).join(
+        Fight, Fight.id == FighterFight.fight_id
+    ).join(
+        RedFighter, Fight.red_fighter_id == RedFighter.id
+    ).join(
+        BlueFighter, Fight.blue_fighter_id == BlueFighter.id
+    ).filter(
+        FighterFight.fighter_id == fighter_id
+    ).order_by(
+        date_order, FighterFight.corner.desc()
+    ).all()
+
+
+def _profile_payload(db: Session, stats_row, include_recent_fights: bool) -> dict:
+    profile = dict(zip(STATS_KEYS, stats_row))
+    recent_fights = []
+
+    if include_recent_fights:
+        # Deduplicate by fight key (sorted fighter names + date); stop after 5 unique fights
+        seen_fights = set()
+        for fight_id, date, red_name, blue_name, winner, method, finish_round, location, _, _ in \
+                _fighter_fights(db, profile['id'], newest_first=True):
+            fight_key = (tuple(sorted([red_name, blue_name])), date)
+            if fight_key in seen_fights:
+                continue
+            seen_fights.add(fight_key)
+            recent_fights.append({
+                'id': fight_id,
+                'date': date,
+                'red_fighter_name': red_name,
+                'blue_fighter_name': blue_name,
+                'winner': winner,
+                'finish_method': method,
+                'finish_round': finish_round,
+                'location': location
+            })
+            if len(recent_fights) >= 5:
+                break
+
+    profile['recent_fights'] = recent_fights
+    return profile
+
+
 @router.get("/{fighter_id}", response_model=FighterProfile)
 def get_fighter_profile(
     fighter_id: int,
@@ -54,55 +125,12 @@ def get_fighter_profile(
     Get detailed fighter profile with statistics
     Free tier: Available to all users
     """
-    fighter = db.query(Fighter).filter(Fighter.id == fighter_id).first()
+    stats_row = db.query(*STATS_COLUMNS).filter(Fighter.id == fighter_id).first()
 
-    if not fighter:
+    if not stats_row:
         raise HTTPException(status_code=404, detail="Fighter not found")
 
-    profile_data = FighterStats.from_orm(fighter).dict()
-
-    if include_recent_fights:
-        # Get all fights for this fighter (both red and blue corner)
-        red_fights = db.query(Fight).filter(
-            Fight.red_fighter_id == fighter_id
-        ).order_by(Fight.date.desc()).all()
-
-        blue_fights = db.query(Fight).filter(
-            Fight.blue_fighter_id == fighter_id
-        ).order_by(Fight.date.desc()).all()
-
-        # Combine and sort by date
-        all_fights = red_fights + blue_fights
-        all_fights.sort(key=lambda x: x.date if x.date else datetime.min, reverse=True)
-
-        # Convert to FightSummary and deduplicate by fight key (fighters + date)
-        seen_fights = set()
-        fight_summaries = []
-        for fight in all_fights:
-            # Create unique key: sorted fighter names + date
-            fighters = tuple(sorted([fight.red_fighter.name, fight.blue_fighter.name]))
-            fight_key = (fighters, fight.date)
-
-            if fight_key not in seen_fights:
-                seen_fights.add(fight_key)
-                fight_summaries.append(FightSummary(
-                    id=fight.id,
-                    date=fight.date,
-                    red_fighter_name=fight.red_fighter.name,
-                    blue_fighter_name=fight.blue_fighter.name,
-                    winner=fight.winner,
-                    finish_method=fight.finish_method,
-                    finish_round=fight.finish_round,
-                    location=fight.location
-                ))
-
-                # Stop after collecting 5 unique fights
-                if len(fight_summaries) >= 5:
-                    break
-
-        profile_data['recent_fights'] = fight_summaries
-
-    return FighterProfile(**profile_data)
+    return FastJSONResponse(_profile_payload(db, stats_row, include_recent_fights))
 
 
 @router.get("/name/{fighter_name}", response_model=FighterProfile)
@@ -113,14 +141,14 @@ def get_fighter_by_name(
     """
     Get fighter profile by exact name
     """
-    fighter = db.query(Fighter).filter(
+    stats_row = db.query(*STATS_COLUMNS).filter(
         func.lower(Fighter.name) == func.lower(fighter_name)
     ).first()
 
-    if not fighter:
+    if not stats_row:
         raise HTTPException(status_code=404, detail=f"Fighter '{fighter_name}' not found")
 
-    return get_fighter_profile(fighter.id, db=db)
+    return FastJSONResponse(_profile_payload(db, stats_row, include_recent_fights=True))
 
 
 @router.get("/", response_model=List[FighterStats])
@@ -137,13 +165,13 @@ def list_fighters(
     # Sort by the specified column
     sort_column = getattr(Fighter, sort_by)
 
-    fighters = db.query(Fighter).filter(
+    rows = db.query(*STATS_COLUMNS).filter(
         Fighter.total_fights > 0
     ).order_by(
         sort_column.desc()
     ).offset(skip).limit(limit).all()
 
-    return fighters
+    return FastJSONResponse(row_dicts(STATS_KEYS, rows))
 
 
 @router.get("/{fighter_id}/stats/timeline")
@@ -155,64 +183,38 @@ def get_fighter_timeline(
     Get fighter's performance timeline (win/loss record over time)
     Premium feature for visualization
     """
-    fighter = db.query(Fighter).filter(Fighter.id == fighter_id).first()
+    fighter_name = db.query(Fighter.name).filter(Fighter.id == fighter_id).scalar()
 
-    if not fighter:
+    if fighter_name is None:
         raise HTTPException(status_code=404, detail="Fighter not found")
 
-    # Get all fights chronologically
-    red_fights = db.query(Fight).filter(
-        Fight.red_fighter_id == fighter_id
-    ).order_by(Fight.date.asc()).all()
-
-    blue_fights = db.query(Fight).filter(
-        Fight.blue_fighter_id == fighter_id
-    ).order_by(Fight.date.asc()).all()
-
-    # Combine and sort
-    all_fights = []
-    for fight in red_fights:
-        all_fights.append({
-            'date': fight.date.isoformat(),
-            'opponent': fight.blue_fighter.name,
-            'won': fight.winner == 'Red',
-            'method': fight.finish_method,
-            'round': fight.finish_round,
-            'location': fight.location
-        })
-
-    for fight in blue_fights:
-        all_fights.append({
-            'date': fight.date.isoformat(),
-            'opponent': fight.red_fighter.name,
-            'won': fight.winner == 'Blue',
-            'method': fight.finish_method,
-            'round': fight.finish_round,
-            'location': fight.location
-        })
-
-    all_fights.sort(key=lambda x: x['date'])
-
-    # Calculate running win percentage
+    # Calculate running win percentage over all fights, oldest first
     wins = 0
     total = 0
     timeline = []
 
-    for fight in all_fights:
+    for _, date, red_name, blue_name, _, method, finish_round, location, corner, result in \
+            _fighter_fights(db, fighter_id, newest_first=False):
+        won = result == 'W'
         total += 1
-        if fight['won']:
+        if won:
             wins += 1
 
         timeline.append({
-            **fight,
+            'date': date.isoformat(),
+            'opponent': blue_name if corner == 'Red' else red_name,
+            'won': won,
+            'method': method,
+            'round': finish_round,
+            'location': location,
             'fight_number': total,
             'career_wins': wins,
             'career_losses': total - wins,
             'win_percentage': (wins / total) * 100
         })
 
-    return {
+    return FastJSONResponse({
         'fighter_id': fighter_id,
-        'fighter_name': fighter.name,
+        'fighter_name': fighter_name,
         'timeline': timeline
-    }
+    })
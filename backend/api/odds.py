@@ -0,0 +1,105 @@
+"""
+API endpoints for live odds: re-priced betting value as Server-Sent Events
+"""
+from __future__ import annotations
+
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+
+from services import live_odds
+from services.profiling import ProfiledRoute
+
+router = APIRouter(prefix="/odds", tags=["odds"], route_class=ProfiledRoute)
+
+# Client reconnect delay sent in the stream's first frame
+SSE_RETRY_MS = 2000
+
+
+async def _event_stream(last_event_id: Optional[int], fight_ids: Optional[set],
+                        min_value_percentage: Optional[float]) -> AsyncIterator[bytes]:
+    yield b"retry: %d\n\n" % SSE_RETRY_MS
+    async for events in live_odds.EVENTS.subscribe(last_event_id):
+        if not events:
+            yield b": keepalive\n\n"
+            continue
+        frames = [
+            frame for _, payload, frame in events
+            if payload is None or (
+                (fight_ids is None or payload['fight_id'] in fight_ids)
+                and (min_value_percentage is None or payload['value_percentage'] >= min_value_percentage)
+            )
+        ]
+        if frames:
+            yield b"".join(frames)
+
+
+@router.get("/stream")
+async def stream_odds(
+    fight_ids: Optional[str] = Query(None, description="Comma-separated fight ids (default: all)"),
+    min_value_percentage: Optional[float] = Query(None, description="Only fights with at least this edge"),
+    last_event_id: Optional[int] = Header(None),
+):
+    """
+    Re-priced fights as odds change (text/event-stream): one `odds` event per
+    fight per update batch; `reset` means events were missed and
+    /predictions/betting-value should be reloaded. Reconnects resume from
+    Last-Event-ID.
+    """
+    try:
+        ids = {int(fight_id) for fight_id in fight_ids.split(",") if fight_id.strip()} if fight_ids else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="fight_ids must be comma-separated integers")
+    return StreamingResponse(
+        _event_stream(last_event_id, ids, min_value_percentage),
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+class OddsStreamShortcut:
+    """
+    ASGI middleware, added outermost: serves /odds/stream directly instead of
+    through the app's http middlewares, each of which would copy every event
+    of every subscriber through another memory stream. None of them apply
+    to an open-ended stream; CORS does and is kept.
+    """
+
+    def __init__(self, app, path: str, cors: dict):
+        self.app = app
+        self.path = path
+        self.stream = CORSMiddleware(self._stream, **cors)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == self.path:
+            await self.stream(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+    async def _stream(self, scope, receive, send):
+        request = Request(scope)
+        if request.method != "GET":
+            response = JSONResponse(status_code=405, content={"detail": "Method Not Allowed"})
+        else:
+            try:
+                last_event_id = request.headers.get("last-event-id")
+                response = await stream_odds(
+                    request.query_params.get("fight_ids"),
+                    float(request.query_params["min_value_percentage"])
+                    if "min_value_percentage" in request.query_params else None,
+                    int(last_event_id) if last_event_id else None,
+                )
+            except HTTPException as e:
+                response = JSONResponse(status_code=e.status_code, content={"detail": e.detail})
+            except ValueError as e:
+                response = JSONResponse(status_code=422, content={"detail": str(e)})
+        await response(scope, receive, send)
+
+
+@router.get("/status")
+def odds_status():
+    """Feed counters, open subscribers and update-to-publish latency"""
+    return live_odds.status()
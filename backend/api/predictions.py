@@ -18,11 +18,23 @@ from models.schemas import (
     PredictionRequest,
     PredictionResponse,
     BettingValueResponse,
-    BettingValue
+    BettingValue,
+    CardSimulationRequest,
+    CardSimulationResponse,
+    FightOutcomeDistribution,
+    ParlayResult
 )
+from services.card_simulator import CardSimulator, card_probabilities
+from services.live_odds import current_odds, value_edges
+from services.matchups import previous_matchups, previous_meetings
 from services.ml_predictor import MLPredictor
+from services.profiling import ProfiledRoute
+from services.serialization import FastJSONResponse
 
-router = APIRouter(prefix="/predictions", tags=["predictions"])
+router = APIRouter(prefix="/predictions", tags=["predictions"], route_class=ProfiledRoute)
+
+# Upper bound on simulations per card request
+MAX_CARD_SIMULATIONS = 5_000_000
 
 # Initialize ML predictor (will be loaded once)
 predictor = MLPredictor()
@@ -52,25 +64,8 @@ def compare_fighters(
     if not fighter2:
         raise HTTPException(status_code=404, detail=f"Fighter '{request.fighter2_name}' not found")
 
-    # Check if they've fought before
-    previous_matchups = db.query(Fight).filter(
-        ((Fight.red_fighter_id == fighter1.id) & (Fight.blue_fighter_id == fighter2.id)) |
-        ((Fight.red_fighter_id == fighter2.id) & (Fight.blue_fighter_id == fighter1.id))
-    ).order_by(Fight.date.desc()).all()
-
-    # Convert to FightSummary
-    matchup_summaries = []
-    for fight in previous_matchups:
-        matchup_summaries.append(FightSummary(
-            id=fight.id,
-            date=fight.date,
-            red_fighter_name=fight.red_fighter.name,
-            blue_fighter_name=fight.blue_fighter.name,
-            winner=fight.winner,
-            finish_method=fight.finish_method,
-            finish_round=fight.finish_round,
-            location=fight.location
-        ))
+    # Previous meetings: one range scan on the pair key, names joined in
+    matchup_summaries = [FightSummary(**row) for row in previous_matchups(db, fighter1.id, fighter2.id)]
 
     # Analyze advantages
     fighter1_advantages = []
@@ -93,6 +88,13 @@ def compare_fighters(
     elif fighter2.submission_wins > fighter1.submission_wins:
         fighter2_advantages.append(f"Superior grappling ({fighter2.submission_wins} submission wins)")
 
+    fighter1_elo = fighter1.elo_rating or 0
+    fighter2_elo = fighter2.elo_rating or 0
+    if fighter1_elo > fighter2_elo:
+        fighter1_advantages.append(f"Higher Elo rating ({fighter1_elo:.0f} vs {fighter2_elo:.0f})")
+    elif fighter2_elo > fighter1_elo:
+        fighter2_advantages.append(f"Higher Elo rating ({fighter2_elo:.0f} vs {fighter1_elo:.0f})")
+
     if fighter1.total_fights > fighter2.total_fights:
         fighter1_advantages.append(f"More experience ({fighter1.total_fights} fights)")
     elif fighter2.total_fights > fighter1.total_fights:
@@ -162,7 +164,7 @@ def find_betting_value(
     for fight in fights:
         # Get fighters
         red_fighter = db.query(Fighter).filter(Fighter.id == fight.red_fighter_id).first()
-        blue_fighter = db.query(Fighter).filter(Fighter.blue_fighter_id == fight.blue_fighter_id).first()
+        blue_fighter = db.query(Fighter).filter(Fighter.id == fight.blue_fighter_id).first()
 
         if not red_fighter or not blue_fighter:
             continue
@@ -170,13 +172,12 @@ def find_betting_value(
         # Get prediction
         prediction = predictor.predict_fight(red_fighter, blue_fighter, db)
 
-        # Calculate implied probability from odds
-        red_implied_prob = predictor.odds_to_probability(fight.red_odds)
-        blue_implied_prob = predictor.odds_to_probability(fight.blue_odds)
-
-        # Find value bets
-        red_value = prediction.red_win_probability - red_implied_prob
-        blue_value = prediction.blue_win_probability - blue_implied_prob
+        # Model probability minus the odds' implied probability, at live prices when there are
+        # any (also what live odds publish)
+        red_odds, blue_odds = current_odds(fight)
+        red_value, blue_value = value_edges(
+            prediction.red_win_probability, prediction.blue_win_probability, red_odds, blue_odds
+        )
 
         # If our model predicts higher probability than odds suggest, it's value
         if red_value * 100 >= min_value_percentage:
@@ -187,7 +188,7 @@ def find_betting_value(
                 date=fight.date,
                 recommended_bet='Red',
                 expected_value=red_value * 100,
-                current_odds=fight.red_odds,
+                current_odds=red_odds,
                 predicted_probability=prediction.red_win_probability,
                 value_percentage=red_value * 100
             ))
@@ -199,7 +200,7 @@ def find_betting_value(
                 date=fight.date,
                 recommended_bet='Blue',
                 expected_value=blue_value * 100,
-                current_odds=fight.blue_odds,
+                current_odds=blue_odds,
                 predicted_probability=prediction.blue_win_probability,
                 value_percentage=blue_value * 100
             ))
@@ -232,6 +233,7 @@ def analyze_fight_card(
         raise HTTPException(status_code=404, detail=f"No fights found for event '{event_name}'")
 
     card_analysis = []
+    rematches = previous_meetings(db, fights)
 
     for fight in fights:
         red_fighter = fight.red_fighter
@@ -246,6 +248,7 @@ def analyze_fight_card(
             'blue_fighter': blue_fighter.name,
             'red_record': f"{red_fighter.wins}-{red_fighter.losses}-{red_fighter.draws}",
             'blue_record': f"{blue_fighter.wins}-{blue_fighter.losses}-{blue_fighter.draws}",
+            'previous_meetings': rematches[fight.id],
             'prediction': {
                 'winner': prediction.predicted_winner,
                 'confidence': prediction.confidence_score,
@@ -255,12 +258,85 @@ def analyze_fight_card(
             },
             'odds': {
                 'red_odds': fight.red_odds,
-                'blue_odds': fight.blue_odds
+                'blue_odds': fight.blue_odds,
+                'live_red_odds': fight.live_red_odds,
+                'live_blue_odds': fight.live_blue_odds,
+                'odds_updated_at': fight.odds_updated_at
             }
         })
 
-    return {
+    return FastJSONResponse({
         'event_name': event_name,
         'total_fights': len(card_analysis),
         'fights': card_analysis
-    }
+    })
+
+
+@router.post("/fight-card/simulate", response_model=CardSimulationResponse)
+def simulate_fight_card(
+    request: CardSimulationRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Monte Carlo simulation of a whole card: favorites won, method props, parlays
+    Premium feature
+    """
+    if not 1 <= request.simulations <= MAX_CARD_SIMULATIONS:
+        raise HTTPException(status_code=400, detail=f"simulations must be between 1 and {MAX_CARD_SIMULATIONS}")
+
+    fights = db.query(Fight).filter(
+        Fight.event_name.ilike(f"%{request.event_name}%")
+    ).order_by(Fight.date.desc()).all()
+
+    if not fights:
+        raise HTTPException(status_code=404, detail=f"No fights found for event '{request.event_name}'")
+
+    fight_index = {fight.id: index for index, fight in enumerate(fights)}
+    parlays = []
+    for legs in request.parlays:
+        for leg in legs:
+            if leg.fight_id not in fight_index:
+                raise HTTPException(status_code=400, detail=f"Fight {leg.fight_id} is not on this card")
+        parlays.append([(fight_index[leg.fight_id], leg.selection) for leg in legs])
+
+    try:
+        simulator = CardSimulator(
+            card_probabilities(predictor, fights, db),
+            correlation=request.correlation,
+            seed=request.seed
+        )
+        result = simulator.run(request.simulations, parlays)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rematches = previous_meetings(db, fights)
+
+    return CardSimulationResponse(
+        event_name=request.event_name,
+        simulations=result['simulations'],
+        correlation=result['correlation'],
+        seed=result['seed'],
+        fights=[
+            FightOutcomeDistribution(
+                fight_id=fight.id,
+                red_fighter_name=fight.red_fighter.name,
+                blue_fighter_name=fight.blue_fighter.name,
+                red_win_probability=simulated['red_win_probability'],
+                blue_win_probability=simulated['blue_win_probability'],
+                outcomes=simulated['outcomes'],
+                previous_meetings=rematches[fight.id]
+            )
+            for fight, simulated in zip(fights, result['fights'])
+        ],
+        expected_favorites_won=result['favorites_won']['expected'],
+        favorites_won_distribution=result['favorites_won']['distribution'],
+        parlays=[
+            ParlayResult(
+                legs=legs,
+                probability=parlay['probability'],
+                standard_error=parlay['standard_error'],
+                fair_decimal_odds=parlay['fair_decimal_odds'],
+                fair_american_odds=parlay['fair_american_odds']
+            )
+            for legs, parlay in zip(request.parlays, result['parlays'])
+        ]
+    )
@@ -0,0 +1,64 @@
+"""
+Benchmark: Monte Carlo card simulations per second
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_card_simulator --fights 13 --simulations 5000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.card_simulator import OUTCOMES, CardSimulator
+
+
+def synthetic_card(n_fights: int, seed: int):
+    """Random but plausible per-fight outcome probabilities"""
+    rng = np.random.default_rng(seed)
+    card = []
+    for _ in range(n_fights):
+        red_win = rng.uniform(0.25, 0.8)
+        red_split = rng.dirichlet([3, 2, 4])
+        blue_split = rng.dirichlet([3, 2, 4])
+        probabilities = np.concatenate([red_win * red_split, (1 - red_win) * blue_split])
+        card.append(dict(zip(OUTCOMES, probabilities.tolist())))
+    return card
+
+
+def run(n_fights: int, simulations: int, chunk_size: int, seed: int):
+    card = synthetic_card(n_fights, seed)
+    parlays = [
+        [(0, 'red'), (1, 'red'), (2, 'blue')],
+        [(index, 'red') for index in range(n_fights)],
+        [(0, 'red_ko'), (3, 'blue_dec')],
+    ]
+
+    print(f"{n_fights}-fight card, {simulations:,} simulations, chunks of {chunk_size:,}")
+    for correlation in (0.0, 0.3):
+        simulator = CardSimulator(card, correlation=correlation, seed=seed, chunk_size=chunk_size)
+        start = time.perf_counter()
+        result = simulator.run(simulations, parlays)
+        elapsed = time.perf_counter() - start
+
+        print(f"\ncorrelation={correlation}")
+        print(f"  {elapsed:.2f}s, {simulations / elapsed:,.0f} cards/sec, "
+              f"{simulations * n_fights / elapsed:,.0f} fights/sec")
+        print(f"  expected favorites won: {result['favorites_won']['expected']:.2f}")
+        for legs, parlay in zip(parlays, result['parlays']):
+            print(f"  parlay of {len(legs)} legs: p={parlay['probability']:.5f} "
+                  f"fair decimal={parlay['fair_decimal_odds']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Card simulator throughput benchmark")
+    parser.add_argument("--fights", type=int, default=13)
+    parser.add_argument("--simulations", type=int, default=5_000_000)
+    parser.add_argument("--chunk-size", type=int, default=250_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run(args.fights, args.simulations, args.chunk_size, args.seed)
@@ -0,0 +1,123 @@
+"""
+Benchmark: API worker cold start and time-to-first-request per WARMUP_MODE
+
+Each run starts a fresh uvicorn process and measures, from the moment it is
+spawned: when /api/v1/health first answers (live), how long the first
+prediction takes when sent as soon as the worker is live, when /ready
+answers 200, and the latency of a prediction once the worker is warm.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_cold_start --repeats 5
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.common import BACKEND_DIR, load_results, print_comparison, save_results, use_benchmark_database
+from benchmarks.load_test import free_port, stop_server
+
+
+def _request(port: int, method: str, path: str, body=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        payload = json.dumps(body).encode() if body is not None else None
+        conn.request(method, path, body=payload, headers={'Content-Type': 'application/json'} if payload else {})
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def _wait_for(port: int, path: str, spawned: float, timeout: float = 60.0) -> float:
+    """Seconds from spawn until `path` answers 200"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if _request(port, 'GET', path) == 200:
+                return time.perf_counter() - spawned
+        except OSError:
+            pass
+        time.sleep(0.005)
+    raise RuntimeError(f"{path} did not answer 200 within {timeout:.0f}s")
+
+
+def measure(database_url: str, mode: str, prediction: dict) -> dict:
+    port = free_port()
+    env = {**os.environ, 'DATABASE_URL': database_url, 'WARMUP_MODE': mode}
+    spawned = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port),
+         '--log-level', 'warning', '--no-access-log'],
+        cwd=BACKEND_DIR, env=env
+    )
+    try:
+        live = _wait_for(port, '/api/v1/health', spawned)
+
+        start = time.perf_counter()
+        _request(port, 'POST', '/api/v1/predictions/predict', prediction)
+        first_request = time.perf_counter() - start
+        first_response = time.perf_counter() - spawned
+
+        ready = _wait_for(port, '/ready', spawned)
+
+        start = time.perf_counter()
+        _request(port, 'POST', '/api/v1/predictions/predict', prediction)
+        warm_request = time.perf_counter() - start
+    finally:
+        stop_server(process)
+
+    return {
+        'live': live, 'ready': ready, 'first_request': first_request,
+        'first_response': first_response, 'warm_request': warm_request,
+    }
+
+
+def run(repeats: int, modes, reseed: bool):
+    database_url = use_benchmark_database(reseed=reseed)
+
+    from database.config import SessionLocal
+    from database.schema import Fighter
+
+    db = SessionLocal()
+    red, blue = db.query(Fighter).order_by(Fighter.total_fights.desc()).limit(2).all()
+    prediction = {'red_fighter_name': red.name, 'blue_fighter_name': blue.name}
+    db.close()
+
+    results = {}
+    for mode in modes:
+        runs = [measure(database_url, mode, prediction) for _ in range(repeats)]
+        results[mode] = {
+            'live_ms': statistics.median(r['live'] for r in runs) * 1000,
+            'ready_ms': statistics.median(r['ready'] for r in runs) * 1000,
+            'first_request_ms': statistics.median(r['first_request'] for r in runs) * 1000,
+            'time_to_first_response_ms': statistics.median(r['first_response'] for r in runs) * 1000,
+            'warm_request_ms': statistics.median(r['warm_request'] for r in runs) * 1000,
+        }
+        r = results[mode]
+        print(f"{mode:<11} live {r['live_ms']:>7.0f}ms  ready {r['ready_ms']:>7.0f}ms  "
+              f"first predict {r['first_request_ms']:>6.1f}ms (response at {r['time_to_first_response_ms']:>6.0f}ms)  "
+              f"warm predict {r['warm_request_ms']:>6.1f}ms")
+
+    current = {'revision': None, 'results': results}
+    previous = load_results('cold_start')
+    path = save_results('cold_start', results)
+    print(f"\nResults saved to {path}")
+    if previous:
+        print_comparison(previous, current)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API cold-start benchmark")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", default=['off', 'background', 'blocking'],
+                        choices=['off', 'background', 'blocking'])
+    parser.add_argument("--reseed", action="store_true", help="Rebuild the benchmark database from the CSV")
+    args = parser.parse_args()
+
+    run(args.repeats, args.modes, args.reseed)
@@ -0,0 +1,94 @@
+"""
+Benchmark: filtered reads of the raw fight data from the monolithic CSV vs
+the partitioned dataset (pipeline/dataset.py)
+
+For each query the CSV is read whole and filtered, and the dataset is read
+through its manifest with the same filters; reports time and bytes fetched
+for both, and checks they return the same rows. --scale repeats the raw
+rows (with renamed fighters) to grow the data; --store points at another
+store (e.g. an s3:// stand-in, see S3_ENDPOINT_URL) for the dataset.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_dataset --scale 20
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.bench_raw_frame import scaled_raw_csv
+from benchmarks.common import RESULTS_DIR, load_results, print_comparison, save_results
+from pipeline.dataset import OPERATORS, PARTITION_KEYS, load_manifest, open_store, prune, read_dataset, write_dataset
+
+QUERIES = {
+    'all': [],
+    'since_2024': [('Date', '>=', '2024-01-01')],
+    'lightweight_2019': [('year', '==', 2019), ('weight_class', '==', 'Lightweight')],
+    'heavy_favourites_2015_19': [('Date', '>=', '2015-01-01'), ('Date', '<', '2020-01-01'), ('RedOdds', '<', -400)],
+}
+
+
+def filter_frame(frame: pd.DataFrame, filters) -> pd.DataFrame:
+    mask = pd.Series(True, index=frame.index)
+    for column, op, value in filters:
+        series = PARTITION_KEYS[column](frame) if column in PARTITION_KEYS else frame[column]
+        if column == 'Date':
+            series, value = pd.to_datetime(series), pd.Timestamp(value)
+        mask &= OPERATORS[op](series, value)
+    return frame[mask]
+
+
+def timed(func, *args, repeat: int):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(scale: int, store_url: str, repeat: int):
+    raw_path = scaled_raw_csv(scale)
+    store = open_store(store_url)
+    name = f"raw-x{scale}"
+    manifest = write_dataset(pd.read_csv(raw_path), store, name)
+    csv_bytes = raw_path.stat().st_size
+
+    results = {}
+    print(f"{manifest['rows']} rows, {len(manifest['partitions'])} partitions in {store}, best of {repeat}")
+    print(f"{'query':<26} {'rows':>7} {'csv':>9} {'dataset':>9} {'csv MiB':>8} {'read MiB':>9} {'parts':>6}")
+    for query, filters in QUERIES.items():
+        csv_ms, expected = timed(lambda: filter_frame(pd.read_csv(raw_path), filters), repeat=repeat)
+        dataset_ms, frame = timed(read_dataset, store, name, filters, repeat=repeat)
+        pd.testing.assert_frame_equal(frame, expected, check_index_type='equiv')
+        selected = prune(load_manifest(store, name), filters)
+        read_bytes = sum(partition['bytes'] for partition in selected)
+        results[query] = {
+            'rows': len(frame),
+            'csv_ms': csv_ms,
+            'dataset_ms': dataset_ms,
+            'csv_bytes': csv_bytes,
+            'dataset_bytes': read_bytes,
+            'partitions': len(selected),
+        }
+        print(f"{query:<26} {len(frame):>7} {csv_ms:>7.0f}ms {dataset_ms:>7.0f}ms "
+              f"{csv_bytes / 2 ** 20:>8.1f} {read_bytes / 2 ** 20:>9.1f} {len(selected):>6}")
+
+    bench_name = f"dataset-x{scale}"
+    current = {'revision': None, 'results': results}
+    previous = load_results(bench_name)
+    path = save_results(bench_name, results)
+    print(f"\nResults saved to {path}")
+    if previous:
+        print_comparison(previous, current)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Filtered reads: monolithic CSV vs partitioned dataset")
+    parser.add_argument("--scale", type=int, default=1, help="Repeat the raw CSV N times")
+    parser.add_argument("--store", default=str(RESULTS_DIR / "datasets"), help="Directory, file:// or s3:// URL")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    run(args.scale, args.store, args.repeat)
@@ -0,0 +1,100 @@
+"""
+Benchmark: bulk export streaming (time to first byte, throughput, peak memory)
+
+Runs each export format through services.export in process, measuring time
+to the first chunk, total time, rows per second and peak traced memory, and
+compares with materializing the same rows with .all() before encoding. Run
+at several --scale values (synthetic history, see load_test) to check that
+streaming memory stays flat while the materialized peak grows with the data.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_export --scale 4
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.common import load_results, print_comparison, save_results
+from benchmarks.load_test import default_database_url, prepare_database
+
+
+def _measure_stream(chunks) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    first_chunk = None
+    total_bytes = 0
+    for chunk in chunks:
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - start
+        total_bytes += len(chunk)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'first_byte_ms': (first_chunk or elapsed) * 1000,
+        'total_ms': elapsed * 1000,
+        'bytes': total_bytes,
+        'peak_mib': peak / 2 ** 20,
+    }
+
+
+def _materialized(kind: str):
+    """The pre-streaming approach: load every row, then encode the whole list"""
+    from database.config import get_read_sessionmaker
+    from services.export import fight_columns, fighter_columns, fights_statement, fighters_statement
+    from services.serialization import dumps
+
+    names = list(fight_columns() if kind == 'fights' else fighter_columns())
+    statement = (fights_statement if kind == 'fights' else fighters_statement)(names)
+    db = get_read_sessionmaker()()
+    try:
+        rows = db.execute(statement).all()
+        yield b"".join(dumps(dict(zip(names, row))) + b"\n" for row in rows)
+    finally:
+        db.close()
+
+
+def run(scale: int, formats, reseed: bool, seed: int):
+    prepare_database(default_database_url(scale), scale, reseed, seed)
+
+    from database.config import SessionLocal
+    from database.schema import Fight, Fighter
+    from services.export import export_stream, pa
+
+    db = SessionLocal()
+    row_counts = {'fights': db.query(Fight).count(), 'fighters': db.query(Fighter).count()}
+    db.close()
+
+    if 'arrow' in formats and pa is None:
+        print("pyarrow is not installed; skipping Arrow")
+        formats = [fmt for fmt in formats if fmt != 'arrow']
+
+    results = {}
+    for kind, rows in row_counts.items():
+        runs = {fmt: _measure_stream(export_stream(kind, fmt)) for fmt in formats}
+        runs['materialized_ndjson'] = _measure_stream(_materialized(kind))
+        for name, r in runs.items():
+            r['rows_per_second'] = rows / (r['total_ms'] / 1000) if r['total_ms'] else 0.0
+            print(f"{kind:<9} {name:<20} {rows:>8} rows  first byte {r['first_byte_ms']:>8.1f}ms  "
+                  f"total {r['total_ms']:>8.0f}ms  {r['rows_per_second']:>9.0f} rows/s  "
+                  f"{r['bytes'] / 2 ** 20:>7.1f} MiB  peak {r['peak_mib']:>6.1f} MiB")
+        results[kind] = runs
+
+    name = f"export-x{scale}"
+    current = {'revision': None, 'results': results}
+    previous = load_results(name)
+    path = save_results(name, results)
+    print(f"\nResults saved to {path}")
+    if previous:
+        print_comparison(previous, current)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk export benchmark")
+    parser.add_argument("--scale", type=int, default=1, help="Dataset multiplier (synthetic fight history)")
+    parser.add_argument("--formats", nargs="+", default=['ndjson', 'csv', 'arrow'], choices=['ndjson', 'csv', 'arrow'])
+    parser.add_argument("--reseed", action="store_true", help="Rebuild the benchmark database")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run(args.scale, args.formats, args.reseed, args.seed)
@@ -0,0 +1,171 @@
+"""
+Benchmark: live odds latency from a bookmaker update to SSE subscribers
+(services/live_odds.py, /api/v1/odds/stream)
+
+Starts the API under uvicorn reading odds from a TCP feed served by this
+process, opens N concurrent SSE subscribers, then sends --updates odds
+updates for distinct recent fights at --rate per second. Each update
+carries unique odds so every frame a subscriber receives is matched to the
+moment it was written to the feed. Reports feed-to-client latency over all
+deliveries and the server's own feed-to-publish latency (/odds/status).
+The subscribers run in this process, so on a small machine their reads
+share the CPU with the server and count towards the latency. The
+benchmark database's live prices are restored afterwards.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_live_odds --subscribers 100 1000 3000
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+import urllib.request
+
+from benchmarks.common import load_results, percentiles, print_comparison, save_results, use_benchmark_database
+from benchmarks.load_test import free_port, start_server, stop_server
+
+ODDS_PATTERN = re.compile(rb'"red_odds":(-?[0-9.]+)')
+
+# Subscribers connecting at once (stays under the server's listen backlog)
+CONNECT_BATCH = 200
+
+
+def _get_json(base_url: str, path: str) -> dict:
+    with urllib.request.urlopen(base_url + path, timeout=30) as response:
+        return json.loads(response.read())
+
+
+class Subscriber:
+    """Raw HTTP/1.1 SSE client recording (arrival time, red_odds) per odds frame"""
+
+    def __init__(self):
+        self.received = []
+        self._reader = None
+        self._writer = None
+        self._task = None
+
+    async def connect(self, port: int):
+        self._reader, self._writer = await asyncio.open_connection('127.0.0.1', port)
+        self._writer.write(b"GET /api/v1/odds/stream HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n")
+        await self._reader.readuntil(b"\r\n\r\n")
+        self._task = asyncio.create_task(self._read())
+
+    async def _read(self):
+        buffer = b""
+        while chunk := await self._reader.read(65536):
+            arrived = time.monotonic()
+            buffer += chunk
+            *frames, buffer = buffer.split(b"\n\n")
+            for frame in frames:
+                match = ODDS_PATTERN.search(frame)
+                if match:
+                    self.received.append((arrived, float(match.group(1))))
+
+    def close(self):
+        self._task.cancel()
+        self._writer.close()
+
+
+async def measure(port: int, feed_port: int, fight_ids, subscribers: int, updates: int, rate: float, offset: int) -> dict:
+    feed_writers = []
+    connected = asyncio.Event()
+
+    async def accept(reader, writer):
+        feed_writers.append(writer)
+        connected.set()
+
+    server = await asyncio.start_server(accept, '127.0.0.1', feed_port)
+    await asyncio.wait_for(connected.wait(), 60)
+    feed = feed_writers[-1]
+
+    clients = [Subscriber() for _ in range(subscribers)]
+    for start in range(0, subscribers, CONNECT_BATCH):
+        await asyncio.gather(*(client.connect(port) for client in clients[start:start + CONNECT_BATCH]))
+
+    sent = {}
+    for i in range(updates):
+        red_odds = -float(100_000 + offset + i)
+        line = json.dumps({'fight_id': fight_ids[i % len(fight_ids)], 'red_odds': red_odds, 'blue_odds': 150})
+        sent[red_odds] = time.monotonic()
+        feed.write(line.encode() + b"\n")
+        await feed.drain()
+        await asyncio.sleep(1 / rate)
+
+    expected = updates * subscribers
+    deadline = time.monotonic() + 30
+    while sum(len(client.received) for client in clients) < expected and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+
+    latencies = [arrived - sent[odds] for client in clients for arrived, odds in client.received if odds in sent]
+    for client in clients:
+        client.close()
+    feed.close()
+    server.close()
+
+    return {
+        'deliveries': len(latencies),
+        'delivered_fraction': len(latencies) / expected,
+        'latency_ms': {point: value * 1000 for point, value in percentiles(latencies).items()},
+        'max_ms': max(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def run(subscriber_counts, updates: int, rate: float, fights: int, reseed: bool):
+    database_url = use_benchmark_database(reseed=reseed)
+
+    from database.config import SessionLocal, engine
+    from database.schema import Fight
+    from services.live_odds import ensure_live_odds_columns
+
+    ensure_live_odds_columns(engine)
+    db = SessionLocal()
+    original = db.query(Fight.id, Fight.live_red_odds, Fight.live_blue_odds, Fight.odds_updated_at).filter(
+        Fight.red_odds.isnot(None), Fight.blue_odds.isnot(None)
+    ).order_by(Fight.date.desc()).limit(fights).all()
+    db.close()
+    fight_ids = [row.id for row in original]
+
+    results = {}
+    feed_port = free_port()
+    process, base_url = start_server(database_url, 1, env={'LIVE_ODDS_FEED': f"tcp://127.0.0.1:{feed_port}"})
+    port = int(base_url.rsplit(":", 1)[1])
+    try:
+        print(f"{updates} updates at {rate:.0f}/s over {len(fight_ids)} fights")
+        print(f"{'subscribers':>11} {'delivered':>10} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'publish p99':>12}")
+        for n, subscribers in enumerate(subscriber_counts):
+            result = asyncio.run(measure(port, feed_port, fight_ids, subscribers, updates, rate, n * updates))
+            result['publish_ms'] = _get_json(base_url, '/api/v1/odds/status')['latency_ms']
+            results[f"subscribers_{subscribers}"] = result
+            latency = result['latency_ms']
+            print(f"{subscribers:>11} {result['delivered_fraction']:>9.1%} {latency['p50']:>7.1f}ms "
+                  f"{latency['p95']:>7.1f}ms {latency['p99']:>7.1f}ms {result['max_ms']:>7.1f}ms "
+                  f"{result['publish_ms']['p99']:>10.2f}ms")
+    finally:
+        stop_server(process)
+        db = SessionLocal()
+        db.bulk_update_mappings(Fight, [
+            {'id': row.id, 'live_red_odds': row.live_red_odds, 'live_blue_odds': row.live_blue_odds,
+             'odds_updated_at': row.odds_updated_at} for row in original
+        ])
+        db.commit()
+        db.close()
+
+    current = {'revision': None, 'results': results}
+    previous = load_results('live_odds')
+    path = save_results('live_odds', results)
+    print(f"\nResults saved to {path}")
+    if previous:
+        print_comparison(previous, current)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Odds update to SSE subscriber latency")
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[100, 1000, 3000])
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=50, help="Updates per second")
+    parser.add_argument("--fights", type=int, default=50, help="Distinct fights the updates cycle through")
+    parser.add_argument("--reseed", action="store_true", help="Rebuild the benchmark database from the CSV")
+    args = parser.parse_args()
+
+    run(args.subscribers, args.updates, args.rate, args.fights, args.reseed)
@@ -0,0 +1,128 @@
+"""
+Benchmark: head-to-head history and card rematch checks, OR of both corner
+orders vs the canonical pair key (services/matchups.py)
+
+Seeds a SQLite file from the CSV (scaled up with synthetic fights like the
+load test), then for sampled fighter pairs - half that have met, half that
+have not - reads the history the old way (OR of (red, blue) and (blue, red),
+then both fighters' names lazily per fight) and with previous_matchups; and
+for sampled cards counts earlier meetings per fight, one OR query per fight
+vs one previous_meetings call per card. Reports time and SQL statements per
+lookup, checks both return the same fights, and prints the query plans.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_matchups --scale 20
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import RESULTS_DIR, QueryCounter, load_results, print_comparison, save_results
+from benchmarks.load_test import prepare_database
+
+
+def _or_filter(Fight, a: int, b: int):
+    return (((Fight.red_fighter_id == a) & (Fight.blue_fighter_id == b)) |
+            ((Fight.red_fighter_id == b) & (Fight.blue_fighter_id == a)))
+
+
+def or_history(db, a: int, b: int) -> list:
+    """compare_fighters before the pair key"""
+    from database.schema import Fight
+
+    fights = db.query(Fight).filter(_or_filter(Fight, a, b)).order_by(Fight.date.desc()).all()
+    return [(fight.id, fight.red_fighter.name, fight.blue_fighter.name) for fight in fights]
+
+
+def or_previous_meetings(db, fights) -> dict:
+    from sqlalchemy import func
+    from database.schema import Fight
+
+    return {
+        fight.id: db.query(func.count(Fight.id)).filter(
+            _or_filter(Fight, fight.red_fighter_id, fight.blue_fighter_id), Fight.date < fight.date
+        ).scalar()
+        for fight in fights
+    }
+
+
+def measure(db, engine, func, samples) -> dict:
+    """Mean ms and SQL statements per sample, each from a cold session; also returns the results"""
+    results, elapsed = [], 0.0
+    with QueryCounter(engine) as counter:
+        for sample in samples:
+            db.expunge_all()
+            start = time.perf_counter()
+            results.append(func(db, *sample))
+            elapsed += time.perf_counter() - start
+    return {'ms': elapsed / len(samples) * 1000, 'queries': counter.count / len(samples)}, results
+
+
+def run(scale: int, lookups: int, cards: int, reseed: bool, seed: int):
+    db_path = RESULTS_DIR / f"matchups-x{scale}.db"
+    prepare_database(f"sqlite:///{db_path}", scale, reseed, seed)
+
+    from sqlalchemy import func, text
+    from database.config import SessionLocal, engine
+    from database.schema import Fight, Fighter
+    from services.matchups import previous_matchups, previous_meetings
+
+    rng = random.Random(seed)
+    db = SessionLocal()
+    fights = db.query(func.count(Fight.id)).scalar()
+    met = rng.sample(db.query(Fight.red_fighter_id, Fight.blue_fighter_id).all(), lookups // 2)
+    fighter_ids = [fighter_id for (fighter_id,) in db.query(Fighter.id)]
+    pairs = [tuple(pair) for pair in met] + [tuple(rng.sample(fighter_ids, 2)) for _ in range(lookups - len(met))]
+    events = [name for (name,) in db.query(Fight.event_name).filter(Fight.event_name.isnot(None)).distinct()]
+    card_names = rng.sample(events, min(cards, len(events)))
+
+    def new_history(db, a, b):
+        return [(row['id'], row['red_fighter_name'], row['blue_fighter_name']) for row in previous_matchups(db, a, b)]
+
+    def card(db, name, check):
+        return check(db, db.query(Fight).filter(Fight.event_name == name).all())
+
+    results = {}
+    results['history_or'], expected = measure(db, engine, or_history, pairs)
+    results['history_pair_key'], actual = measure(db, engine, new_history, pairs)
+    assert actual == expected, "head-to-head histories differ"
+    results['card_or'], expected = measure(db, engine, lambda db, name: card(db, name, or_previous_meetings),
+                                           [(name,) for name in card_names])
+    results['card_pair_key'], actual = measure(db, engine, lambda db, name: card(db, name, previous_meetings),
+                                               [(name,) for name in card_names])
+    assert actual == expected, "card rematch counts differ"
+
+    print(f"{fights} fights, {len(pairs)} pairs ({len(met)} that met), {len(card_names)} cards")
+    print(f"{'lookup':<18} {'ms':>8} {'queries':>8}")
+    for name, result in results.items():
+        print(f"{name:<18} {result['ms']:>8.3f} {result['queries']:>8.1f}")
+
+    a, b = pairs[0]
+    for label, statement in (
+        ('or', f"SELECT id FROM fights WHERE (red_fighter_id = {a} AND blue_fighter_id = {b}) "
+               f"OR (red_fighter_id = {b} AND blue_fighter_id = {a}) ORDER BY date DESC"),
+        ('pair_key', f"SELECT id FROM fights WHERE pair_key = {min(a, b) * 2 ** 32 + max(a, b)} ORDER BY date DESC"),
+    ):
+        plan = "; ".join(row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {statement}")))
+        print(f"plan ({label}): {plan}")
+    db.close()
+
+    name = f"matchups-x{scale}"
+    current = {'revision': None, 'results': results}
+    previous = load_results(name)
+    path = save_results(name, results)
+    print(f"\nResults saved to {path}")
+    if previous:
+        print_comparison(previous, current)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Head-to-head and rematch lookups: OR query vs pair key")
+    parser.add_argument("--scale", type=int, default=1, help="Grow the fight history N times with synthetic fights")
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--cards", type=int, default=200)
+    parser.add_argument("--reseed", action="store_true", help="Rebuild the benchmark database from the CSV")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run(args.scale, args.lookups, args.cards, args.reseed, args.seed)
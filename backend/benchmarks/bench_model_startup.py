@@ -0,0 +1,138 @@
+"""
+Benchmark: worker cold start and first-prediction latency, pickled
+scikit-learn model vs compiled NumPy model
+
+Each measurement runs in a fresh interpreter so import costs are included.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_model_startup --repeats 5
+"""
+import argparse
+import json
+import pickle
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.append(str(BACKEND_DIR))
+
+from services.ml_predictor import MODEL_FEATURES
+from services.model_export import export_model
+
+PICKLE_PROBE = """
+import time
+start = time.perf_counter()
+import pickle
+import numpy as np
+with open({path!r}, 'rb') as f:
+    model = pickle.load(f)
+loaded = time.perf_counter()
+model.predict_proba(np.zeros((1, {n_features})))
+first = time.perf_counter()
+import json, sys
+print(json.dumps({{'load': loaded - start, 'first_prediction': first - loaded, 'sklearn_imported': 'sklearn' in sys.modules}}))
+"""
+
+COMPILED_PROBE = """
+import time
+start = time.perf_counter()
+import sys
+sys.path.insert(0, {backend!r})
+from services.compiled_model import CompiledModel
+model = CompiledModel.load({path!r})
+loaded = time.perf_counter()
+model.predict_proba(__import__('numpy').zeros((1, {n_features})))
+first = time.perf_counter()
+import json
+print(json.dumps({{'load': loaded - start, 'first_prediction': first - loaded, 'sklearn_imported': 'sklearn' in sys.modules}}))
+"""
+
+
+def train_models(n_rows: int, seed: int):
+    """Fit the model families the exporter supports on synthetic matchups"""
+    from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, len(MODEL_FEATURES)))
+    weights = rng.normal(size=len(MODEL_FEATURES))
+    y = (rng.random(n_rows) < 1 / (1 + np.exp(-X @ weights))).astype(int)
+
+    return {
+        'logistic': make_pipeline(StandardScaler(), LogisticRegression()).fit(X, y),
+        'random_forest': RandomForestClassifier(n_estimators=200, max_depth=10, random_state=seed).fit(X, y),
+        'gradient_boosting': GradientBoostingClassifier(n_estimators=200, max_depth=3, random_state=seed).fit(X, y),
+    }
+
+
+def probe(script: str, repeats: int) -> dict:
+    runs = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+        runs.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return {
+        'load_ms': statistics.median(run['load'] for run in runs) * 1000,
+        'first_prediction_ms': statistics.median(run['first_prediction'] for run in runs) * 1000,
+        'sklearn_imported': runs[-1]['sklearn_imported'],
+    }
+
+
+def score_batches(model_path: Path, compiled_path: Path, n_rows: int):
+    """Steady-state batch scoring throughput for both formats"""
+    import time
+    from services.compiled_model import CompiledModel
+
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    compiled = CompiledModel.load(compiled_path)
+    X = np.random.default_rng(1).normal(size=(n_rows, len(MODEL_FEATURES)))
+
+    start = time.perf_counter()
+    model.predict_proba(X)
+    sklearn_secs = time.perf_counter() - start
+    start = time.perf_counter()
+    compiled.predict_proba(X)
+    compiled_secs = time.perf_counter() - start
+    return n_rows / sklearn_secs, n_rows / compiled_secs
+
+
+def run(repeats: int, batch_rows: int, seed: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, model in train_models(5000, seed).items():
+            model_path = Path(tmp) / f"{name}.pkl"
+            compiled_path = Path(tmp) / f"{name}.npz"
+            with open(model_path, 'wb') as f:
+                pickle.dump(model, f)
+            export_model(str(model_path), str(compiled_path))
+
+            n_features = len(MODEL_FEATURES)
+            pickled = probe(PICKLE_PROBE.format(path=str(model_path), n_features=n_features), repeats)
+            compiled = probe(COMPILED_PROBE.format(
+                path=str(compiled_path), backend=str(BACKEND_DIR), n_features=n_features
+            ), repeats)
+            sklearn_rate, compiled_rate = score_batches(model_path, compiled_path, batch_rows)
+
+            print(f"\n{name} (pickle {model_path.stat().st_size / 1024:.0f} KiB, "
+                  f"compiled {compiled_path.stat().st_size / 1024:.0f} KiB)")
+            print(f"  {'format':<10} {'cold load':>10} {'first pred':>11} {'sklearn':>8} {'rows/sec':>12}")
+            print(f"  {'pickle':<10} {pickled['load_ms']:>8.1f}ms {pickled['first_prediction_ms']:>9.2f}ms "
+                  f"{str(pickled['sklearn_imported']):>8} {sklearn_rate:>12,.0f}")
+            print(f"  {'compiled':<10} {compiled['load_ms']:>8.1f}ms {compiled['first_prediction_ms']:>9.2f}ms "
+                  f"{str(compiled['sklearn_imported']):>8} {compiled_rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Model cold-start benchmark")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--batch-rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run(args.repeats, args.batch_rows, args.seed)
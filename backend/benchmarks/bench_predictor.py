@@ -0,0 +1,150 @@
+"""
+Benchmark: MLPredictor hot paths against a local SQLite copy of the dataset
+
+Measures single-prediction latency, batch throughput, SQL statements per
+prediction and memory allocated per prediction for the rule-based path and
+the model-based paths (compiled and pickled scikit-learn). Results are stored
+per commit under benchmarks/results/predictor/ and compared with the
+previous run.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_predictor --pairs 200 --rounds 3
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from benchmarks.common import (
+    QueryCounter, load_results, percentiles, print_comparison, save_results, use_benchmark_database
+)
+
+
+def _latencies_us(func, calls, rounds: int):
+    samples = []
+    for _ in range(rounds):
+        for args in calls:
+            start = time.perf_counter_ns()
+            func(*args)
+            samples.append((time.perf_counter_ns() - start) / 1000)
+    return samples
+
+
+def _peak_kib(func, calls) -> float:
+    """Mean peak traced memory per call"""
+    tracemalloc.start()
+    peaks = []
+    for args in calls:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append((peak - baseline) / 1024)
+    tracemalloc.stop()
+    return sum(peaks) / len(peaks)
+
+
+def _build_models():
+    """Compiled and pickled models trained on synthetic data (the repo ships none)"""
+    from benchmarks.bench_model_startup import train_models
+    from services.model_export import compile_model
+
+    sklearn_model = train_models(5000, seed=0)['gradient_boosting']
+    return {'compiled': compile_model(sklearn_model), 'sklearn': sklearn_model}
+
+
+def bench_path(predictor, db, engine, pairs, rounds: int) -> dict:
+    predict_calls = [(red, blue, db) for red, blue in pairs]
+    features = [predictor._extract_features(red, blue, db) for red, blue in pairs]
+    rule_calls = [(f, red, blue) for f, (red, blue) in zip(features, pairs)]
+
+    # Warm up caches and the session identity map
+    for args in predict_calls[:10]:
+        predictor.predict_fight(*args)
+
+    start = time.perf_counter()
+    for args in predict_calls:
+        predictor.predict_fight(*args)
+    batch_secs = time.perf_counter() - start
+
+    with QueryCounter(engine) as counter:
+        for args in predict_calls:
+            predictor.predict_fight(*args)
+
+    results = {
+        'predict_fight_us': percentiles(_latencies_us(predictor.predict_fight, predict_calls, rounds)),
+        'extract_features_us': percentiles(_latencies_us(predictor._extract_features, predict_calls, rounds)),
+        'batch_predictions_per_sec': len(predict_calls) / batch_secs,
+        'queries_per_prediction': counter.count / len(predict_calls),
+        'predict_fight_peak_kib': _peak_kib(predictor.predict_fight, predict_calls[:50]),
+    }
+    if predictor.model is None:
+        results['predict_rule_based_us'] = percentiles(_latencies_us(predictor._predict_rule_based, rule_calls, rounds))
+    else:
+        results['predict_with_model_us'] = percentiles(_latencies_us(predictor._predict_with_model, rule_calls, rounds))
+    return results
+
+
+def bench_odds_to_probability(calls: int = 200_000) -> dict:
+    from services.ml_predictor import MLPredictor
+
+    odds = [random.choice([-450.0, -130.0, 110.0, 350.0]) for _ in range(1000)]
+    start = time.perf_counter_ns()
+    for i in range(calls):
+        MLPredictor.odds_to_probability(odds[i % 1000])
+    return {'ns_per_call': (time.perf_counter_ns() - start) / calls}
+
+
+def run(n_pairs: int, rounds: int, seed: int, reseed: bool, paths):
+    use_benchmark_database(reseed=reseed)
+
+    from database.config import SessionLocal, engine
+    from database.schema import Fighter
+    from services.ml_predictor import MLPredictor
+
+    random.seed(seed)
+    db = SessionLocal()
+    fighters = db.query(Fighter).filter(Fighter.total_fights > 0).all()
+    pairs = [tuple(random.sample(fighters, 2)) for _ in range(n_pairs)]
+
+    models = _build_models() if set(paths) - {'rule_based'} else {}
+    results = {'odds_to_probability': bench_odds_to_probability()}
+
+    for path in paths:
+        predictor = MLPredictor()
+        predictor.model = models.get(path)
+        results[path] = bench_path(predictor, db, engine, pairs, rounds)
+
+        r = results[path]
+        print(f"\n{path}")
+        print(f"  predict_fight     p50 {r['predict_fight_us']['p50']:>9.1f}us  "
+              f"p95 {r['predict_fight_us']['p95']:>9.1f}us  p99 {r['predict_fight_us']['p99']:>9.1f}us")
+        print(f"  _extract_features p50 {r['extract_features_us']['p50']:>9.1f}us")
+        scoring = r.get('predict_rule_based_us') or r.get('predict_with_model_us')
+        print(f"  scoring           p50 {scoring['p50']:>9.1f}us")
+        print(f"  batch             {r['batch_predictions_per_sec']:>9.0f} predictions/sec")
+        print(f"  queries           {r['queries_per_prediction']:>9.1f} per prediction")
+        print(f"  memory            {r['predict_fight_peak_kib']:>9.1f} KiB peak per prediction")
+
+    print(f"\nodds_to_probability {results['odds_to_probability']['ns_per_call']:.0f}ns per call")
+    db.close()
+
+    current = {'revision': None, 'results': results}
+    previous = load_results('predictor')
+    path = save_results('predictor', results)
+    print(f"\nResults saved to {path}")
+    if previous:
+        print_comparison(previous, current)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Predictor micro-benchmarks")
+    parser.add_argument("--pairs", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reseed", action="store_true", help="Rebuild the benchmark database from the CSV")
+    parser.add_argument("--paths", nargs="+", default=['rule_based', 'compiled', 'sklearn'],
+                        choices=['rule_based', 'compiled', 'sklearn'])
+    args = parser.parse_args()
+
+    run(args.pairs, args.rounds, args.seed, args.reseed, args.paths)
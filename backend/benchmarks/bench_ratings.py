@@ -0,0 +1,78 @@
+"""
+Benchmark: replay a synthetic fight history through the Elo rating engine
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_ratings --fights 50000000 --fighters 200000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.ratings import EloRatingEngine
+
+
+def synthetic_fights(n_fights: int, n_fighters: int, seed: int):
+    """Random (red_id, blue_id, red_score) arrays with distinct opponents"""
+    rng = np.random.default_rng(seed)
+    red_ids = rng.integers(0, n_fighters, size=n_fights, dtype=np.int64)
+    offsets = rng.integers(1, n_fighters, size=n_fights, dtype=np.int64)
+    blue_ids = (red_ids + offsets) % n_fighters
+    red_scores = rng.choice(np.array([1.0, 0.0, 0.5]), size=n_fights, p=[0.58, 0.41, 0.01])
+    return red_ids, blue_ids, red_scores
+
+
+def run(n_fights: int, n_fighters: int, chunk_size: int, seed: int):
+    engine = EloRatingEngine()
+    replayed = 0
+    replay_secs = 0.0
+    generate_secs = 0.0
+
+    print(f"Replaying {n_fights:,} fights across {n_fighters:,} fighters (chunks of {chunk_size:,})")
+
+    while replayed < n_fights:
+        size = min(chunk_size, n_fights - replayed)
+
+        start = time.perf_counter()
+        red_ids, blue_ids, red_scores = synthetic_fights(size, n_fighters, seed + replayed)
+        generate_secs += time.perf_counter() - start
+
+        # Each chunk continues from the engine's current state, exactly like
+        # an incremental ingest applying new fights on top of history
+        start = time.perf_counter()
+        snapshots = engine.replay_arrays(red_ids, blue_ids, red_scores)
+        replay_secs += time.perf_counter() - start
+
+        replayed += size
+        print(f"  {replayed:,} fights, {replayed / replay_secs:,.0f} fights/sec, "
+              f"last snapshot {snapshots[-1].round(1).tolist()}")
+
+    ratings = np.fromiter(engine.ratings.values(), dtype=np.float64)
+    print()
+    print(f"Replay time:      {replay_secs:.2f}s ({replayed / replay_secs:,.0f} fights/sec)")
+    print(f"Generation time:  {generate_secs:.2f}s")
+    print(f"Rated fighters:   {len(ratings):,}")
+    print(f"Rating mean/std:  {ratings.mean():.1f} / {ratings.std():.1f}")
+
+    # Single-fight incremental update latency
+    samples = 100_000
+    start = time.perf_counter()
+    for i in range(samples):
+        engine.apply(i % n_fighters, (i + 1) % n_fighters, 1.0)
+    per_fight_us = (time.perf_counter() - start) / samples * 1e6
+    print(f"Incremental apply: {per_fight_us:.2f}us per fight")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Elo rating engine replay benchmark")
+    parser.add_argument("--fights", type=int, default=50_000_000)
+    parser.add_argument("--fighters", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run(args.fights, args.fighters, args.chunk_size, args.seed)
@@ -0,0 +1,122 @@
+"""
+Benchmark: the CSV transformation stages on read_csv's default dtypes vs the
+compact typed frame (pipeline/raw_frame.py)
+
+Runs every stage of pipeline/transform.py back to back without the stage
+cache, once from pd.read_csv and once from load_raw_frame, and reports the
+time per stage, the frame's memory after loading and the peak traced
+memory of the whole run. Both runs must write identical files. --scale
+repeats the raw rows (with renamed fighters) to grow the working set.
+'transform' is the in-memory stages alone; CSV formatting in save is the
+same work for both and dominates the total.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_raw_frame --scale 20
+"""
+import argparse
+import hashlib
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.common import RESULTS_DIR, load_results, print_comparison, save_results
+from pipeline import transform
+from pipeline.raw_frame import load_raw_frame
+from pipeline.statistics import fit_csv
+
+LOADERS = {'default': pd.read_csv, 'compact': load_raw_frame}
+
+
+def scaled_raw_csv(scale: int) -> Path:
+    """The raw CSV repeated `scale` times, each copy with its own fighter names"""
+    if scale == 1:
+        return transform.RAW_CSV
+    path = RESULTS_DIR / f"raw-x{scale}.csv"
+    if not path.exists():
+        raw = pd.read_csv(transform.RAW_CSV, dtype=str, keep_default_na=False)
+        copies = []
+        for copy in range(scale):
+            frame = raw.copy()
+            if copy:
+                for column in ('RedFighter', 'BlueFighter'):
+                    frame[column] = frame[column] + f" {copy}"
+            copies.append(frame)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pd.concat(copies, ignore_index=True).to_csv(path, index=False)
+    return path
+
+
+def run_stages(loader, raw_path: Path, statistics_path: Path, output: Path) -> dict:
+    timings = {}
+
+    def timed(name, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        timings[name] = (time.perf_counter() - start) * 1000
+        return result
+
+    df = timed('load', loader, raw_path)
+    frame_bytes = df.memory_usage(deep=True).sum()
+    df = timed('fill_odds', transform.fill_odds, df, statistics_path, 'Unknown')
+    df = timed('parse_date', transform.parse_date, df, '%Y-%m-%d')
+    df = timed('time_to_seconds', transform.time_to_seconds, df, 300)
+    df = timed('scale_odds', transform.scale_odds, df, statistics_path)
+    df = timed('win_percentage', transform.win_percentage, df)
+    timed('save', transform.save, df, output)
+    timings['transform'] = sum(ms for stage, ms in timings.items() if stage not in ('load', 'save'))
+    timings['total'] = timings['load'] + timings['transform'] + timings['save']
+    return {'stages_ms': timings, 'frame_mib': frame_bytes / 2 ** 20}
+
+
+def peak_mib(loader, raw_path: Path, statistics_path: Path, output: Path) -> float:
+    tracemalloc.start()
+    run_stages(loader, raw_path, statistics_path, output)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def run(scale: int, repeat: int):
+    raw_path = scaled_raw_csv(scale)
+    statistics_path = RESULTS_DIR / f"odds-x{scale}.json"
+    fit_csv(raw_path).save(statistics_path)
+
+    results = {}
+    digests = {}
+    for name, loader in LOADERS.items():
+        output = RESULTS_DIR / f"transformed-{name}-x{scale}.csv"
+        runs = [run_stages(loader, raw_path, statistics_path, output) for _ in range(repeat)]
+        best = min(runs, key=lambda r: r['stages_ms']['total'])
+        best['peak_mib'] = peak_mib(loader, raw_path, statistics_path, output)
+        digests[name] = hashlib.sha256(output.read_bytes()).hexdigest()
+        output.unlink()
+        results[name] = best
+
+    rows = sum(1 for _ in open(raw_path)) - 1
+    print(f"{rows} rows, best of {repeat}")
+    print(f"{'stage':<16} {'default':>10} {'compact':>10}")
+    for stage in results['default']['stages_ms']:
+        print(f"{stage:<16} {results['default']['stages_ms'][stage]:>8.0f}ms {results['compact']['stages_ms'][stage]:>8.0f}ms")
+    for metric in ('frame_mib', 'peak_mib'):
+        print(f"{metric:<16} {results['default'][metric]:>8.1f}MB {results['compact'][metric]:>8.1f}MB")
+    speedup = results['default']['stages_ms']['total'] / results['compact']['stages_ms']['total']
+    print(f"\nend to end: {speedup:.2f}x, outputs {'identical' if digests['default'] == digests['compact'] else 'DIFFER'}")
+
+    name = f"raw-frame-x{scale}"
+    current = {'revision': None, 'results': results}
+    previous = load_results(name)
+    path = save_results(name, results)
+    print(f"\nResults saved to {path}")
+    if previous:
+        print_comparison(previous, current)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Default vs compact raw frame through the transformation stages")
+    parser.add_argument("--scale", type=int, default=1, help="Repeat the raw CSV N times")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    run(args.scale, args.repeat)
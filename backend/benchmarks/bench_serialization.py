@@ -0,0 +1,114 @@
+"""
+Benchmark: response serialization for the heavy read endpoints
+
+For each endpoint's payload, compares the encode step FastAPI runs for a
+plain return value (response_model validation where the route declares one,
+jsonable_encoder, JSONResponse) with FastJSONResponse, then measures
+end-to-end latency of the endpoint through the ASGI app. The two encodings
+must produce the same JSON.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_serialization --rounds 200
+"""
+import argparse
+import json
+import time
+from typing import List
+
+from benchmarks.common import load_results, percentiles, print_comparison, save_results, use_benchmark_database
+
+
+def _legacy_encoder(model):
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from pydantic import TypeAdapter
+
+    adapter = TypeAdapter(model) if model is not None else None
+
+    def encode(payload) -> bytes:
+        if adapter is not None:
+            payload = adapter.validate_python(payload)
+        return JSONResponse(jsonable_encoder(payload)).body
+
+    return encode
+
+
+def _median_us(func, payload, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter_ns()
+        func(payload)
+        samples.append((time.perf_counter_ns() - start) / 1000)
+    return percentiles(samples, points=(50,))['p50']
+
+
+def run(rounds: int, reseed: bool):
+    use_benchmark_database(reseed=reseed)
+
+    from fastapi.testclient import TestClient
+    from database.config import SessionLocal
+    from database.schema import Fight, Fighter
+    from models.schemas import FighterProfile, FighterStats
+    from services.serialization import FastJSONResponse
+
+    import main
+
+    db = SessionLocal()
+    fighter = db.query(Fighter).order_by(Fighter.total_fights.desc()).first()
+    event_name = db.query(Fight.event_name).filter(Fight.event_name.isnot(None)).order_by(Fight.date.desc()).first()
+    db.close()
+
+    endpoints = [
+        ('profile', f"/api/v1/fighters/{fighter.id}", FighterProfile),
+        ('by_name', f"/api/v1/fighters/name/{fighter.name}", FighterProfile),
+        ('list', "/api/v1/fighters/?limit=100", List[FighterStats]),
+        ('timeline', f"/api/v1/fighters/{fighter.id}/stats/timeline", None),
+    ]
+    if event_name is not None:
+        endpoints.append(('fight_card', f"/api/v1/predictions/fight-card/{event_name[0]}", None))
+
+    client = TestClient(main.app)
+    headers = {'Accept-Encoding': 'identity'}
+    results = {}
+    for name, path, model in endpoints:
+        response = client.get(path, headers=headers)
+        response.raise_for_status()
+        payload = response.json()
+
+        legacy = _legacy_encoder(model)
+        fast = FastJSONResponse(payload).render
+        if json.loads(legacy(payload)) != json.loads(fast(payload)):
+            raise AssertionError(f"{name}: FastJSONResponse output differs from the FastAPI encoding")
+
+        latencies = []
+        for _ in range(rounds):
+            start = time.perf_counter_ns()
+            client.get(path, headers=headers)
+            latencies.append((time.perf_counter_ns() - start) / 1000)
+
+        results[name] = {
+            'bytes': len(response.content),
+            'legacy_encode_us': _median_us(legacy, payload, rounds),
+            'fast_encode_us': _median_us(fast, payload, rounds),
+            'request_us': percentiles(latencies),
+        }
+        r = results[name]
+        print(f"{name:<11} {r['bytes']:>7} bytes  encode {r['legacy_encode_us']:>8.1f}us -> "
+              f"{r['fast_encode_us']:>6.1f}us ({r['legacy_encode_us'] / r['fast_encode_us']:>5.1f}x)  "
+              f"request p50 {r['request_us']['p50']:>8.1f}us p95 {r['request_us']['p95']:>8.1f}us")
+
+    current = {'revision': None, 'results': results}
+    previous = load_results('serialization')
+    path = save_results('serialization', results)
+    print(f"\nResults saved to {path}")
+    if previous:
+        print_comparison(previous, current)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Response serialization benchmark")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--reseed", action="store_true", help="Rebuild the benchmark database from the CSV")
+    args = parser.parse_args()
+
+    run(args.rounds, args.reseed)
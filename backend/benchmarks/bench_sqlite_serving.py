@@ -0,0 +1,87 @@
+"""
+Benchmark: read-only SQLite serving artifact vs the default SQLite setup
+
+Builds the serving artifact (database/serving.py) from the load-test
+database, then drives the hot read endpoints against a uvicorn server on
+each configuration in turn:
+    default  - the seeded database as the API opens any sqlite:// URL
+    serving  - the artifact, opened read-only with mmap and a larger statement cache
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_sqlite_serving --scale 2 --duration 20
+"""
+import argparse
+
+from benchmarks.common import RESULTS_DIR, load_results, print_comparison, save_results
+from benchmarks.load_test import LoadGenerator, default_database_url, prepare_database, start_server, stop_server
+
+# Read-only routes that touch the database on every request
+HOT_MIX = {'profile': 25, 'timeline': 20, 'head_to_head': 20, 'predict': 25, 'fight_card': 10}
+
+SERVING_ENV = {
+    'SQLITE_READ_ONLY': "1",
+    'SQLITE_MMAP_SIZE': str(1024 ** 3),
+    'SQLITE_STATEMENT_CACHE': "512",
+}
+
+
+def drive(database_url: str, env: dict, targets: dict, mix: dict, args) -> dict:
+    process, base_url = start_server(database_url, args.workers, env=env)
+    try:
+        generator = LoadGenerator(base_url, targets, mix, args.concurrency, args.seed)
+        window = generator.run(args.duration, args.warmup)
+    finally:
+        stop_server(process)
+    return generator.summarize(window)
+
+
+def run(args):
+    from database.serving import build_serving_database, describe
+
+    database_url = default_database_url(args.scale)
+    targets = prepare_database(database_url, args.scale, args.reseed, args.seed)
+    mix = {route: weight for route, weight in HOT_MIX.items() if route != 'fight_card' or targets['events']}
+
+    artifact = RESULTS_DIR / f"serving-x{args.scale}.db"
+    build_serving_database(database_url, artifact)
+    print(f"Built {artifact} ({describe(artifact)['size_mib']:.1f} MiB)")
+
+    configurations = {
+        'default': (database_url, {}),
+        'serving': (f"sqlite:///{artifact}", SERVING_ENV),
+    }
+    results = {}
+    for name, (url, env) in configurations.items():
+        print(f"Driving {name} for {args.warmup:.0f}s warmup + {args.duration:.0f}s at concurrency {args.concurrency}")
+        results[name] = drive(url, env, targets, mix, args)
+
+    print(f"\n{'route':<14} {'default p50':>12} {'serving p50':>12} {'default p95':>12} {'serving p95':>12}")
+    for route in [*mix, 'overall']:
+        default = results['default']['routes'].get(route, results['default']['overall'])
+        serving = results['serving']['routes'].get(route, results['serving']['overall'])
+        print(f"{route:<14} {default['p50_ms']:>10.1f}ms {serving['p50_ms']:>10.1f}ms "
+              f"{default['p95_ms']:>10.1f}ms {serving['p95_ms']:>10.1f}ms")
+    print(f"\nthroughput: default {results['default']['overall']['throughput_rps']:.0f} req/s, "
+          f"serving {results['serving']['overall']['throughput_rps']:.0f} req/s")
+
+    name = f"sqlite-serving-x{args.scale}"
+    current = {'revision': None, 'results': results}
+    previous = load_results(name)
+    path = save_results(name, results)
+    print(f"\nResults saved to {path}")
+    if previous:
+        print_comparison(previous, current)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite serving artifact benchmark")
+    parser.add_argument("--duration", type=float, default=20, help="Measured seconds of traffic per configuration")
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--scale", type=int, default=1, help="Grow the dataset to N times the CSV with synthetic data")
+    parser.add_argument("--reseed", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run(args)
@@ -0,0 +1,168 @@
+"""
+Shared helpers for benchmarks: local SQLite seeding, query counting,
+latency percentiles and per-commit result storage
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BENCH_DIR = Path(__file__).parent
+BACKEND_DIR = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / "results"
+DEFAULT_CSV = BACKEND_DIR.parent / "ufc-master-transformed.csv"
+DEFAULT_DB_PATH = RESULTS_DIR / "bench.db"
+
+sys.path.append(str(BACKEND_DIR))
+
+
+def use_benchmark_database(db_path: Path = DEFAULT_DB_PATH, csv_path: Path = DEFAULT_CSV, reseed: bool = False) -> str:
+    """
+    Point DATABASE_URL at a local SQLite file, seeding it from the CSV if needed
+    Must run before the engine is created, since it reads the URL once
+    """
+    config = sys.modules.get('database.config')
+    if config is not None and config.engine_created():
+        raise RuntimeError("use_benchmark_database() must be called before the database engine is created")
+
+    db_path = Path(db_path).resolve()
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    if reseed and db_path.exists():
+        db_path.unlink()
+
+    database_url = f"sqlite:///{db_path}"
+    os.environ['DATABASE_URL'] = database_url
+
+    if not db_path.exists():
+        from database.migrate_csv_to_db import create_tables, migrate_csv_data
+        create_tables()
+        migrate_csv_data(str(csv_path))
+
+    return database_url
+
+
+class QueryCounter:
+    """Counts SQL statements executed on an engine while active"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+@contextmanager
+def timer():
+    """Yields a dict whose 'seconds' key is set when the block exits"""
+    result = {}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result['seconds'] = time.perf_counter() - start
+
+
+def percentiles(samples: List[float], points=(50, 95, 99)) -> Dict[str, float]:
+    """Nearest-rank percentiles of latency samples (in the samples' unit)"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {f'p{point}': 0.0 for point in points}
+    return {
+        f'p{point}': ordered[min(len(ordered) - 1, max(0, int(round(point / 100 * len(ordered))) - 1))]
+        for point in points
+    }
+
+
+def git_revision() -> str:
+    """Short commit hash of the working tree, with '-dirty' for local changes"""
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=BACKEND_DIR, capture_output=True, text=True
+        ).stdout.strip()
+        return f"{revision}-dirty" if dirty else revision
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def save_results(name: str, results: dict) -> Path:
+    """
+    Store results as results/<name>/<revision>.json so runs on different
+    commits can be compared with compare_results()
+    """
+    directory = RESULTS_DIR / name
+    directory.mkdir(parents=True, exist_ok=True)
+
+    revision = git_revision()
+    payload = {
+        'benchmark': name,
+        'revision': revision,
+        'recorded_at': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    path = directory / f"{revision}.json"
+    path.write_text(json.dumps(payload, indent=2, sort_keys=True))
+    return path
+
+
+def load_results(name: str, revision: Optional[str] = None) -> Optional[dict]:
+    """Stored results for a revision, or the most recent other run when revision is None"""
+    directory = RESULTS_DIR / name
+    if revision:
+        path = directory / f"{revision}.json"
+        return json.loads(path.read_text()) if path.exists() else None
+
+    current = git_revision()
+    candidates = sorted(
+        (p for p in directory.glob("*.json") if p.stem != current),
+        key=lambda p: p.stat().st_mtime
+    ) if directory.exists() else []
+    return json.loads(candidates[-1].read_text()) if candidates else None
+
+
+def _flatten(results: dict, prefix: str = '') -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare_results(baseline: dict, current: dict) -> List[tuple]:
+    """(metric, baseline, current, percent change) for every numeric metric in both runs"""
+    before = _flatten(baseline['results'])
+    after = _flatten(current['results'])
+    rows = []
+    for metric in sorted(before.keys() & after.keys()):
+        change = (after[metric] - before[metric]) / before[metric] * 100 if before[metric] else 0.0
+        rows.append((metric, before[metric], after[metric], change))
+    return rows
+
+
+def print_comparison(baseline: dict, current: dict):
+    print(f"\nComparison with {baseline['revision']} ({baseline['recorded_at']}):")
+    for metric, before, after, change in compare_results(baseline, current):
+        print(f"  {metric:<55} {before:>14.3f} -> {after:>14.3f} ({change:+.1f}%)")
@@ -0,0 +1,492 @@
+"""
+End-to-end HTTP load test with latency SLO and regression gates
+
+Seeds a SQLite file (or a local Postgres via --database-url) from the bundled
+CSV, optionally scaled up with synthetic fighters and fights, starts the API
+under uvicorn and drives a weighted mix of search, profile, timeline,
+head-to-head, predict, betting-value and fight-card traffic from closed-loop
+client threads. Reports throughput and p50/p95/p99 per route, stores the run
+under benchmarks/results/load-x<scale>-c<concurrency>/ and exits non-zero
+when a route breaks its p95 SLO, errors too often, or regresses against the
+previous run (or --baseline) by more than --threshold percent.
+
+Usage (from the backend directory):
+    python -m benchmarks.load_test --duration 30 --concurrency 16
+    python -m benchmarks.load_test --scale 5 --reseed --workers 4
+    python -m benchmarks.load_test --database-url postgresql://localhost/ufc_load
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --database-url sqlite:///./ufc.db
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, List, Optional
+from urllib.parse import quote, urlencode, urlparse
+
+from benchmarks.common import BACKEND_DIR, DEFAULT_CSV, RESULTS_DIR, load_results, percentiles, save_results
+
+# Relative weight of each route in the traffic mix
+DEFAULT_MIX = {
+    'search': 30,
+    'profile': 20,
+    'timeline': 10,
+    'head_to_head': 10,
+    'predict': 15,
+    'betting_value': 5,
+    'fight_card': 7,
+    'card_simulate': 3,
+}
+
+# p95 latency objectives per route (milliseconds)
+DEFAULT_SLO_P95_MS = {
+    'search': 100,
+    'profile': 150,
+    'timeline': 200,
+    'head_to_head': 250,
+    'predict': 250,
+    'betting_value': 1000,
+    'fight_card': 1500,
+    'card_simulate': 1500,
+}
+
+MAX_ERROR_RATE = 0.01
+CARD_SIZE = 12
+CARD_SIMULATIONS = 20_000
+INSERT_BATCH_SIZE = 5000
+SYNTHETIC_PREFIX = "Synthetic Fighter"
+
+
+def default_database_url(scale: int) -> str:
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    return f"sqlite:///{(RESULTS_DIR / f'load-x{scale}.db').resolve()}"
+
+
+def add_synthetic_history(db, scale: int, seed: int = 0) -> int:
+    """
+    Grow the dataset to roughly `scale` times its size with synthetic fighters
+    fighting each other on synthetic cards; fight details are resampled from
+    real fights so odds, methods and durations keep their distributions
+    """
+    from sqlalchemy import func, insert, select
+    from database.schema import Fight, Fighter
+
+    rng = random.Random(seed)
+    real_fighters = db.query(func.count(Fighter.id)).scalar()
+    real_fights = db.query(func.count(Fight.id)).scalar()
+    first_date, last_date = db.query(func.min(Fight.date), func.max(Fight.date)).one()
+
+    copied = [
+        'location', 'country', 'winner', 'red_odds', 'blue_odds', 'red_expected_value', 'blue_expected_value',
+        'red_ko_odds', 'blue_ko_odds', 'red_sub_odds', 'blue_sub_odds', 'red_dec_odds', 'blue_dec_odds',
+        'finish_method', 'finish_details', 'finish_round', 'finish_round_time', 'total_fight_duration_secs',
+    ]
+    templates = [dict(row._mapping) for row in db.execute(select(*(getattr(Fight, c) for c in copied)))]
+
+    n_fighters = real_fighters * (scale - 1)
+    db.execute(insert(Fighter), [{'name': f"{SYNTHETIC_PREFIX} {i:06d}"} for i in range(n_fighters)])
+    fighter_ids = [fid for (fid,) in db.query(Fighter.id).filter(Fighter.name.like(f"{SYNTHETIC_PREFIX} %"))]
+
+    n_fights = real_fights * (scale - 1)
+    span_days = max((last_date - first_date).days, 1)
+    rows = []
+    for i in range(n_fights):
+        if i % CARD_SIZE == 0:
+            card_date = first_date + timedelta(days=rng.randrange(span_days))
+            event_name = f"Synthetic Card {i // CARD_SIZE:06d}"
+        red_id, blue_id = rng.sample(fighter_ids, 2)
+        rows.append({
+            **rng.choice(templates),
+            'red_fighter_id': red_id,
+            'blue_fighter_id': blue_id,
+            'date': card_date,
+            'event_name': event_name,
+        })
+        if len(rows) == INSERT_BATCH_SIZE:
+            db.execute(insert(Fight), rows)
+            rows = []
+    if rows:
+        db.execute(insert(Fight), rows)
+    db.commit()
+    print(f"Added {n_fighters} synthetic fighters and {n_fights} synthetic fights")
+    return n_fights
+
+
+def label_events(db) -> int:
+    """Name each unlabelled fight date as one card so the fight-card routes have events to hit"""
+    from database.schema import Fight
+
+    dates = [date for (date,) in db.query(Fight.date).filter(Fight.event_name.is_(None)).distinct()]
+    for date in dates:
+        db.query(Fight).filter(Fight.date == date, Fight.event_name.is_(None)).update(
+            {Fight.event_name: f"UFC Load Card {date:%Y-%m-%d}"}, synchronize_session=False
+        )
+    db.commit()
+    return len(dates)
+
+
+def prepare_database(database_url: str, scale: int, reseed: bool, seed: int) -> dict:
+    """Create and seed the database if it is empty; returns request targets drawn from it"""
+    # The engine reads DATABASE_URL once, when it is first created
+    os.environ['DATABASE_URL'] = database_url
+    from database.config import SessionLocal, engine
+    from database.migrate_csv_to_db import migrate_csv_data, update_fighter_stats
+    from database.schema import Base, Fighter
+    from services.participation import rebuild_fighter_fights
+    from services.ratings import rebuild_ratings
+
+    if reseed:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        if db.query(Fighter).count() == 0:
+            migrate_csv_data(str(DEFAULT_CSV))
+            if scale > 1:
+                add_synthetic_history(db, scale, seed)
+                rebuild_fighter_fights(db)
+                update_fighter_stats(db)
+                rebuild_ratings(db)
+            print(f"Labelled {label_events(db)} cards")
+        return load_targets(db, seed)
+    finally:
+        db.close()
+
+
+def load_targets(db, seed: int, n_fighters: int = 500, n_events: int = 200) -> dict:
+    """Fighters and events that the generated requests refer to"""
+    from sqlalchemy import func
+    from database.schema import Fight, Fighter
+
+    rng = random.Random(seed)
+    fighters = db.query(Fighter.id, Fighter.name).filter(Fighter.total_fights > 0).all()
+    events = [
+        name for (name,) in db.query(Fight.event_name)
+        .filter(Fight.event_name.isnot(None))
+        .group_by(Fight.event_name)
+        .having(func.count(Fight.id) >= 2)
+    ]
+    if len(fighters) < 2:
+        raise RuntimeError("The load-test database has no fighters; rerun with --reseed")
+
+    return {
+        'fighters': rng.sample(fighters, min(n_fighters, len(fighters))),
+        'events': rng.sample(events, min(n_events, len(events))),
+    }
+
+
+def _search_term(name: str, rng: random.Random) -> str:
+    """A partial name, as typed into the search box"""
+    part = rng.choice(name.split())
+    return part[:rng.randint(min(3, len(part)), len(part))] if len(part) >= 2 else name
+
+
+def build_request(route: str, targets: dict, rng: random.Random):
+    """(method, path, json body) for one request on a route"""
+    fighters = targets['fighters']
+    (red_id, red_name), (blue_id, blue_name) = rng.sample(fighters, 2)
+
+    if route == 'search':
+        return 'GET', "/api/v1/fighters/search?" + urlencode({'query': _search_term(red_name, rng)}), None
+    if route == 'profile':
+        return 'GET', f"/api/v1/fighters/{red_id}", None
+    if route == 'timeline':
+        return 'GET', f"/api/v1/fighters/{red_id}/stats/timeline", None
+    if route == 'head_to_head':
+        return 'POST', "/api/v1/predictions/head-to-head", {'fighter1_name': red_name, 'fighter2_name': blue_name}
+    if route == 'predict':
+        return 'POST', "/api/v1/predictions/predict", {'red_fighter_name': red_name, 'blue_fighter_name': blue_name}
+    if route == 'betting_value':
+        return 'GET', "/api/v1/predictions/betting-value?" + urlencode({'min_value_percentage': rng.choice([2, 5, 10])}), None
+    if route == 'fight_card':
+        return 'GET', "/api/v1/predictions/fight-card/" + quote(rng.choice(targets['events'])), None
+    if route == 'card_simulate':
+        return 'POST', "/api/v1/predictions/fight-card/simulate", {
+            'event_name': rng.choice(targets['events']),
+            'simulations': CARD_SIMULATIONS,
+            'correlation': rng.choice([0.0, 0.2]),
+        }
+    raise ValueError(f"Unknown route '{route}'")
+
+
+class LoadGenerator:
+    """Closed-loop clients: each thread keeps one keep-alive connection and sends requests back to back"""
+
+    def __init__(self, base_url: str, targets: dict, mix: Dict[str, float], concurrency: int, seed: int = 0):
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.targets = targets
+        self.routes = list(mix)
+        self.weights = [mix[route] for route in self.routes]
+        self.concurrency = concurrency
+        self.seed = seed
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _client(self, index: int, stop_at: float, record_after: float):
+        rng = random.Random(self.seed * 1000 + index)
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        samples = defaultdict(list)
+        errors = defaultdict(int)
+
+        while time.perf_counter() < stop_at:
+            route = rng.choices(self.routes, self.weights)[0]
+            method, path, body = build_request(route, self.targets, rng)
+            payload = json.dumps(body).encode() if body is not None else None
+            headers = {'Content-Type': 'application/json'} if payload else {}
+
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                # 404s are expected for fighter pairs the API cannot resolve; anything 5xx is a failure
+                failed = response.status >= 500
+            except (OSError, http.client.HTTPException):
+                failed = True
+                conn.close()
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            end = time.perf_counter()
+
+            if start >= record_after:
+                samples[route].append((end - start) * 1000)
+                if failed:
+                    errors[route] += 1
+
+        conn.close()
+        with self._lock:
+            for route, values in samples.items():
+                self.samples[route].extend(values)
+            for route, count in errors.items():
+                self.errors[route] += count
+
+    def run(self, duration: float, warmup: float) -> float:
+        """Drive traffic for warmup + duration seconds; returns the measured window length"""
+        started = time.perf_counter()
+        record_after = started + warmup
+        stop_at = record_after + duration
+        threads = [
+            threading.Thread(target=self._client, args=(i, stop_at, record_after), daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - record_after
+
+    def summarize(self, window: float) -> dict:
+        routes = {}
+        all_samples = []
+        for route in self.routes:
+            values = self.samples.get(route, [])
+            all_samples.extend(values)
+            routes[route] = _summary(values, self.errors.get(route, 0), window)
+        return {
+            'routes': routes,
+            'overall': _summary(all_samples, sum(self.errors.values()), window),
+        }
+
+
+def _summary(samples: List[float], errors: int, window: float) -> dict:
+    points = percentiles(samples)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': errors / len(samples) if samples else 0.0,
+        'throughput_rps': len(samples) / window if window > 0 else 0.0,
+        'p50_ms': points['p50'],
+        'p95_ms': points['p95'],
+        'p99_ms': points['p99'],
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url: str, workers: int, port: Optional[int] = None, timeout: float = 60.0,
+                 env: Optional[Dict[str, str]] = None):
+    """Run the app under uvicorn in a subprocess; returns (process, base_url) once it answers"""
+    port = port or free_port()
+    env = {**os.environ, **(env or {}), 'DATABASE_URL': database_url}
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--log-level', 'warning', '--no-access-log'],
+        cwd=BACKEND_DIR, env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/v1/health')
+            if conn.getresponse().status == 200:
+                return process, base_url
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Server did not become healthy within {timeout:.0f}s")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def check_gates(
+    results: dict,
+    baseline: Optional[dict],
+    slo_p95_ms: Dict[str, float],
+    threshold: float,
+    min_delta_ms: float,
+    max_error_rate: float = MAX_ERROR_RATE
+) -> List[str]:
+    """Human-readable failures; empty when the run passes"""
+    failures = []
+    for route, stats in results['routes'].items():
+        if not stats['requests']:
+            continue
+        if stats['error_rate'] > max_error_rate:
+            failures.append(f"{route}: error rate {stats['error_rate']:.1%} > {max_error_rate:.1%}")
+        slo = slo_p95_ms.get(route)
+        if slo is not None and stats['p95_ms'] > slo:
+            failures.append(f"{route}: p95 {stats['p95_ms']:.1f}ms breaks the {slo:.0f}ms SLO")
+
+    if not baseline:
+        return failures
+
+    before_routes = baseline['results'].get('routes', {})
+    for route, stats in results['routes'].items():
+        before = before_routes.get(route)
+        if not before or not before['requests'] or not stats['requests']:
+            continue
+        for metric in ('p95_ms', 'p99_ms'):
+            delta = stats[metric] - before[metric]
+            if delta > min_delta_ms and delta / before[metric] * 100 > threshold:
+                failures.append(
+                    f"{route}: {metric} {before[metric]:.1f}ms -> {stats[metric]:.1f}ms "
+                    f"(+{delta / before[metric] * 100:.0f}%, limit {threshold:.0f}%)"
+                )
+
+    before_rps = baseline['results']['overall']['throughput_rps']
+    after_rps = results['overall']['throughput_rps']
+    if before_rps and (before_rps - after_rps) / before_rps * 100 > threshold:
+        failures.append(
+            f"throughput {before_rps:.1f} -> {after_rps:.1f} req/s "
+            f"(-{(before_rps - after_rps) / before_rps * 100:.0f}%, limit {threshold:.0f}%)"
+        )
+    return failures
+
+
+def print_report(results: dict, baseline: Optional[dict]):
+    before_routes = baseline['results'].get('routes', {}) if baseline else {}
+    print(f"\n{'route':<15} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+          + (f"  {'p95 vs ' + baseline['revision']:>18}" if baseline else ""))
+    rows = list(results['routes'].items()) + [('overall', results['overall'])]
+    for route, stats in rows:
+        line = (f"{route:<15} {stats['requests']:>9} {stats['errors']:>7} {stats['throughput_rps']:>9.1f} "
+                f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+        before = before_routes.get(route) or (baseline['results']['overall'] if baseline and route == 'overall' else None)
+        if before and before['p95_ms']:
+            line += f"  {(stats['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100:>+17.1f}%"
+        print(line)
+
+
+def _parse_pairs(values: Optional[List[str]], defaults: Dict[str, float]) -> Dict[str, float]:
+    """Apply route=value overrides (e.g. predict=0 search=50) to a default mapping"""
+    parsed = dict(defaults)
+    for item in values or []:
+        route, _, value = item.partition('=')
+        if route not in defaults:
+            raise SystemExit(f"Unknown route '{route}' (choose from {', '.join(defaults)})")
+        parsed[route] = float(value)
+    return parsed
+
+
+def run(args) -> int:
+    database_url = args.database_url or default_database_url(args.scale)
+    targets = prepare_database(database_url, args.scale, args.reseed, args.seed)
+    if not targets['events']:
+        args.mix = [*(args.mix or []), 'fight_card=0', 'card_simulate=0']
+
+    mix = {route: weight for route, weight in _parse_pairs(args.mix, DEFAULT_MIX).items() if weight > 0}
+    slo_p95_ms = _parse_pairs(args.slo, DEFAULT_SLO_P95_MS)
+
+    process = None
+    base_url = args.url
+    if base_url is None:
+        process, base_url = start_server(database_url, args.workers)
+    try:
+        print(f"Driving {base_url} for {args.warmup:.0f}s warmup + {args.duration:.0f}s "
+              f"at concurrency {args.concurrency}")
+        generator = LoadGenerator(base_url, targets, mix, args.concurrency, args.seed)
+        window = generator.run(args.duration, args.warmup)
+    finally:
+        if process is not None:
+            stop_server(process)
+
+    results = generator.summarize(window)
+    results['config'] = {
+        'scale': args.scale, 'concurrency': args.concurrency, 'workers': args.workers,
+        'duration_secs': args.duration, 'mix': mix,
+    }
+
+    name = f"load-x{args.scale}-c{args.concurrency}"
+    baseline = load_results(name, args.baseline)
+    if args.baseline and baseline is None:
+        print(f"No stored {name} results for revision {args.baseline}")
+    print_report(results, baseline)
+
+    path = save_results(name, results)
+    print(f"\nResults saved to {path}")
+
+    failures = check_gates(results, baseline, slo_p95_ms, args.threshold, args.min_delta_ms)
+    if failures:
+        print("\nFAILED:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("\nAll latency gates passed")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP load test with latency SLO and regression gates")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds of traffic")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds of unrecorded traffic first")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent client connections")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--scale", type=int, default=1, help="Grow the dataset to N times the CSV with synthetic data")
+    parser.add_argument("--database-url", help="Database to seed and serve (default: SQLite under results/)")
+    parser.add_argument("--url", help="Load an already running server instead of starting one")
+    parser.add_argument("--reseed", action="store_true", help="Drop and reseed the database")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mix", nargs="+", metavar="ROUTE=WEIGHT", help="Override traffic weights (0 disables)")
+    parser.add_argument("--slo", nargs="+", metavar="ROUTE=MS", help="Override p95 SLOs in milliseconds")
+    parser.add_argument("--baseline", help="Revision to compare with (default: the most recent other run)")
+    parser.add_argument("--threshold", type=float, default=25.0, help="Allowed regression in percent")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="Ignore latency regressions smaller than this many milliseconds")
+    args = parser.parse_args()
+
+    sys.exit(run(args))
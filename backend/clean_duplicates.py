@@ -2,12 +2,21 @@
 Script to remove duplicate fight records from the database
 """
 from database.config import SessionLocal
-from database.schema import Fight, Fighter
+from database.schema import Fight, Fighter, FighterFight, FightRating
+from services.participation import career_totals, dirty_fighter_ids, empty_totals, fighters_by_id, rebuild_fighter_fights
+from services.ratings import rebuild_ratings
+from services.snapshot import refresh_snapshot
 from sqlalchemy import func
 
-def find_and_remove_duplicates():
-    db = SessionLocal()
+def ensure_fighter_fights(db):
+    """Create and fill fighter_fights for a database from before the table existed (otherwise a no-op)"""
+    FighterFight.__table__.create(db.connection(), checkfirst=True)
+    if db.query(FighterFight.fighter_id).first() is None and db.query(Fight.id).first() is not None:
+        rebuild_fighter_fights(db)
+
 
+def find_and_remove_duplicates(db):
+    """Delete repeated fights (not committed); returns the ids of the fighters that were in them"""
     print("Finding duplicate fights...")
 
     # Get all fights
@@ -35,6 +44,10 @@ def find_and_remove_duplicates():
 
     if duplicate_ids:
         print("\nDeleting duplicates...")
+        db.query(FightRating).filter(
+            FightRating.fight_id.in_(duplicate_ids)
+        ).delete(synchronize_session=False)
+
         deleted_count = 0
         for fight_id in duplicate_ids:
             fight = db.query(Fight).filter(Fight.id == fight_id).first()
@@ -44,83 +57,36 @@ def find_and_remove_duplicates():
                 if deleted_count % 100 == 0:
                     print(f"  Deleted {deleted_count} duplicates...")
 
-        db.commit()
-        print(f"Successfully deleted {deleted_count} duplicate fights")
+        print(f"Deleted {deleted_count} duplicate fights")
 
-    db.close()
+    return dirty_fighter_ids(db)
 
 
-def recalculate_fighter_stats():
-    """Recalculate stats for all fighters after cleanup"""
+def recalculate_fighter_stats(db, fighter_ids=None):
+    """Recalculate stats after cleanup, for all fighters or only `fighter_ids`, then commit"""
     print("\nRecalculating fighter statistics...")
-    db = SessionLocal()
 
-    fighters = db.query(Fighter).all()
+    if fighter_ids is None:
+        fighters = db.query(Fighter).all()
+    else:
+        fighter_ids = set(fighter_ids)
+        fighters = fighters_by_id(db, fighter_ids)
+    totals = career_totals(db, fighter_ids)
 
     for idx, fighter in enumerate(fighters):
-        # Get all fights for this fighter
-        red_fights = db.query(Fight).filter(Fight.red_fighter_id == fighter.id).all()
-        blue_fights = db.query(Fight).filter(Fight.blue_fighter_id == fighter.id).all()
-
-        total_fights = len(red_fights) + len(blue_fights)
-        wins = 0
-        losses = 0
-        draws = 0
-        ko_wins = 0
-        sub_wins = 0
-        dec_wins = 0
-        total_duration = 0
-
-        # Count wins from red corner
-        for fight in red_fights:
-            if fight.winner == 'Red':
-                wins += 1
-                if fight.finish_method:
-                    method_upper = fight.finish_method.upper()
-                    if 'KO' in method_upper or 'TKO' in method_upper:
-                        ko_wins += 1
-                    elif 'SUB' in method_upper:
-                        sub_wins += 1
-                    elif 'DEC' in method_upper:
-                        dec_wins += 1
-            elif fight.winner == 'Blue':
-                losses += 1
-            elif fight.winner and 'Draw' in fight.winner:
-                draws += 1
-
-            if fight.total_fight_duration_secs:
-                total_duration += fight.total_fight_duration_secs
-
-        # Count wins from blue corner
-        for fight in blue_fights:
-            if fight.winner == 'Blue':
-                wins += 1
-                if fight.finish_method:
-                    method_upper = fight.finish_method.upper()
-                    if 'KO' in method_upper or 'TKO' in method_upper:
-                        ko_wins += 1
-                    elif 'SUB' in method_upper:
-                        sub_wins += 1
-                    elif 'DEC' in method_upper:
-                        dec_wins += 1
-            elif fight.winner == 'Red':
-                losses += 1
-            elif fight.winner and 'Draw' in fight.winner:
-                draws += 1
-
-            if fight.total_fight_duration_secs:
-                total_duration += fight.total_fight_duration_secs
+        career = totals.get(fighter.id) or empty_totals()
+        total_fights = career['total_fights']
 
         # Update fighter stats
         fighter.total_fights = total_fights
-        fighter.wins = wins
-        fighter.losses = losses
-        fighter.draws = draws
-        fighter.win_percentage = (wins / total_fights * 100) if total_fights > 0 else 0
-        fighter.ko_tko_wins = ko_wins
-        fighter.submission_wins = sub_wins
-        fighter.decision_wins = dec_wins
-        fighter.avg_fight_duration_secs = total_duration / total_fights if total_fights > 0 else 0
+        fighter.wins = career['wins']
+        fighter.losses = career['losses']
+        fighter.draws = career['draws']
+        fighter.win_percentage = (career['wins'] / total_fights * 100) if total_fights > 0 else 0
+        fighter.ko_tko_wins = career['ko_tko_wins']
+        fighter.submission_wins = career['submission_wins']
+        fighter.decision_wins = career['decision_wins']
+        fighter.avg_fight_duration_secs = career['total_duration'] / total_fights if total_fights > 0 else 0
 
         if (idx + 1) % 100 == 0:
             print(f"  Processed {idx + 1}/{len(fighters)} fighters...")
@@ -128,19 +94,26 @@ def recalculate_fighter_stats():
     db.commit()
     print(f"Updated stats for {len(fighters)} fighters")
 
-    db.close()
-
 
 if __name__ == "__main__":
     print("=" * 60)
     print("CLEANING DUPLICATE FIGHT RECORDS")
     print("=" * 60)
 
-    # Remove duplicates
-    find_and_remove_duplicates()
+    db = SessionLocal()
+
+    # Participation rows for databases created before fighter_fights existed
+    ensure_fighter_fights(db)
 
-    # Recalculate stats
-    recalculate_fighter_stats()
+    # Remove duplicates and recalculate stats of the fighters that were in them;
+    # both commit together, so stats never describe a half-cleaned history
+    affected = find_and_remove_duplicates(db)
+    recalculate_fighter_stats(db, affected)
+
+    # Replay ratings over the de-duplicated history, then refresh the snapshot search reads
+    rebuild_ratings(db)
+    refresh_snapshot(db)
+    db.close()
 
     print("\n" + "=" * 60)
     print("CLEANUP COMPLETE!")
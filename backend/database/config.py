@@ -1,35 +1,308 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+"""
+Database engines and sessions
+Engines are created on first use (or by the startup warmup) rather than at
+import, so importing the app stays cheap and the async driver is only
+loaded when an async session is actually requested
+
+Writes always go to the primary (DATABASE_URL). When DATABASE_REPLICA_URLS
+lists read replicas, API sessions send statements known to be reads to a
+replica (round robin); anything else, raw SQL included, goes to the primary
+and keeps the session there. A request that wrote also keeps the client on
+the primary for READ_YOUR_WRITES_SECONDS.
+Two SQLite files work for local testing:
+    cp ufc.db ufc-replica.db
+    DATABASE_URL=sqlite:///./ufc.db DATABASE_REPLICA_URLS=sqlite:///./ufc-replica.db
+"""
+import itertools
+import os
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.sql.selectable import SelectBase
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker as async_sessionmaker
-import os
 from dotenv import load_dotenv
 
-load_dotenv()
+DEFAULT_DATABASE_URL = "postgresql://localhost/ufc_analytics"
+
+_lock = threading.Lock()
+_engine = None
+_session_factory = None
+_replica_engines: Optional[List] = None
+_replica_cycle = None
+_async_engine = None
+_async_session_factory = None
+
+
+def get_database_url() -> str:
+    """Database URL from the environment (.env is read on first call)"""
+    load_dotenv()
+    return os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL)
+
+
+def get_replica_urls() -> List[str]:
+    """Read replica URLs from DATABASE_REPLICA_URLS (comma separated, may be empty)"""
+    load_dotenv()
+    return [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+
+
+def get_read_your_writes_seconds() -> float:
+    load_dotenv()
+    return float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+
+def _async_database_url(database_url: str) -> str:
+    # Handle different database types (SQLite vs PostgreSQL)
+    if database_url.startswith("sqlite"):
+        return database_url.replace("sqlite://", "sqlite+aiosqlite://")
+    return database_url.replace("postgresql://", "postgresql+asyncpg://")
+
+
+def get_sqlite_options() -> dict:
+    """
+    SQLite connection settings: SQLITE_READ_ONLY opens the file read-only (for
+    the serving artifact, see database/serving.py), SQLITE_MMAP_SIZE maps that
+    many bytes of it, SQLITE_STATEMENT_CACHE sizes the per-connection statement cache
+    """
+    load_dotenv()
+    return {
+        'read_only': os.getenv("SQLITE_READ_ONLY", "0").lower() in ("1", "true", "yes"),
+        'mmap_size': int(os.getenv("SQLITE_MMAP_SIZE", "0")),
+        'statement_cache': int(os.getenv("SQLITE_STATEMENT_CACHE", "128")),
+    }
+
+
+def _file_identity(path: str):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _create_sqlite_engine(database_url: str):
+    options = get_sqlite_options()
+    url = make_url(database_url)
+    path = url.database
+    file_backed = bool(path) and path != ":memory:" and not path.startswith("file:")
+    read_only = options['read_only'] and file_backed
+
+    if read_only:
+        path = os.path.abspath(path)
+        url = url.set(database=f"file:{path}", query={**url.query, "mode": "ro", "uri": "true"})
+    engine = create_engine(url, connect_args={
+        "check_same_thread": False, "cached_statements": options['statement_cache']
+    })
+
+    @event.listens_for(engine, "connect")
+    def _configure_connection(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if options['mmap_size']:
+            cursor.execute(f"PRAGMA mmap_size={options['mmap_size']}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+            connection_record.info['sqlite_file'] = _file_identity(path)
+        cursor.close()
+
+    if read_only:
+        @event.listens_for(engine, "checkout")
+        def _reopen_replaced_file(dbapi_connection, connection_record, connection_proxy):
+            # A rebuilt artifact is renamed over the old one; pooled connections
+            # still read the old file, so the pool reconnects them
+            if connection_record.info.get('sqlite_file') != _file_identity(path):
+                raise DisconnectionError("SQLite file was replaced")
+
+    return engine
+
+
+def _create_engine(database_url: str):
+    if database_url.startswith("sqlite"):
+        return _create_sqlite_engine(database_url)
+    return create_engine(database_url, pool_pre_ping=True)
+
+
+def get_engine():
+    """Sync engine for the primary, created on first call"""
+    global _engine, _session_factory
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                engine = _create_engine(get_database_url())
+                _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+                _engine = engine
+    return _engine
+
+
+def get_replica_engines() -> List:
+    """Engines for every configured replica (empty when there are none)"""
+    global _replica_engines, _replica_cycle
+    if _replica_engines is None:
+        with _lock:
+            if _replica_engines is None:
+                engines = [_create_engine(url) for url in get_replica_urls()]
+                _replica_cycle = itertools.cycle(engines) if engines else None
+                _replica_engines = engines
+    return _replica_engines
+
+
+def next_read_engine():
+    """Next replica in round-robin order, or the primary when there are none"""
+    if not get_replica_engines():
+        return get_engine()
+    return next(_replica_cycle)
+
+
+def get_sessionmaker():
+    """Write session factory (primary); used by scripts and ingest"""
+    get_engine()
+    return _session_factory
+
+
+def get_read_sessionmaker():
+    """Read-only session factory bound to the next replica (the primary when there are none)"""
+    return sessionmaker(autocommit=False, autoflush=False, bind=next_read_engine())
+
+
+def created_engines() -> Dict[str, object]:
+    """Engines created so far, by pool name ('primary', 'replica0', ...)"""
+    engines = {'primary': _engine} if _engine is not None else {}
+    for index, engine in enumerate(_replica_engines or []):
+        engines[f'replica{index}'] = engine
+    return engines
 
-# Database URL from environment variable
-DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://localhost/ufc_analytics")
 
-# Handle different database types (SQLite vs PostgreSQL)
-if DATABASE_URL.startswith("sqlite"):
-    ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://")
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    ASYNC_DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
-    engine = create_engine(DATABASE_URL)
+def get_async_engine():
+    """Async engine for FastAPI, created on first call"""
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        with _lock:
+            if _async_engine is None:
+                engine = create_async_engine(_async_database_url(get_database_url()), echo=False)
+                _async_session_factory = async_sessionmaker(
+                    engine, class_=AsyncSession, expire_on_commit=False
+                )
+                _async_engine = engine
+    return _async_engine
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Async engine for FastAPI
-async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
-AsyncSessionLocal = async_sessionmaker(
-    async_engine, class_=AsyncSession, expire_on_commit=False
-)
+def get_async_sessionmaker():
+    get_async_engine()
+    return _async_session_factory
+
+
+def engine_created() -> bool:
+    return _engine is not None
+
+
+# `from database.config import engine, SessionLocal` keeps working; the
+# objects are built when the name is first looked up
+_LAZY_ATTRIBUTES = {
+    'engine': get_engine,
+    'SessionLocal': get_sessionmaker,
+    'WriteSessionLocal': get_sessionmaker,
+    'ReadSessionLocal': get_read_sessionmaker,
+    'async_engine': get_async_engine,
+    'AsyncSessionLocal': get_async_sessionmaker,
+    'DATABASE_URL': get_database_url,
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Cookie holding the end of a client's read-your-writes window (epoch seconds)
+READ_YOUR_WRITES_COOKIE = "db_primary_until"
+
+
+class RequestRouting:
+    """Read/write routing state shared by every session opened for one request"""
+
+    def __init__(self, use_primary: bool = False):
+        self.use_primary = use_primary
+        self.wrote = False
+
+
+_current_routing: ContextVar[Optional[RequestRouting]] = ContextVar('request_routing', default=None)
+
+
+def begin_request_routing(use_primary: bool = False):
+    """Start routing for a request; pass use_primary for clients inside their read-your-writes window"""
+    routing = RequestRouting(use_primary)
+    return routing, _current_routing.set(routing)
+
+
+def end_request_routing(token):
+    _current_routing.reset(token)
+
+
+# Text statements sent to a replica: plain reads; anything else goes to the primary
+_READ_TEXT = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_WRITE_WORDS = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|FOR\s+UPDATE|FOR\s+SHARE)\b", re.IGNORECASE)
+
+
+def is_read_statement(clause) -> bool:
+    """
+    True only for statements known to be reads: a SELECT without FOR UPDATE,
+    or SQL text starting with SELECT/WITH that contains no write keyword
+    """
+    if isinstance(clause, SelectBase):
+        return getattr(clause, '_for_update_arg', None) is None
+    if isinstance(clause, TextClause):
+        return bool(_READ_TEXT.match(clause.text)) and not _WRITE_WORDS.search(clause.text)
+    return False
+
+
+class RoutingSession(Session):
+    """
+    Sends reads to a replica and everything else to the primary. Only
+    statements known to be reads (is_read_statement) may use the replica;
+    the first other statement or flush pins the session, and the request,
+    to the primary and marks it as having written, so later reads see it.
+    """
+
+    def __init__(self, *args, replica=None, routing: Optional[RequestRouting] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replica = replica
+        self.routing = routing or RequestRouting()
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or not is_read_statement(clause):
+            self.routing.use_primary = self.routing.wrote = True
+        return get_engine() if self.routing.use_primary else self.replica
 
 
 def get_db():
     """Dependency for FastAPI routes"""
-    db = SessionLocal()
+    if get_replica_engines():
+        db = RoutingSession(
+            autocommit=False, autoflush=False,
+            replica=next_read_engine(), routing=_current_routing.get()
+        )
+    else:
+        db = get_sessionmaker()()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_write_db():
+    """Dependency for routes that write: always the primary"""
+    db = get_sessionmaker()()
+    routing = _current_routing.get()
+    if routing is not None:
+        routing.use_primary = routing.wrote = True
     try:
         yield db
     finally:
@@ -38,5 +311,33 @@ def get_db():
 
 async def get_async_db():
     """Async dependency for FastAPI routes"""
-    async with AsyncSessionLocal() as session:
+    async with get_async_sessionmaker()() as session:
         yield session
+
+
+async def route_request(request, call_next):
+    """
+    Middleware body: requests from clients that wrote within the last
+    READ_YOUR_WRITES_SECONDS read from the primary; a request that writes
+    starts (or extends) that window with a cookie
+    """
+    if not get_replica_engines():
+        return await call_next(request)
+
+    try:
+        pinned_until = float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0))
+    except ValueError:
+        pinned_until = 0.0
+    routing, token = begin_request_routing(use_primary=pinned_until > time.time())
+    try:
+        response = await call_next(request)
+    finally:
+        end_request_routing(token)
+
+    if routing.wrote:
+        window = get_read_your_writes_seconds()
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE, f"{time.time() + window:.3f}",
+            max_age=int(window) + 1, httponly=True, samesite='lax'
+        )
+    return response
@@ -0,0 +1,441 @@
+"""
+Fighter entity resolution: find spellings of the same fighter across sources
+Names are normalized (accents, case, punctuation, quoted nicknames, suffixes)
+and only compared within blocks - a phonetic key and two sorted-neighborhood
+windows - so the work grows linearly with the number of names instead of
+quadratically. Candidate pairs are scored on name similarity plus evidence
+from the fights themselves (shared opponents, overlapping careers, nearby
+weight classes; fighting each other or on the same day rules a merge out),
+and accepted pairs are written to a reviewable alias map that the CSV
+loader applies at ingest.
+
+Alias map columns: alias, canonical, score, status
+    auto       score >= AUTO_MERGE_SCORE, applied
+    review     score >= REVIEW_SCORE, not applied until marked confirmed
+    confirmed  applied, kept across re-runs
+    rejected   never applied, kept across re-runs so it is not proposed again
+
+Usage (from the backend directory):
+    python database/entity_resolution.py resolve ../ufc-master-transformed.csv [more.csv ...]
+    python database/entity_resolution.py show
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+ALIASES_PATH = Path(os.getenv("FIGHTER_ALIASES_PATH", Path(__file__).parent / "fighter_aliases.csv"))
+ALIAS_COLUMNS = ['alias', 'canonical', 'score', 'status']
+APPLIED_STATUSES = ('auto', 'confirmed')
+KEPT_STATUSES = ('confirmed', 'rejected')
+
+AUTO_MERGE_SCORE = 0.92
+REVIEW_SCORE = 0.85
+
+# Names compared around each name in the sorted orders, and the largest phonetic
+# block compared exhaustively (bigger blocks fall back to a window of their own)
+NEIGHBORHOOD_WINDOW = 8
+MAX_BLOCK_SIZE = 64
+
+# Both first name and the rest of the name must be at least this similar
+MIN_PART_SIMILARITY = 0.8
+
+# Careers further apart than this are more likely relatives than one fighter
+MAX_CAREER_GAP_DAYS = 6 * 365
+
+# Divisions by weight; women's are far from every men's division. Catch Weight
+# and unknown classes are ignored. Fighters often move one division, rarely
+# more: names whose closest divisions are further apart lose WEIGHT_CLASS_PENALTY
+WEIGHT_CLASS_ORDER = {
+    **{name: rank for rank, name in enumerate([
+        'Flyweight', 'Bantamweight', 'Featherweight', 'Lightweight',
+        'Welterweight', 'Middleweight', 'Light Heavyweight', 'Heavyweight',
+    ])},
+    **{name: 100 + rank for rank, name in enumerate([
+        "Women's Strawweight", "Women's Flyweight", "Women's Bantamweight", "Women's Featherweight",
+    ])},
+}
+MAX_WEIGHT_CLASS_DISTANCE = 1
+WEIGHT_CLASS_PENALTY = 0.08
+
+NICKNAME_PATTERN = re.compile(r"[\"“”].*?[\"“”]|\s'[^']+'\s|\(.*?\)")
+NAME_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv'}
+SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'), **dict.fromkeys('dt', '3'),
+    'l': '4', **dict.fromkeys('mn', '5'), 'r': '6',
+}
+
+
+def normalize_name(name: str) -> str:
+    """
+    Lowercase ASCII tokens: 'Jon "Bones" Jones' -> 'jon jones',
+    'Kai Kara-France' -> 'kai kara france', 'Loopy Godínez' -> 'loopy godinez'
+    """
+    name = NICKNAME_PATTERN.sub(" ", f" {name} ")
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode().lower()
+    name = re.sub(r"['.`]", "", name)
+    tokens = re.sub(r"[^a-z]+", " ", name).split()
+    while len(tokens) > 2 and tokens[-1] in NAME_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def soundex(token: str) -> str:
+    """American Soundex code of a lowercase token ('' for an empty one)"""
+    if not token:
+        return ""
+    code = token[0].upper()
+    previous = SOUNDEX_CODES.get(token[0], "")
+    for char in token[1:]:
+        digit = SOUNDEX_CODES.get(char, "")
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if char not in 'hw':
+            previous = digit
+    return code.ljust(4, "0")
+
+
+def blocking_key(normalized: str) -> str:
+    """First initial plus the Soundex of the last token: spelling variants of a surname share it"""
+    tokens = normalized.split()
+    return f"{tokens[0][0]}{soundex(tokens[-1])}" if tokens else ""
+
+
+def _ratio(a: str, b: str, floor: float = 0.0) -> float:
+    """
+    SequenceMatcher ratio, or a cheap upper bound of it once that bound is
+    already below `floor` - most candidate pairs are rejected this way
+    """
+    matcher = SequenceMatcher(None, a, b)
+    for bound in (matcher.real_quick_ratio, matcher.quick_ratio, matcher.ratio):
+        value = bound()
+        if value < floor:
+            break
+    return value
+
+
+def _first_name_similarity(a: str, b: str) -> float:
+    """Shortened forms (phil/philip, jim/jimmy, josh/joshua) count as close matches"""
+    if a == b:
+        return 1.0
+    if min(len(a), len(b)) >= 3 and (a.startswith(b) or b.startswith(a)):
+        return 0.9
+    return _ratio(a, b, MIN_PART_SIMILARITY)
+
+
+def name_similarity(a: str, b: str) -> float:
+    """Similarity of two normalized names in [0, 1]"""
+    if a.replace(" ", "") == b.replace(" ", ""):
+        return 1.0
+    tokens_a, tokens_b = a.split(), b.split()
+    if not tokens_a or not tokens_b:
+        return 0.0
+
+    shorter, longer = sorted((set(tokens_a), set(tokens_b)), key=len)
+    if len(shorter) >= 2 and shorter < longer:
+        # 'montserrat conejo' / 'montserrat conejo ruiz'
+        return 0.95
+
+    first = _first_name_similarity(tokens_a[0], tokens_b[0])
+    if first < MIN_PART_SIMILARITY:
+        return first
+    rest = _ratio("".join(tokens_a[1:]), "".join(tokens_b[1:]), MIN_PART_SIMILARITY)
+    if rest < MIN_PART_SIMILARITY:
+        return rest
+    return 0.5 * _ratio(a, b) + 0.25 * first + 0.25 * rest
+
+
+class NameProfile:
+    """Everything resolution knows about one source spelling"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.normalized = normalize_name(name)
+        self.appearances = 0
+        self.dates: Set[pd.Timestamp] = set()
+        self.opponents: Set[str] = set()
+        self.weight_classes: Set[int] = set()
+
+    def career_gap_days(self, other: "NameProfile") -> int:
+        """Days between the two careers (0 if they overlap or either has no dated fights)"""
+        if not self.dates or not other.dates:
+            return 0
+        gap = max(min(self.dates) - max(other.dates), min(other.dates) - max(self.dates))
+        return max(gap.days, 0)
+
+    def weight_class_distance(self, other: "NameProfile") -> Optional[int]:
+        """Divisions between the closest weight classes of the two (None if either has none known)"""
+        if not self.weight_classes or not other.weight_classes:
+            return None
+        return min(abs(a - b) for a in self.weight_classes for b in other.weight_classes)
+
+
+def fight_appearances(frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    One row per fighter per fight (name, opponent, date, weight class) across
+    all source frames. Frames need RedFighter and BlueFighter columns; Date
+    and WeightClass are optional.
+    """
+    parts = []
+    for frame in frames:
+        red = frame['RedFighter'].astype("string").str.strip()
+        blue = frame['BlueFighter'].astype("string").str.strip()
+        dates = (pd.to_datetime(frame['Date'], errors='coerce', format='mixed')
+                 if 'Date' in frame else pd.Series(pd.NaT, index=frame.index))
+        weight_classes = (frame['WeightClass'].astype("string").str.strip()
+                          if 'WeightClass' in frame else pd.Series(pd.NA, index=frame.index, dtype="string"))
+        parts.append(pd.DataFrame({'name': red, 'opponent': blue, 'date': dates, 'weight_class': weight_classes}))
+        parts.append(pd.DataFrame({'name': blue, 'opponent': red, 'date': dates, 'weight_class': weight_classes}))
+    appearances = pd.concat(parts, ignore_index=True)
+    return appearances[appearances['name'].notna() & appearances['name'].ne("")]
+
+
+def build_profiles(appearances: pd.DataFrame) -> Dict[str, NameProfile]:
+    profiles: Dict[str, NameProfile] = {}
+    for name, opponent, date, weight_class in appearances.itertuples(index=False):
+        profile = profiles.get(name)
+        if profile is None:
+            profile = profiles[name] = NameProfile(name)
+        profile.appearances += 1
+        if opponent is not pd.NA and opponent:
+            profile.opponents.add(opponent)
+        if not pd.isna(date):
+            profile.dates.add(date)
+        if weight_class in WEIGHT_CLASS_ORDER:
+            profile.weight_classes.add(WEIGHT_CLASS_ORDER[weight_class])
+    return {name: profile for name, profile in profiles.items() if profile.normalized}
+
+
+def _window_pairs(names: List[str], window: int) -> Iterable[Tuple[str, str]]:
+    for i, name in enumerate(names):
+        for other in names[i + 1:i + 1 + window]:
+            yield name, other
+
+
+def candidate_pairs(profiles: Dict[str, NameProfile], window: int = NEIGHBORHOOD_WINDOW,
+                    max_block_size: int = MAX_BLOCK_SIZE) -> Set[Tuple[str, str]]:
+    """
+    Pairs worth scoring, from three blocking passes:
+    - names sharing a phonetic key (all pairs, or a window over oversized blocks)
+    - a window over the names sorted by normalized name (first name order)
+    - a window over the names sorted by surname, then the rest
+    Pairs are (name, name) with the smaller name first.
+    """
+    pairs: Set[Tuple[str, str]] = set()
+
+    def add(found: Iterable[Tuple[str, str]]):
+        for a, b in found:
+            pairs.add((a, b) if a < b else (b, a))
+
+    blocks: Dict[str, List[str]] = defaultdict(list)
+    for name, profile in profiles.items():
+        blocks[blocking_key(profile.normalized)].append(name)
+    for block in blocks.values():
+        if len(block) <= max_block_size:
+            add(_window_pairs(block, len(block)))
+        else:
+            add(_window_pairs(sorted(block, key=lambda n: profiles[n].normalized), window))
+
+    by_name = sorted(profiles, key=lambda n: profiles[n].normalized.replace(" ", ""))
+    add(_window_pairs(by_name, window))
+
+    def surname_first(name: str) -> str:
+        tokens = profiles[name].normalized.split()
+        return " ".join(tokens[-1:] + tokens[:-1])
+
+    add(_window_pairs(sorted(profiles, key=surname_first), window))
+    return pairs
+
+
+def score_pair(a: NameProfile, b: NameProfile) -> float:
+    """
+    Name similarity adjusted by fight evidence; 0 when the two cannot be the
+    same fighter (they fought each other, or both fought on the same date)
+    """
+    if a.name in b.opponents or b.name in a.opponents or a.dates & b.dates:
+        return 0.0
+    score = name_similarity(a.normalized, b.normalized)
+    if score < REVIEW_SCORE:
+        return score
+
+    shared = len(a.opponents & b.opponents)
+    score += min(shared, 2) * 0.03
+    if a.career_gap_days(b) > MAX_CAREER_GAP_DAYS:
+        score -= 0.15
+    distance = a.weight_class_distance(b)
+    if distance is not None and distance > MAX_WEIGHT_CLASS_DISTANCE:
+        score -= WEIGHT_CLASS_PENALTY
+    return round(min(score, 1.0), 4)
+
+
+class _Clusters:
+    """Union-find over names that refuses merges whose fight evidence conflicts"""
+
+    def __init__(self, profiles: Dict[str, NameProfile]):
+        self.parent = {name: name for name in profiles}
+        self.members = {name: {name} for name in profiles}
+        self.dates = {name: set(profile.dates) for name, profile in profiles.items()}
+        self.opponents = {name: set(profile.opponents) for name, profile in profiles.items()}
+
+    def find(self, name: str) -> str:
+        while self.parent[name] != name:
+            self.parent[name] = self.parent[self.parent[name]]
+            name = self.parent[name]
+        return name
+
+    def union(self, a: str, b: str) -> bool:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return True
+        if (self.dates[root_a] & self.dates[root_b]
+                or self.members[root_a] & self.opponents[root_b]
+                or self.members[root_b] & self.opponents[root_a]):
+            return False
+        if len(self.members[root_a]) < len(self.members[root_b]):
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        for attribute in (self.members, self.dates, self.opponents):
+            attribute[root_a] |= attribute.pop(root_b)
+        return True
+
+
+def resolve(profiles: Dict[str, NameProfile]) -> pd.DataFrame:
+    """
+    Alias map rows (alias, canonical, score, status) for every name that
+    scored at least REVIEW_SCORE against another. Pairs are merged best
+    first; the canonical spelling of a group is its most frequent one.
+    """
+    scored = []
+    for a, b in candidate_pairs(profiles):
+        score = score_pair(profiles[a], profiles[b])
+        if score >= REVIEW_SCORE:
+            scored.append((score, a, b))
+    scored.sort(key=lambda item: (-item[0], item[1], item[2]))
+
+    clusters = _Clusters(profiles)
+    best_score: Dict[str, float] = {}
+    review = []
+    for score, a, b in scored:
+        if score >= AUTO_MERGE_SCORE and clusters.union(a, b):
+            for name in (a, b):
+                best_score[name] = max(best_score.get(name, 0.0), score)
+        elif score < AUTO_MERGE_SCORE:
+            review.append((score, a, b))
+
+    rows = []
+    groups: Dict[str, List[str]] = defaultdict(list)
+    for name in best_score:
+        groups[clusters.find(name)].append(name)
+    for names in groups.values():
+        canonical = max(names, key=lambda n: (profiles[n].appearances, n))
+        for name in names:
+            if name != canonical:
+                rows.append((name, canonical, best_score[name], 'auto'))
+
+    merged = {row[0] for row in rows}
+    for score, a, b in review:
+        if a in merged or b in merged or clusters.find(a) == clusters.find(b):
+            continue
+        alias, canonical = sorted((a, b), key=lambda n: (profiles[n].appearances, n))
+        rows.append((alias, canonical, score, 'review'))
+        merged.add(alias)
+
+    return pd.DataFrame(rows, columns=ALIAS_COLUMNS).sort_values(['status', 'canonical', 'alias'], ignore_index=True)
+
+
+def load_aliases(path: Path = ALIASES_PATH) -> pd.DataFrame:
+    """The persisted alias map (empty when the file does not exist)"""
+    if not Path(path).exists():
+        return pd.DataFrame(columns=ALIAS_COLUMNS)
+    return pd.read_csv(path, dtype={'alias': str, 'canonical': str, 'status': str})
+
+
+def merge_reviewed(previous: pd.DataFrame, proposed: pd.DataFrame) -> pd.DataFrame:
+    """New proposals, except for aliases a person already confirmed or rejected"""
+    kept = previous[previous['status'].isin(KEPT_STATUSES)]
+    if kept.empty:
+        return proposed
+    proposed = proposed[~proposed['alias'].isin(kept['alias'])]
+    return pd.concat([kept, proposed], ignore_index=True).sort_values(
+        ['status', 'canonical', 'alias'], ignore_index=True
+    )
+
+
+def save_aliases(aliases: pd.DataFrame, path: Path = ALIASES_PATH) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    aliases[ALIAS_COLUMNS].to_csv(path, index=False)
+    return path
+
+
+class AliasMap:
+    """
+    Applied alias map, looked up by normalized name so case, accent and
+    punctuation variants of a known alias resolve too
+    """
+
+    def __init__(self, aliases: Optional[pd.DataFrame] = None):
+        if aliases is None:
+            aliases = load_aliases()
+        applied = aliases[aliases['status'].isin(APPLIED_STATUSES)]
+        self.canonical: Dict[str, str] = {}
+        for canonical in applied['canonical'].unique():
+            self.canonical[normalize_name(canonical)] = canonical
+        for alias, canonical in zip(applied['alias'], applied['canonical']):
+            self.canonical[normalize_name(alias)] = canonical
+
+    def __len__(self) -> int:
+        return len(self.canonical)
+
+    def apply(self, names: pd.Series) -> pd.Series:
+        """Canonical spelling for each name; names outside the map are returned unchanged"""
+        if not self.canonical:
+            return names
+        unique = pd.Series(names.dropna().unique())
+        lookup = dict(zip(unique, unique.map(normalize_name).map(self.canonical)))
+        return names.map(lambda name: lookup.get(name) if isinstance(lookup.get(name), str) else name)
+
+
+def read_sources(paths: List[str]) -> List[pd.DataFrame]:
+    return [
+        pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[""],
+                    usecols=lambda column: column in ('RedFighter', 'BlueFighter', 'Date', 'WeightClass'))
+        for path in paths
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resolve fighter name variants into an alias map")
+    parser.add_argument("command", choices=['resolve', 'show'])
+    parser.add_argument("csv_paths", nargs="*", help="Fight CSVs to resolve across (resolve only)")
+    parser.add_argument("--aliases", default=str(ALIASES_PATH))
+    args = parser.parse_args()
+
+    if args.command == 'resolve':
+        if not args.csv_paths:
+            parser.error("resolve needs at least one CSV")
+        start = time.perf_counter()
+        profiles = build_profiles(fight_appearances(read_sources(args.csv_paths)))
+        proposed = resolve(profiles)
+        aliases = merge_reviewed(load_aliases(Path(args.aliases)), proposed)
+        path = save_aliases(aliases, Path(args.aliases))
+        print(f"Resolved {len(profiles)} names in {time.perf_counter() - start:.2f}s; "
+              f"alias map written to {path}")
+
+    aliases = load_aliases(Path(args.aliases))
+    for status, count in aliases['status'].value_counts().items():
+        print(f"  {count:>6}  {status}")
+    for row in aliases.itertuples(index=False):
+        print(f"  {row.status:<9} {row.score:.3f}  {row.alias}  ->  {row.canonical}")
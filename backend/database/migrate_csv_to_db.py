@@ -5,14 +5,22 @@ Run this after setting up your database
 import pandas as pd
 import sys
 from pathlib import Path
+from sqlalchemy import func
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 from datetime import datetime
+from typing import Iterable, Optional
 
 # Add parent directory to path to import schema
 sys.path.append(str(Path(__file__).parent.parent))
 
 from database.schema import Base, Fighter, Fight
 from database.config import engine, SessionLocal
+from database.entity_resolution import AliasMap
+from database.validation import QUARANTINE_DIR, fight_records, summarize, validate_fights, write_quarantine
+from services.participation import career_totals, dirty_fighter_ids, empty_totals, fighters_by_id
+from services.ratings import apply_new_fights, rebuild_ratings
+from services.snapshot import refresh_snapshot
 
 
 def create_tables():
@@ -32,148 +40,103 @@ def get_or_create_fighter(db: Session, fighter_name: str) -> Fighter:
     return fighter
 
 
-def update_fighter_stats(db: Session):
-    """Update aggregated stats for all fighters"""
+def update_fighter_stats(db: Session, fighter_ids: Optional[Iterable[int]] = None):
+    """
+    Update aggregated stats for all fighters, or only for `fighter_ids`
+    (e.g. the fighters an ingest touched, see dirty_fighter_ids)
+    """
     print("Updating fighter statistics...")
 
-    fighters = db.query(Fighter).all()
+    if fighter_ids is None:
+        fighters = db.query(Fighter).all()
+    else:
+        fighter_ids = set(fighter_ids)
+        fighters = fighters_by_id(db, fighter_ids)
+    totals = career_totals(db, fighter_ids)
 
     for fighter in fighters:
-        # Get all fights for this fighter
-        red_fights = db.query(Fight).filter(Fight.red_fighter_id == fighter.id).all()
-        blue_fights = db.query(Fight).filter(Fight.blue_fighter_id == fighter.id).all()
-
-        total_fights = len(red_fights) + len(blue_fights)
-        wins = 0
-        ko_wins = 0
-        sub_wins = 0
-        dec_wins = 0
-        total_duration = 0
-
-        # Count wins from red corner
-        for fight in red_fights:
-            if fight.winner == 'Red':
-                wins += 1
-                if fight.finish_method:
-                    method_upper = fight.finish_method.upper()
-                    if 'KO' in method_upper or 'TKO' in method_upper:
-                        ko_wins += 1
-                    elif 'SUB' in method_upper:
-                        sub_wins += 1
-                    elif 'DEC' in method_upper:
-                        dec_wins += 1
-
-            if fight.total_fight_duration_secs:
-                total_duration += fight.total_fight_duration_secs
-
-        # Count wins from blue corner
-        for fight in blue_fights:
-            if fight.winner == 'Blue':
-                wins += 1
-                if fight.finish_method:
-                    method_upper = fight.finish_method.upper()
-                    if 'KO' in method_upper or 'TKO' in method_upper:
-                        ko_wins += 1
-                    elif 'SUB' in method_upper:
-                        sub_wins += 1
-                    elif 'DEC' in method_upper:
-                        dec_wins += 1
-
-            if fight.total_fight_duration_secs:
-                total_duration += fight.total_fight_duration_secs
+        career = totals.get(fighter.id) or empty_totals()
+        total_fights = career['total_fights']
+        wins = career['wins']
 
         # Update fighter stats
         fighter.total_fights = total_fights
         fighter.wins = wins
         fighter.losses = total_fights - wins
         fighter.win_percentage = (wins / total_fights * 100) if total_fights > 0 else 0
-        fighter.ko_tko_wins = ko_wins
-        fighter.submission_wins = sub_wins
-        fighter.decision_wins = dec_wins
-        fighter.avg_fight_duration_secs = total_duration / total_fights if total_fights > 0 else 0
+        fighter.ko_tko_wins = career['ko_tko_wins']
+        fighter.submission_wins = career['submission_wins']
+        fighter.decision_wins = career['decision_wins']
+        fighter.avg_fight_duration_secs = career['total_duration'] / total_fights if total_fights > 0 else 0
 
     db.commit()
     print(f"Updated stats for {len(fighters)} fighters")
 
 
-def migrate_csv_data(csv_path: str):
-    """Migrate data from transformed CSV to database"""
+def migrate_csv_data(csv_path: str, quarantine_dir: Path = QUARANTINE_DIR, max_quarantined: float = 0.05,
+                     aliases: Optional[AliasMap] = None, bind: Optional[Engine] = None):
+    """
+    Migrate data from transformed CSV to database
+    Rows that break the data contracts (database/validation.py) are written
+    to the quarantine directory instead of aborting the load; more than
+    `max_quarantined` of the file quarantined aborts before anything is written.
+    Fighter names go through the alias map (database/entity_resolution.py)
+    so spelling variants load as one fighter.
+    `bind` loads into that engine's database instead of DATABASE_URL (the
+    pipeline's serving_database stage); the fighter snapshot is left alone then.
+    """
     print(f"Loading data from {csv_path}...")
 
-    # Read the transformed CSV
-    df = pd.read_csv(csv_path)
+    # Read the transformed CSV as text; the contracts do all parsing
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False, na_values=[""])
     print(f"Loaded {len(df)} fight records")
 
-    db = SessionLocal()
+    clean, quarantined = validate_fights(df)
+    path = write_quarantine(quarantined, csv_path, quarantine_dir)
+    if path:
+        print(f"Quarantined {len(quarantined)} rows to {path}:")
+        for reason, count in summarize(quarantined).items():
+            print(f"  {count:>6}  {reason}")
+        if len(quarantined) > max_quarantined * len(df):
+            raise ValueError(
+                f"{len(quarantined)} of {len(df)} rows failed validation (limit {max_quarantined:.0%}); nothing loaded"
+            )
+
+    if aliases is None:
+        aliases = AliasMap()
+    renamed = 0
+    for column in ('red_fighter_name', 'blue_fighter_name'):
+        canonical = aliases.apply(clean[column])
+        renamed += int((canonical != clean[column]).sum())
+        clean[column] = canonical
+    if renamed:
+        print(f"Resolved {renamed} fighter name variants through the alias map")
+
+    db = SessionLocal() if bind is None else Session(bind)
 
     try:
         # Track fighters and fights
-        fighters_created = 0
         fights_created = 0
+        latest_existing = db.query(func.max(Fight.date)).scalar()
 
         print("Migrating data to database...")
 
-        for idx, row in df.iterrows():
+        for idx, record in enumerate(fight_records(clean)):
             # Get or create fighters
-            red_fighter = get_or_create_fighter(db, row['RedFighter'])
-            blue_fighter = get_or_create_fighter(db, row['BlueFighter'])
-
-            # Create fight record
-            fight = Fight(
-                red_fighter_id=red_fighter.id,
-                blue_fighter_id=blue_fighter.id,
-                date=pd.to_datetime(row['Date']) if pd.notna(row['Date']) else None,
-                location=row['Location'] if pd.notna(row['Location']) else None,
-                country=row['Country'] if pd.notna(row['Country']) else None,
-                winner=row['Winner'] if pd.notna(row['Winner']) else None,
-
-                # Betting odds
-                red_odds=float(row['RedOdds']) if pd.notna(row['RedOdds']) else None,
-                blue_odds=float(row['BlueOdds']) if pd.notna(row['BlueOdds']) else None,
-                red_expected_value=float(row['RedExpectedValue']) if pd.notna(row['RedExpectedValue']) else None,
-                blue_expected_value=float(row['BlueExpectedValue']) if pd.notna(row['BlueExpectedValue']) else None,
-
-                # Method odds
-                red_ko_odds=float(row['RKOOdds']) if pd.notna(row['RKOOdds']) else None,
-                blue_ko_odds=float(row['BKOOdds']) if pd.notna(row['BKOOdds']) else None,
-                red_sub_odds=float(row['RSubOdds']) if pd.notna(row['RSubOdds']) else None,
-                blue_sub_odds=float(row['BSubOdds']) if pd.notna(row['BSubOdds']) else None,
-                red_dec_odds=float(row['RedDecOdds']) if pd.notna(row['RedDecOdds']) else None,
-                blue_dec_odds=float(row['BlueDecOdds']) if pd.notna(row['BlueDecOdds']) else None,
-
-                # Fight outcome
-                finish_method=row['Finish'] if pd.notna(row['Finish']) else None,
-                finish_details=row['FinishDetails'] if pd.notna(row['FinishDetails']) else None,
-                finish_round=int(row['FinishRound']) if pd.notna(row['FinishRound']) else None,
-                finish_round_time=row['FinishRoundTime'] if pd.notna(row['FinishRoundTime']) else None,
-                total_fight_duration_secs=float(row['TotalFightDurationSecs']) if pd.notna(row['TotalFightDurationSecs']) else None,
-            )
+            red_fighter = get_or_create_fighter(db, record.pop('red_fighter_name'))
+            blue_fighter = get_or_create_fighter(db, record.pop('blue_fighter_name'))
 
-            # Add optional stats columns if they exist
-            stat_columns = {
-                'red_sig_strikes': 'RSigStrikes',
-                'blue_sig_strikes': 'BSigStrikes',
-                'red_total_strikes': 'RTotalStrikes',
-                'blue_total_strikes': 'BTotalStrikes',
-                'red_takedowns': 'RTakedowns',
-                'blue_takedowns': 'BTakedowns',
-            }
-
-            for db_col, csv_col in stat_columns.items():
-                if csv_col in df.columns and pd.notna(row[csv_col]):
-                    setattr(fight, db_col, int(row[csv_col]))
+            # Create fight record (values are already typed by the contracts)
+            fight = Fight(red_fighter_id=red_fighter.id, blue_fighter_id=blue_fighter.id, **record)
 
             db.add(fight)
             fights_created += 1
 
-            # Commit in batches of 100
+            # Flush in batches of 100; fights and stats commit together below
             if (idx + 1) % 100 == 0:
-                db.commit()
+                db.flush()
                 print(f"Processed {idx + 1} fights...")
 
-        # Final commit
-        db.commit()
-
         print(f"\nMigration complete!")
         print(f"Fights created: {fights_created}")
 
@@ -181,8 +144,19 @@ def migrate_csv_data(csv_path: str):
         fighters_count = db.query(Fighter).count()
         print(f"Fighters in database: {fighters_count}")
 
-        # Update fighter statistics
-        update_fighter_stats(db)
+        # Update statistics of the fighters in the new fights only, then commit
+        update_fighter_stats(db, dirty_fighter_ids(db))
+
+        # Rate the new fights on top of the stored ratings, unless they go
+        # back before fights already in the database: then replay everything
+        if latest_existing is not None and clean['date'].min() < latest_existing:
+            rebuild_ratings(db)
+        else:
+            print(f"Rated {apply_new_fights(db)} new fights")
+
+        # Search and predictions read the snapshot, not these rows
+        if bind is None:
+            refresh_snapshot(db)
 
     except Exception as e:
         print(f"Error during migration: {e}")
@@ -1,11 +1,26 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Index
+from sqlalchemy import BigInteger, Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Index, event, inspect
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Session, object_session, relationship
 from datetime import datetime
 
 Base = declarative_base()
 
 
+def fighter_pair_key(fighter_id, other_fighter_id):
+    """
+    The same integer for both orders of a pair of fighter ids: (low id, high id)
+    packed as low * 2**32 + high, so every meeting of two fighters shares it
+    """
+    low, high = (fighter_id, other_fighter_id) if fighter_id <= other_fighter_id else (other_fighter_id, fighter_id)
+    return (low << 32) | high
+
+
+def _default_pair_key(context):
+    # Column default, so Core bulk inserts into fights get the key as well
+    parameters = context.get_current_parameters()
+    return fighter_pair_key(parameters['red_fighter_id'], parameters['blue_fighter_id'])
+
+
 class Fighter(Base):
     """Fighter profile and career statistics"""
     __tablename__ = "fighters"
@@ -30,6 +45,10 @@ class Fighter(Base):
     avg_significant_strikes = Column(Float, default=0.0)
     avg_takedowns = Column(Float, default=0.0)
 
+    # Strength rating (maintained by services.ratings)
+    elo_rating = Column(Float, default=1500.0)
+    rated_fights = Column(Integer, default=0)
+
     # Metadata
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -49,6 +68,9 @@ class Fight(Base):
     red_fighter_id = Column(Integer, ForeignKey("fighters.id"), nullable=False)
     blue_fighter_id = Column(Integer, ForeignKey("fighters.id"), nullable=False)
 
+    # fighter_pair_key(red_fighter_id, blue_fighter_id): previous meetings are one index range
+    pair_key = Column(BigInteger, default=_default_pair_key)
+
     # Fight details
     date = Column(DateTime, index=True, nullable=False)
     location = Column(String(255))
@@ -61,6 +83,12 @@ class Fight(Base):
     red_expected_value = Column(Float)
     blue_expected_value = Column(Float)
 
+    # Latest bookmaker prices from the live feed, in American odds (services/live_odds.py);
+    # red_odds/blue_odds above keep the historical values from the CSV
+    live_red_odds = Column(Float)
+    live_blue_odds = Column(Float)
+    odds_updated_at = Column(DateTime)
+
     # Method odds
     red_ko_odds = Column(Float)
     blue_ko_odds = Column(Float)
@@ -112,9 +140,184 @@ class Fight(Base):
     __table_args__ = (
         Index('idx_fight_date', 'date'),
         Index('idx_fight_fighters', 'red_fighter_id', 'blue_fighter_id'),
+        Index('idx_fight_pair_date', 'pair_key', 'date'),
     )
 
 
+class FighterFight(Base):
+    """
+    One row per (fighter, fight), seen from that fighter's side, so per-fighter
+    reads are a single range scan on (fighter_id, date) instead of a
+    red-OR-blue query. Kept in sync with Fight by the mapper events below;
+    Core bulk writes to fights must call services.participation.rebuild_fighter_fights
+    """
+    __tablename__ = "fighter_fights"
+
+    fighter_id = Column(Integer, ForeignKey("fighters.id"), primary_key=True)
+    fight_id = Column(Integer, ForeignKey("fights.id"), primary_key=True)
+    opponent_id = Column(Integer, ForeignKey("fighters.id"), nullable=False)
+    corner = Column(String(4), nullable=False)  # 'Red', 'Blue'
+    result = Column(String(1))  # 'W', 'L', 'D'; NULL for no contest / upcoming
+    date = Column(DateTime, nullable=False)
+
+    # Relationships
+    fight = relationship("Fight")
+
+
+Index('idx_fighter_fights_fighter_date', FighterFight.fighter_id, FighterFight.date.desc())
+Index('idx_fighter_fights_fight', FighterFight.fight_id)
+
+
+def fight_result(winner, corner: str):
+    """'W', 'L' or 'D' for the given corner of a fight's winner; None without a result"""
+    if winner == corner:
+        return 'W'
+    if winner in ('Red', 'Blue'):
+        return 'L'
+    if winner and 'Draw' in winner:
+        return 'D'
+    return None
+
+
+def participation_rows(fight_id, red_fighter_id, blue_fighter_id, winner, date) -> list:
+    """The two fighter_fights rows of a fight"""
+    return [
+        {'fighter_id': red_fighter_id, 'fight_id': fight_id, 'opponent_id': blue_fighter_id,
+         'corner': 'Red', 'result': fight_result(winner, 'Red'), 'date': date},
+        {'fighter_id': blue_fighter_id, 'fight_id': fight_id, 'opponent_id': red_fighter_id,
+         'corner': 'Blue', 'result': fight_result(winner, 'Blue'), 'date': date},
+    ]
+
+
+_PARTICIPATION_ATTRIBUTES = ('red_fighter_id', 'blue_fighter_id', 'winner', 'date')
+
+# Fight attributes the fighter career stats are computed from
+_STATS_ATTRIBUTES = _PARTICIPATION_ATTRIBUTES + ('finish_method', 'total_fight_duration_secs')
+
+# Session.info key of the ids of fighters whose fights were written through that
+# session; services.participation.dirty_fighter_ids collects and clears them
+DIRTY_FIGHTERS_KEY = 'dirty_fighter_ids'
+
+
+def _mark_dirty(fight, *fighter_ids):
+    session = object_session(fight)
+    if session is not None:
+        session.info.setdefault(DIRTY_FIGHTERS_KEY, set()).update(
+            fighter_id for fighter_id in fighter_ids if fighter_id is not None
+        )
+
+
+@event.listens_for(Fight, 'after_insert')
+def _insert_participation(mapper, connection, fight):
+    connection.execute(FighterFight.__table__.insert(), participation_rows(
+        fight.id, fight.red_fighter_id, fight.blue_fighter_id, fight.winner, fight.date
+    ))
+    _mark_dirty(fight, fight.red_fighter_id, fight.blue_fighter_id)
+
+
+@event.listens_for(Fight, 'before_update')
+def _update_pair_key(mapper, connection, fight):
+    state = inspect(fight)
+    if state.attrs.red_fighter_id.history.has_changes() or state.attrs.blue_fighter_id.history.has_changes():
+        fight.pair_key = fighter_pair_key(fight.red_fighter_id, fight.blue_fighter_id)
+
+
+@event.listens_for(Fight, 'after_update')
+def _update_participation(mapper, connection, fight):
+    state = inspect(fight)
+    if not any(state.attrs[name].history.has_changes() for name in _STATS_ATTRIBUTES):
+        return
+    # Both the fighters now in the corners and any that were replaced
+    _mark_dirty(fight, fight.red_fighter_id, fight.blue_fighter_id,
+                *state.attrs.red_fighter_id.history.deleted, *state.attrs.blue_fighter_id.history.deleted)
+    if not any(state.attrs[name].history.has_changes() for name in _PARTICIPATION_ATTRIBUTES):
+        return
+    _delete_participation(mapper, connection, fight)
+    _insert_participation(mapper, connection, fight)
+
+
+@event.listens_for(Fight, 'before_delete')
+def _delete_participation(mapper, connection, fight):
+    table = FighterFight.__table__
+    connection.execute(table.delete().where(table.c.fight_id == fight.id))
+    _mark_dirty(fight, fight.red_fighter_id, fight.blue_fighter_id)
+
+
+class DatasetRevision(Base):
+    """
+    A single row counting writes to fighters and fights, so HTTP caching can
+    tell the data changed by reading one row instead of aggregating both
+    tables. ORM flushes bump it through the events below; bulk writes that
+    skip them (ratings, live odds) call bump_dataset_revision themselves.
+    """
+    __tablename__ = "dataset_revision"
+
+    id = Column(Integer, primary_key=True)
+    revision = Column(BigInteger, nullable=False, default=0)
+
+
+# Session.info flag set when a flush wrote fighters or fights
+DATASET_CHANGED_KEY = 'dataset_changed'
+
+# Engines whose dataset_revision table and row are known to exist
+_revision_ready = set()
+
+
+def bump_dataset_revision(connection):
+    """Count a write to fighters or fights, in the writer's transaction (creates the table on first use)"""
+    table = DatasetRevision.__table__
+    key = str(connection.engine.url)
+    if key not in _revision_ready:
+        table.create(connection, checkfirst=True)
+        if connection.execute(table.select().where(table.c.id == 1)).first() is None:
+            connection.execute(table.insert().values(id=1, revision=0))
+        _revision_ready.add(key)
+    connection.execute(table.update().where(table.c.id == 1).values(revision=table.c.revision + 1))
+
+
+def dataset_revision(connection) -> int:
+    """The current revision (0 for a database not written to since the table was added)"""
+    table = DatasetRevision.__table__
+    if str(connection.engine.url) not in _revision_ready and not inspect(connection).has_table(table.name):
+        return 0
+    return connection.execute(table.select().with_only_columns(table.c.revision).where(table.c.id == 1)).scalar() or 0
+
+
+def _mark_dataset_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info[DATASET_CHANGED_KEY] = True
+
+
+for _model in (Fighter, Fight):
+    for _event in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event, _mark_dataset_changed)
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_dataset_revision(session, flush_context):
+    if session.info.pop(DATASET_CHANGED_KEY, False):
+        bump_dataset_revision(session.connection())
+
+
+class FightRating(Base):
+    """Elo rating snapshot for both corners before and after a fight"""
+    __tablename__ = "fight_ratings"
+
+    fight_id = Column(Integer, ForeignKey("fights.id"), primary_key=True)
+
+    red_rating_before = Column(Float, nullable=False)
+    blue_rating_before = Column(Float, nullable=False)
+    red_rating_after = Column(Float, nullable=False)
+    blue_rating_after = Column(Float, nullable=False)
+
+    # Metadata
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    fight = relationship("Fight")
+
+
 class Prediction(Base):
     """ML predictions for fights"""
     __tablename__ = "predictions"
@@ -0,0 +1,174 @@
+"""
+Read-only SQLite serving artifact
+Copies the tables the API reads from any source database into a single
+SQLite file laid out for serving: tables are bulk loaded in primary key
+order with indexes created afterwards, then ANALYZE'd, VACUUM'd and
+switched to WAL. The file is written next to its destination and renamed
+into place, so a running API can be pointed at the path and picks up new
+builds without a restart (see SQLITE_READ_ONLY in database/config.py).
+
+Usage (from the backend directory):
+    python database/serving.py build --output serving/ufc.db
+    python database/serving.py info --output serving/ufc.db
+
+Serve it with:
+    DATABASE_URL=sqlite:///./serving/ufc.db SQLITE_READ_ONLY=1 SQLITE_MMAP_SIZE=1073741824
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+from sqlalchemy import create_engine, event, inspect, select
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database.schema import Base, FighterFight
+
+SERVING_PATH = Path(os.getenv("SERVING_DB_PATH", Path(__file__).parent.parent / "serving" / "ufc.db"))
+
+# Tables copied into the artifact; the rest (users, stored predictions) are created empty
+SERVING_TABLES = ('fighters', 'fights', 'fighter_fights', 'fight_ratings')
+
+# Rows read from the source and inserted per executemany
+LOAD_BATCH_SIZE = 5000
+
+
+def _load_engine(path: Path):
+    """Engine for the artifact under construction: no journal and no fsync until it is finished"""
+    engine = create_engine(f"sqlite:///{path}")
+
+    @event.listens_for(engine, "connect")
+    def _bulk_load_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=OFF")
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-262144")  # 256 MiB
+        cursor.close()
+
+    return engine
+
+
+def _copy_table(source, target, table, batch_size: int) -> int:
+    copied = 0
+    # Columns the source predates are left to their defaults (fights.pair_key is derived from the row)
+    source_columns = {column['name'] for column in inspect(source).get_columns(table.name)}
+    statement = select(*(column for column in table.columns if column.name in source_columns)).order_by(
+        *table.primary_key.columns
+    )
+    with source.connect() as source_connection, target.begin() as target_connection:
+        result = source_connection.execution_options(stream_results=True, yield_per=batch_size).execute(statement)
+        for batch in result.mappings().partitions():
+            target_connection.execute(table.insert(), [dict(row) for row in batch])
+            copied += len(batch)
+    return copied
+
+
+def _finalize(path: Path):
+    """Statistics, compaction and WAL, on a plain connection (VACUUM cannot run inside a transaction)"""
+    connection = sqlite3.connect(path, isolation_level=None)
+    try:
+        connection.execute("ANALYZE")
+        connection.execute("PRAGMA optimize")
+        connection.execute("VACUUM")
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        connection.close()
+
+
+def build_serving_database(source_url: str, output: Path = SERVING_PATH,
+                           batch_size: int = LOAD_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Build the artifact from `source_url` and atomically replace `output`
+    Returns the number of rows copied per table
+    """
+    output = Path(output).resolve()
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output.with_name(f".{output.name}.{os.getpid()}.tmp")
+    for leftover in (tmp_path, Path(f"{tmp_path}-wal"), Path(f"{tmp_path}-shm")):
+        leftover.unlink(missing_ok=True)
+
+    source = create_engine(source_url)
+    target = _load_engine(tmp_path)
+    counts = {}
+    try:
+        # Tables first, indexes only once the rows are in
+        with target.begin() as connection:
+            for table in Base.metadata.sorted_tables:
+                connection.execute(CreateTable(table))
+
+        source_tables = set(inspect(source).get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in SERVING_TABLES:
+                continue
+            if table.name in source_tables:
+                counts[table.name] = _copy_table(source, target, table, batch_size)
+            elif table.name == FighterFight.__tablename__:
+                # Source predates fighter_fights: derive it from the copied fights
+                from services.participation import rebuild_fighter_fights
+                with Session(target) as db:
+                    counts[table.name] = rebuild_fighter_fights(db)
+
+        with target.begin() as connection:
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(connection)
+    finally:
+        source.dispose()
+        target.dispose()
+
+    try:
+        _finalize(tmp_path)
+        with open(tmp_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, output)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return counts
+
+
+def describe(path: Path) -> Dict[str, object]:
+    """Size, journal mode, statistics and row counts of an artifact"""
+    connection = sqlite3.connect(f"file:{Path(path).resolve()}?mode=ro", uri=True)
+    try:
+        info = {
+            'size_mib': Path(path).stat().st_size / 2 ** 20,
+            'journal_mode': connection.execute("PRAGMA journal_mode").fetchone()[0],
+            'page_size': connection.execute("PRAGMA page_size").fetchone()[0],
+            'freelist_pages': connection.execute("PRAGMA freelist_count").fetchone()[0],
+            'analyzed': bool(connection.execute(
+                "SELECT count(*) FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchone()[0]),
+        }
+        for table in SERVING_TABLES:
+            info[table] = connection.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+        return info
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or inspect the read-only SQLite serving artifact")
+    parser.add_argument("command", choices=['build', 'info'])
+    parser.add_argument("--output", default=str(SERVING_PATH))
+    parser.add_argument("--source", help="Source database URL (default: DATABASE_URL)")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        from database.config import get_database_url
+
+        start = time.perf_counter()
+        counts = build_serving_database(args.source or get_database_url(), Path(args.output))
+        print(f"Built {args.output} in {time.perf_counter() - start:.2f}s")
+        for table, rows in counts.items():
+            print(f"  {table:<16} {rows:>9} rows")
+
+    for key, value in describe(Path(args.output)).items():
+        print(f"{key:<16} {value}")
@@ -0,0 +1,215 @@
+"""
+Data contracts for the fight CSV, checked column by column with vectorized masks
+Rows that break a contract go to a quarantine file with the reasons; the
+remaining rows come back typed and renamed to Fight attributes, so the
+loader can insert them without any per-value parsing or checks.
+
+Usage (from the backend directory):
+    python database/validation.py ../ufc-master-transformed.csv
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+QUARANTINE_DIR = Path(__file__).parent.parent / "quarantine"
+REASON_COLUMN = "quarantine_reasons"
+SOURCE_LINE_COLUMN = "source_line"
+
+WINNERS = ('Red', 'Blue', 'Draw')
+FINISH_METHODS = ('KO/TKO', 'SUB', 'U-DEC', 'S-DEC', 'M-DEC', 'DQ', 'Overturned')
+MAX_ROUNDS = 5
+ROUND_SECONDS = 300
+
+
+class Contract:
+    """
+    Rules for one CSV column: its kind ('string', 'float', 'int', 'datetime'
+    or 'clock' for MM:SS), whether it is required, and an optional range or
+    set of allowed values. `target` is the Fight attribute it loads into.
+    """
+
+    def __init__(self, column: str, target: str, kind: str, required: bool = False,
+                 min_value=None, max_value=None, choices: Optional[Tuple[str, ...]] = None,
+                 optional_column: bool = False):
+        self.column = column
+        self.target = target
+        self.kind = kind
+        self.required = required
+        self.min_value = min_value
+        self.max_value = max_value
+        self.choices = choices
+        self.optional_column = optional_column
+
+    def check(self, raw: pd.Series) -> Tuple[pd.Series, List[Tuple[pd.Series, str]]]:
+        """Typed column and (violation mask, reason) pairs"""
+        violations = []
+        present = raw.notna()
+        if raw.dtype == object:
+            stripped = raw.astype("string").str.strip()
+            present &= stripped.ne("").fillna(False).astype(bool)
+            raw = stripped.where(present)
+
+        values = None
+        if self.kind == 'string':
+            typed = raw.astype("string").str.strip().where(present)
+        elif self.kind == 'datetime':
+            typed = pd.to_datetime(raw, errors='coerce', format='mixed')
+            violations.append((present & typed.isna(), "not a date"))
+        elif self.kind == 'clock':
+            # Loaded as the MM:SS string; ranges apply to its length in seconds
+            typed = raw.astype("string").where(present)
+            parts = typed.str.extract(r'^(\d{1,2}):([0-5]\d)$')
+            values = pd.to_numeric(parts[0], errors='coerce') * 60 + pd.to_numeric(parts[1], errors='coerce')
+            violations.append((present & values.isna(), "not an MM:SS time"))
+        else:
+            typed = pd.to_numeric(raw, errors='coerce')
+            typed = typed.where(np.isfinite(typed))
+            violations.append((present & typed.isna(), "not a number"))
+            if self.kind == 'int':
+                fractional = typed.notna() & (typed % 1 != 0)
+                violations.append((fractional, "not a whole number"))
+                typed = typed.where(~fractional).astype("Int64")
+
+        if values is None:
+            values = typed
+
+        if self.required:
+            violations.append((~present, "missing"))
+        if self.min_value is not None:
+            violations.append(((values < self.min_value).fillna(False).astype(bool), f"below {self.min_value}"))
+        if self.max_value is not None:
+            violations.append(((values > self.max_value).fillna(False).astype(bool), f"above {self.max_value}"))
+        if self.choices is not None:
+            violations.append((present & ~typed.isin(self.choices).fillna(False).astype(bool),
+                               f"not one of {', '.join(self.choices)}"))
+        return typed, violations
+
+
+def _probability(column: str, target: str) -> Contract:
+    return Contract(column, target, 'float', min_value=0.0, max_value=1.0)
+
+
+FIGHT_CONTRACTS = [
+    Contract('RedFighter', 'red_fighter_name', 'string', required=True),
+    Contract('BlueFighter', 'blue_fighter_name', 'string', required=True),
+    Contract('Date', 'date', 'datetime', required=True, min_value=pd.Timestamp('1993-11-12')),
+    Contract('Location', 'location', 'string'),
+    Contract('Country', 'country', 'string'),
+    Contract('Winner', 'winner', 'string', choices=WINNERS),
+
+    # Betting odds (implied probabilities)
+    _probability('RedOdds', 'red_odds'),
+    _probability('BlueOdds', 'blue_odds'),
+    _probability('RedExpectedValue', 'red_expected_value'),
+    _probability('BlueExpectedValue', 'blue_expected_value'),
+
+    # Method odds
+    _probability('RKOOdds', 'red_ko_odds'),
+    _probability('BKOOdds', 'blue_ko_odds'),
+    _probability('RSubOdds', 'red_sub_odds'),
+    _probability('BSubOdds', 'blue_sub_odds'),
+    _probability('RedDecOdds', 'red_dec_odds'),
+    _probability('BlueDecOdds', 'blue_dec_odds'),
+
+    # Fight outcome
+    Contract('Finish', 'finish_method', 'string', choices=FINISH_METHODS),
+    Contract('FinishDetails', 'finish_details', 'string'),
+    Contract('FinishRound', 'finish_round', 'int', min_value=1, max_value=MAX_ROUNDS),
+    Contract('FinishRoundTime', 'finish_round_time', 'clock', max_value=ROUND_SECONDS),
+    Contract('TotalFightDurationSecs', 'total_fight_duration_secs', 'float',
+             min_value=0, max_value=MAX_ROUNDS * ROUND_SECONDS),
+
+    # Optional stats columns
+    *(Contract(column, target, 'int', min_value=0, optional_column=True) for column, target in {
+        'RSigStrikes': 'red_sig_strikes',
+        'BSigStrikes': 'blue_sig_strikes',
+        'RTotalStrikes': 'red_total_strikes',
+        'BTotalStrikes': 'blue_total_strikes',
+        'RTakedowns': 'red_takedowns',
+        'BTakedowns': 'blue_takedowns',
+    }.items()),
+]
+
+
+def validate_fights(df: pd.DataFrame, contracts: List[Contract] = FIGHT_CONTRACTS) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Split a raw fight CSV frame into (clean, quarantined)
+    clean: one column per contract target, already typed
+    quarantined: the offending source rows plus source_line and quarantine_reasons
+    Raises ValueError if a required column is absent altogether.
+    """
+    missing = [c.column for c in contracts if c.column not in df.columns and not c.optional_column]
+    if missing:
+        raise ValueError(f"CSV is missing columns: {', '.join(missing)}")
+
+    typed: Dict[str, pd.Series] = {}
+    reasons = pd.Series("", index=df.index, dtype=object)
+    for contract in contracts:
+        if contract.column not in df.columns:
+            continue
+        typed[contract.target], violations = contract.check(df[contract.column])
+        for mask, reason in violations:
+            if mask.any():
+                reasons[mask] += f"{contract.column}: {reason}; "
+
+    # Cross-column rules
+    if 'red_fighter_name' in typed and 'blue_fighter_name' in typed:
+        same = (typed['red_fighter_name'] == typed['blue_fighter_name']).fillna(False).astype(bool)
+        reasons[same] += "RedFighter/BlueFighter: same fighter; "
+
+    bad = reasons.ne("")
+    quarantined = df.loc[bad].copy()
+    quarantined.insert(0, SOURCE_LINE_COLUMN, quarantined.index + 2)  # 1-based, after the header
+    quarantined[REASON_COLUMN] = reasons[bad].str.rstrip("; ")
+
+    clean = pd.DataFrame(typed).loc[~bad]
+    return clean, quarantined
+
+
+def fight_records(clean: pd.DataFrame) -> List[dict]:
+    """Clean rows as dicts of plain Python values (None for missing), ready for the ORM"""
+    records = clean.astype(object).where(clean.notna(), None)
+    if 'date' in records:
+        records['date'] = [value.to_pydatetime() if value is not None else None for value in records['date']]
+    return records.to_dict('records')
+
+
+def write_quarantine(quarantined: pd.DataFrame, source_path: str, directory: Path = QUARANTINE_DIR) -> Optional[Path]:
+    """Write quarantined rows to <directory>/<source stem>.quarantine.csv; None when there are none"""
+    path = Path(directory) / f"{Path(source_path).stem}.quarantine.csv"
+    if quarantined.empty:
+        path.unlink(missing_ok=True)
+        return None
+    path.parent.mkdir(parents=True, exist_ok=True)
+    quarantined.to_csv(path, index=False)
+    return path
+
+
+def summarize(quarantined: pd.DataFrame) -> Dict[str, int]:
+    """Quarantined rows per reason (a row can count under several)"""
+    if quarantined.empty:
+        return {}
+    counts = quarantined[REASON_COLUMN].str.split("; ").explode().value_counts()
+    return {reason: int(count) for reason, count in counts.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check a fight CSV against the data contracts")
+    parser.add_argument("csv_path")
+    parser.add_argument("--quarantine-dir", default=str(QUARANTINE_DIR))
+    args = parser.parse_args()
+
+    raw = pd.read_csv(args.csv_path, dtype=str, keep_default_na=False, na_values=[""])
+    clean, quarantined = validate_fights(raw)
+    print(f"{len(clean)} rows pass, {len(quarantined)} quarantined")
+    for reason, count in summarize(quarantined).items():
+        print(f"  {count:>6}  {reason}")
+    path = write_quarantine(quarantined, args.csv_path, Path(args.quarantine_dir))
+    if path:
+        print(f"Quarantined rows written to {path}")
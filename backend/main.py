@@ -2,29 +2,51 @@
 FastAPI main application
 UFC Analytics API Backend
 """
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 
-from api import fighters, predictions
-from database.config import get_db
+from services import startup
+from api import exports, fighters, odds, predictions
+from database.config import get_db, route_request
 from database.schema import User
+from services import http_cache, live_odds, metrics, profiling
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up the database pool, model and hot queries (see WARMUP_MODE); ingest live odds (see LIVE_ODDS_FEED)"""
+    app.state.warmup_task = await startup.start(predictions.predictor)
+    app.state.live_odds_task = live_odds.start(predictions.predictor)
+    yield
+    if app.state.live_odds_task is not None:
+        app.state.live_odds_task.cancel()
+
 
 app = FastAPI(
     title="UFC Analytics API",
     description="API for UFC fight statistics, predictions, and betting analysis",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
+app.router.route_class = profiling.ProfiledRoute
 
 # CORS middleware for frontend access
-app.add_middleware(
-    CORSMiddleware,
+CORS_OPTIONS = dict(
     allow_origins=["http://localhost:3000", "http://localhost:3001", "https://your-domain.com"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CORSMiddleware, **CORS_OPTIONS)
+
+# Count SQL statements and DB time per request (on every engine, since they are created lazily)
+metrics.instrument_engine(Engine)
 
 # Security
 security = HTTPBearer(auto_error=False)
@@ -32,6 +54,8 @@ security = HTTPBearer(auto_error=False)
 # Include routers
 app.include_router(fighters.router, prefix="/api/v1")
 app.include_router(predictions.router, prefix="/api/v1")
+app.include_router(exports.router, prefix="/api/v1")
+app.include_router(odds.router, prefix="/api/v1")
 
 
 @app.get("/")
@@ -51,6 +75,21 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/ready", include_in_schema=False)
+def readiness_check():
+    """Readiness probe: 503 until warmup has finished; /api/v1/health stays the liveness probe"""
+    return JSONResponse(
+        status_code=200 if startup.STATE.ready else 503,
+        content=startup.STATE.as_dict()
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    """Per-route latency and SQL histograms in Prometheus text format"""
+    return PlainTextResponse(metrics.render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/api/v1/stats")
 def get_api_stats(db: Session = Depends(get_db)):
     """Get API statistics"""
@@ -80,6 +119,47 @@ async def track_usage(request, call_next):
     return response
 
 
+@app.middleware("http")
+async def instrument_requests(request, call_next):
+    """Latency histograms, SQL query accounting and query budget"""
+    response = await metrics.instrument_request(request, call_next)
+    startup.STATE.record_request(request.url.path)
+    return response
+
+
+@app.middleware("http")
+async def profile_requests(request, call_next):
+    """Opt-in sampling profiler (X-Profile header or PROFILE_SAMPLE_RATE)"""
+    return await profiling.profile_request(request, call_next)
+
+
+@app.middleware("http")
+async def route_reads(request, call_next):
+    """Read replicas with read-your-writes stickiness (see DATABASE_REPLICA_URLS)"""
+    return await route_request(request, call_next)
+
+
+@app.middleware("http")
+async def conditional_get(request, call_next):
+    """ETag / If-None-Match for dataset-versioned GET routes (304 before any DB work)"""
+    return await http_cache.conditional_get(request, call_next)
+
+
+@app.middleware("http")
+async def compress_responses(request, call_next):
+    """gzip/brotli for JSON responses above COMPRESSION_MIN_BYTES"""
+    return await http_cache.compress_response(request, call_next)
+
+
+# Outermost (added last): live odds subscribers bypass the per-request middlewares above
+app.add_middleware(odds.OddsStreamShortcut, path="/api/v1/odds/stream", cors=CORS_OPTIONS)
+
+
+@app.exception_handler(metrics.QueryBudgetExceeded)
+async def query_budget_exceeded(request, exc: metrics.QueryBudgetExceeded):
+    return JSONResponse(status_code=500, content={"detail": str(exc)})
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
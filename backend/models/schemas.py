@@ -25,6 +25,7 @@ class FighterStats(BaseModel):
     submission_wins: int
     decision_wins: int
     avg_fight_duration_secs: float
+    elo_rating: Optional[float] = None
 
     class Config:
         from_attributes = True
@@ -144,6 +145,53 @@ class BettingValueResponse(BaseModel):
     total_found: int
 
 
+class ParlayLeg(BaseModel):
+    """One leg of a parlay: a corner, or a corner and method (e.g. 'red_ko')"""
+    fight_id: int
+    selection: str
+
+
+class CardSimulationRequest(BaseModel):
+    """Request for a Monte Carlo simulation of a fight card"""
+    event_name: str
+    simulations: int = 100000
+    correlation: float = 0.0
+    seed: Optional[int] = None
+    parlays: List[List[ParlayLeg]] = []
+
+
+class FightOutcomeDistribution(BaseModel):
+    """Simulated outcome probabilities for one fight"""
+    fight_id: int
+    red_fighter_name: str
+    blue_fighter_name: str
+    red_win_probability: float
+    blue_win_probability: float
+    outcomes: dict
+    previous_meetings: int = 0
+
+
+class ParlayResult(BaseModel):
+    """Simulated probability and fair price of a parlay"""
+    legs: List[ParlayLeg]
+    probability: float
+    standard_error: float
+    fair_decimal_odds: Optional[float] = None
+    fair_american_odds: Optional[float] = None
+
+
+class CardSimulationResponse(BaseModel):
+    """Monte Carlo card simulation results"""
+    event_name: str
+    simulations: int
+    correlation: float
+    seed: Optional[int] = None
+    fights: List[FightOutcomeDistribution]
+    expected_favorites_won: float
+    favorites_won_distribution: List[float]
+    parlays: List[ParlayResult] = []
+
+
 class FighterSearchRequest(BaseModel):
     """Search fighters by name"""
     query: str
@@ -184,3 +232,7 @@ class UserProfile(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+# Resolve the forward reference to PredictionResponse
+HeadToHeadResponse.model_rebuild()
@@ -0,0 +1,317 @@
+"""
+Content-addressed stage cache for the data pipeline
+A pipeline is a list of named stages, each a function of earlier stages'
+outputs (and of input files) plus keyword parameters. A stage's cache key
+hashes its code, its parameters and the content hashes of its inputs, so a
+re-run only executes stages whose key changed; a stage that recomputes to
+identical output leaves everything downstream cached. Outputs are pickled
+DataFrames under the cache directory, one subdirectory per stage.
+"""
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+CACHE_DIR = Path(os.getenv("PIPELINE_CACHE_DIR", Path(__file__).parent.parent / "pipeline_cache"))
+
+# Cache entries kept per stage (older keys are deleted after a run writes a new one)
+ENTRIES_PER_STAGE = 4
+
+HASH_CHUNK_BYTES = 1 << 20
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def frame_hash(frame: pd.DataFrame) -> str:
+    """Content hash of a DataFrame: values, index, column names and dtypes"""
+    digest = hashlib.sha256()
+    digest.update(repr([(str(column), str(dtype)) for column, dtype in frame.dtypes.items()]).encode())
+    try:
+        digest.update(pd.util.hash_pandas_object(frame, index=True).values.tobytes())
+    except TypeError:
+        # Unhashable cell values (lists, dicts): fall back to the pickled bytes
+        digest.update(pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL))
+    return digest.hexdigest()
+
+
+def _source(code: object) -> str:
+    """Source of a function, class or module (its name when the source is unavailable)"""
+    try:
+        return inspect.getsource(code)
+    except (OSError, TypeError):
+        return getattr(code, '__qualname__', getattr(code, '__name__', repr(code)))
+
+
+class FileInput:
+    """A file a stage reads; its content hash is part of the stage key"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+    def fingerprint(self) -> str:
+        return file_hash(self.path) if self.path.exists() else "missing"
+
+    def __repr__(self) -> str:
+        return f"file:{self.path}"
+
+
+class Stage:
+    """
+    One named step: func(*inputs, **params) -> DataFrame
+    `inputs` are names of earlier stages or FileInputs, passed positionally
+    (file inputs as their Path). `target` marks a stage that writes that file
+    instead of returning a frame: it is called with the path after its inputs,
+    later stages that depend on it receive the path, and it is only cached
+    while the file still matches what it wrote. The code version is the hash
+    of func's source and of the source of `code_deps` - the modules (or
+    classes, functions) doing the work of a thin wrapper; bump `version` when
+    something else it calls changes.
+    """
+
+    def __init__(self, name: str, func: Callable, inputs: Sequence[Union[str, FileInput]] = (),
+                 params: Optional[dict] = None, version: str = "1", target: Optional[Path] = None,
+                 code_deps: Sequence[object] = ()):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.params = params or {}
+        self.version = version
+        self.target = Path(target) if target is not None else None
+        self.code_deps = list(code_deps)
+
+    def code_hash(self) -> str:
+        return _digest(*(_source(code) for code in [self.func, *self.code_deps]), self.version)
+
+    def params_hash(self) -> str:
+        return _digest(json.dumps(self.params, sort_keys=True, default=str))
+
+
+class StagePlan:
+    """What a run would do with one stage, and why"""
+
+    def __init__(self, stage: Stage, status: str, reason: str, key: Optional[str]):
+        self.stage = stage
+        self.status = status  # 'cached', 'run' or 'pending' (depends on a stage that runs)
+        self.reason = reason
+        self.key = key
+
+
+class Pipeline:
+    def __init__(self, stages: Iterable[Stage], cache_dir: Path = CACHE_DIR):
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage name: {stage.name}")
+            for dependency in stage.inputs:
+                if isinstance(dependency, str) and dependency not in self.stages:
+                    raise ValueError(f"Stage {stage.name} depends on unknown or later stage {dependency}")
+            self.stages[stage.name] = stage
+        self.cache_dir = Path(cache_dir)
+
+    # Cache layout: <cache_dir>/<stage>/<key>.pkl with <key>.json metadata,
+    # and latest.json recording the key components of the last run
+
+    def _entry(self, stage: Stage, key: str) -> Tuple[Path, Path]:
+        directory = self.cache_dir / stage.name
+        return directory / f"{key}.pkl", directory / f"{key}.json"
+
+    def _read_json(self, path: Path) -> Optional[dict]:
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _cached(self, stage: Stage, key: str) -> Optional[dict]:
+        """Metadata of a usable cache entry for key, or None"""
+        data_path, meta_path = self._entry(stage, key)
+        meta = self._read_json(meta_path)
+        if meta is None:
+            return None
+        if stage.target is not None:
+            if not stage.target.exists() or file_hash(stage.target) != meta.get('target_hash'):
+                return None
+        elif not data_path.exists():
+            return None
+        return meta
+
+    def _components(self, stage: Stage, input_hashes: List[str]) -> dict:
+        return {
+            'code': stage.code_hash(),
+            'params': stage.params_hash(),
+            'inputs': input_hashes,
+            'target': str(stage.target) if stage.target is not None else None,
+        }
+
+    def _key(self, components: dict) -> str:
+        return _digest(json.dumps(components, sort_keys=True))
+
+    def _reason(self, stage: Stage, components: dict) -> str:
+        latest = self._read_json(self.cache_dir / stage.name / "latest.json")
+        if latest is None:
+            return "never run"
+        changed = [name for name in ('code', 'params', 'inputs', 'target') if latest.get(name) != components[name]]
+        if changed:
+            return f"{', '.join(changed)} changed"
+        if stage.target is not None:
+            return "target file missing or modified"
+        return "cache entry missing"
+
+    def _required(self, targets: Optional[Sequence[str]]) -> List[str]:
+        """Stage names needed for targets (all stages when None), in pipeline order"""
+        if not targets:
+            return list(self.stages)
+        needed = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage: {name}")
+            if name not in needed:
+                needed.add(name)
+                pending.extend(dep for dep in self.stages[name].inputs if isinstance(dep, str))
+        return [name for name in self.stages if name in needed]
+
+    def _input_hash(self, dependency, output_hashes: Dict[str, Optional[str]]) -> Optional[str]:
+        if isinstance(dependency, FileInput):
+            return dependency.fingerprint()
+        return output_hashes.get(dependency)
+
+    def plan(self, targets: Optional[Sequence[str]] = None, force: Sequence[str] = ()) -> List[StagePlan]:
+        """
+        Status of each required stage without running anything. Stages fed by
+        a stage that has to run are 'pending': whether they rerun depends on
+        whether that stage's output actually changes.
+        """
+        plans = []
+        output_hashes: Dict[str, Optional[str]] = {}
+        for name in self._required(targets):
+            stage = self.stages[name]
+            waiting = [dep for dep in stage.inputs if isinstance(dep, str) and output_hashes.get(dep) is None]
+            if waiting:
+                plans.append(StagePlan(stage, 'pending', f"after {', '.join(waiting)}", None))
+                output_hashes[name] = None
+                continue
+
+            components = self._components(stage, [self._input_hash(dep, output_hashes) for dep in stage.inputs])
+            key = self._key(components)
+            meta = None if name in force else self._cached(stage, key)
+            if meta is not None:
+                plans.append(StagePlan(stage, 'cached', "", key))
+                output_hashes[name] = meta['output_hash']
+            else:
+                reason = "forced" if name in force else self._reason(stage, components)
+                plans.append(StagePlan(stage, 'run', reason, key))
+                output_hashes[name] = None
+        return plans
+
+    def explain(self, targets: Optional[Sequence[str]] = None, force: Sequence[str] = ()) -> str:
+        lines = []
+        for plan in self.plan(targets, force):
+            key = plan.key[:12] if plan.key else "-"
+            detail = f"  ({plan.reason})" if plan.reason else ""
+            lines.append(f"{plan.stage.name:<20} {plan.status:<8} {key:<12}{detail}")
+        return "\n".join(lines)
+
+    def run(self, targets: Optional[Sequence[str]] = None, force: Sequence[str] = (),
+            verbose: bool = True) -> Dict[str, pd.DataFrame]:
+        """
+        Run the stages targets need, reusing cached outputs; returns the
+        outputs of the target stages (all stages when targets is None)
+        """
+        required = self._required(targets)
+        wanted = set(targets) if targets else set(required)
+        outputs: Dict[str, pd.DataFrame] = {}
+        output_hashes: Dict[str, str] = {}
+        keys: Dict[str, str] = {}
+
+        def load(name: str):
+            if name not in outputs:
+                data_path, _ = self._entry(self.stages[name], keys[name])
+                outputs[name] = pd.read_pickle(data_path)
+            return outputs[name]
+
+        for name in required:
+            stage = self.stages[name]
+            components = self._components(stage, [self._input_hash(dep, output_hashes) for dep in stage.inputs])
+            key = keys[name] = self._key(components)
+
+            meta = None if name in force else self._cached(stage, key)
+            if meta is not None:
+                output_hashes[name] = meta['output_hash']
+                if verbose:
+                    print(f"  {name:<20} cached")
+                continue
+
+            reason = "forced" if name in force else self._reason(stage, components)
+            args = [self._argument(dep, load) for dep in stage.inputs]
+            start = time.perf_counter()
+            if stage.target is not None:
+                stage.target.parent.mkdir(parents=True, exist_ok=True)
+                stage.func(*args, stage.target, **stage.params)
+                result = None
+                output_hash = file_hash(stage.target)
+            else:
+                result = stage.func(*args, **stage.params)
+                output_hash = frame_hash(result)
+            elapsed = time.perf_counter() - start
+
+            self._store(stage, key, components, result, output_hash, elapsed)
+            output_hashes[name] = output_hash
+            if result is not None:
+                outputs[name] = result
+            if verbose:
+                print(f"  {name:<20} ran in {elapsed:.2f}s ({reason})")
+
+        return {name: load(name) for name in required
+                if name in wanted and self.stages[name].target is None}
+
+    def _argument(self, dependency, load: Callable):
+        if isinstance(dependency, FileInput):
+            return dependency.path
+        upstream = self.stages[dependency]
+        return upstream.target if upstream.target is not None else load(dependency)
+
+    def _store(self, stage: Stage, key: str, components: dict, result: Optional[pd.DataFrame],
+               output_hash: str, elapsed: float):
+        data_path, meta_path = self._entry(stage, key)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+        if result is not None:
+            tmp_path = data_path.with_suffix(f".{os.getpid()}.tmp")
+            result.to_pickle(tmp_path)
+            os.replace(tmp_path, data_path)
+        meta = {
+            'output_hash': output_hash,
+            'seconds': round(elapsed, 4),
+            'created': time.time(),
+            'rows': None if result is None else len(result),
+        }
+        if stage.target is not None:
+            meta['target_hash'] = output_hash
+        meta_path.write_text(json.dumps(meta))
+        (data_path.parent / "latest.json").write_text(json.dumps(components))
+        self._prune(stage, keep=key)
+
+    def _prune(self, stage: Stage, keep: str):
+        entries = sorted((self.cache_dir / stage.name).glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        entries = [path for path in entries if path.name != "latest.json"]
+        for meta_path in entries[ENTRIES_PER_STAGE:]:
+            if meta_path.stem == keep:
+                continue
+            meta_path.unlink(missing_ok=True)
+            meta_path.with_suffix(".pkl").unlink(missing_ok=True)
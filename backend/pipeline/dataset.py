@@ -0,0 +1,383 @@
+"""
+Hive-partitioned fight datasets on local disk or an object store
+A dataset is Parquet files under <root>/<name>/year=<yyyy>/weight_class=<class>/
+plus a _manifest.json listing every partition with its row count and
+min/max fight date. Readers load the manifest and fetch only the partitions
+a filter can match (by partition value or date range), without listing the
+store, so "fights since 2024" reads a few files instead of the whole history.
+Partition files are named by their content hash: a rewrite uploads only the
+partitions that changed, then the manifest, then deletes what it replaced.
+
+Stores are a directory (or file:// URL), or s3://bucket/prefix through
+pyarrow's S3 filesystem. Set S3_ENDPOINT_URL to use an S3-compatible
+stand-in (MinIO, LocalStack) instead of AWS; credentials come from the
+usual AWS_* environment variables.
+
+Usage (from the backend directory):
+    python pipeline/dataset.py write ../ufc-master-raw.csv raw
+    python pipeline/dataset.py show raw --filter "Date>=2024-01-01"
+    python pipeline/dataset.py read raw --filter "Date>=2024-01-01" "weight_class==Lightweight" --output recent.csv
+"""
+import argparse
+import hashlib
+import io
+import json
+import operator
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import quote, urlparse
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.fs as pafs
+    import pyarrow.parquet as pq
+except ImportError:  # optional: partitioned datasets are unavailable without it
+    pa = None
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+DATASET_URL = os.getenv("DATASET_URL", str(Path(__file__).parent.parent / "datasets"))
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL", "")
+
+DATE_COLUMN = 'Date'
+PARTITION_KEYS = {
+    'year': lambda frame: pd.to_datetime(frame[DATE_COLUMN]).dt.year,
+    'weight_class': lambda frame: frame['WeightClass'],
+}
+PARTITION_BY = ('year', 'weight_class')
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+MANIFEST = '_manifest.json'
+# The frame's index is stored as this column and restored on read
+INDEX_COLUMN = '__index_level_0__'
+
+# Partitions fetched or uploaded concurrently (object store requests are latency bound)
+IO_THREADS = 8
+
+OPERATORS = {
+    '==': operator.eq, '!=': operator.ne, '<': operator.lt, '<=': operator.le,
+    '>': operator.gt, '>=': operator.ge, 'in': lambda series, values: series.isin(values),
+}
+FILTER_PATTERN = re.compile(r"^\s*(\w+)\s*(==|!=|>=|<=|>|<|\bin\b)\s*(.+?)\s*$")
+
+Filter = Tuple[str, str, object]
+
+
+class ObjectStore:
+    """Objects under '/'-separated keys below a root on a pyarrow filesystem"""
+
+    def __init__(self, filesystem, root: str):
+        self.filesystem = filesystem
+        self.root = root.rstrip('/')
+
+    @property
+    def local(self) -> bool:
+        return isinstance(self.filesystem, pafs.LocalFileSystem)
+
+    def _path(self, key: str) -> str:
+        return f"{self.root}/{key}"
+
+    def get(self, key: str) -> bytes:
+        with self.filesystem.open_input_stream(self._path(key)) as f:
+            return f.read()
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        if not self.local:
+            # An object store PUT is atomic on its own
+            with self.filesystem.open_output_stream(path) as f:
+                f.write(data)
+            return
+        self.filesystem.create_dir(path.rsplit('/', 1)[0], recursive=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with self.filesystem.open_output_stream(tmp_path) as f:
+            f.write(data)
+        self.filesystem.move(tmp_path, path)
+
+    def delete(self, key: str):
+        self.filesystem.delete_file(self._path(key))
+
+    def list(self, prefix: str) -> List[str]:
+        selector = pafs.FileSelector(self._path(prefix), recursive=True, allow_not_found=True)
+        return [info.path[len(self.root) + 1:] for info in self.filesystem.get_file_info(selector)
+                if info.type == pafs.FileType.File]
+
+    def __repr__(self) -> str:
+        return f"{self.filesystem.type_name}:{self.root}"
+
+
+def open_store(url: str = DATASET_URL) -> ObjectStore:
+    """A store for a directory, file:// or s3:// URL"""
+    if pa is None:
+        raise RuntimeError("Partitioned datasets require pyarrow")
+    url = str(url)
+    if url.startswith('s3://'):
+        options = {}
+        if S3_ENDPOINT_URL:
+            endpoint = urlparse(S3_ENDPOINT_URL)
+            options = {'endpoint_override': endpoint.netloc, 'scheme': endpoint.scheme or 'https'}
+        return ObjectStore(pafs.S3FileSystem(**options), url[len('s3://'):])
+    if url.startswith('file://'):
+        url = url[len('file://'):]
+    return ObjectStore(pafs.LocalFileSystem(), Path(url).resolve().as_posix())
+
+
+def _plain(value):
+    """A partition value as JSON (None for missing)"""
+    if pd.isna(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def partition_directory(values: Dict[str, object]) -> str:
+    return '/'.join(f"{key}={NULL_PARTITION if value is None else quote(str(value), safe=' ')}"
+                    for key, value in values.items())
+
+
+def write_dataset(frame: pd.DataFrame, store: ObjectStore, name: str,
+                  partition_by: Sequence[str] = PARTITION_BY) -> dict:
+    """Write frame as dataset `name` (replacing any previous version); returns the manifest"""
+    partition_by = list(partition_by)
+    values = pd.DataFrame({key: PARTITION_KEYS[key](frame) for key in partition_by}, index=frame.index)
+    dates = pd.to_datetime(frame[DATE_COLUMN])
+    # Converted once, so every file has the same schema (a column that is
+    # all-null in one partition keeps its type) and partitions are row takes
+    table = pa.Table.from_pandas(frame.rename_axis(INDEX_COLUMN), preserve_index=True)
+
+    existing = set(store.list(f"{name}/"))
+    partitions, uploads = [], {}
+    groups = values.groupby(partition_by, dropna=False, sort=True).indices
+    for group, positions in groups.items():
+        group = group if isinstance(group, tuple) else (group,)
+        part_values = {key: _plain(value) for key, value in zip(partition_by, group)}
+        buffer = io.BytesIO()
+        # Partitions are small, so the footer dominates their size: leave out the
+        # Arrow schema and column statistics (the manifest has what pruning needs)
+        pq.write_table(table.take(positions), buffer, store_schema=False, write_statistics=False)
+        data = buffer.getvalue()
+        digest = hashlib.sha256(data).hexdigest()
+        path = f"{partition_directory(part_values)}/part-{digest[:16]}.parquet"
+        if f"{name}/{path}" not in existing:
+            uploads[f"{name}/{path}"] = data
+
+        part_dates = dates.iloc[positions].dropna()
+        partitions.append({
+            'path': path,
+            'values': part_values,
+            'rows': len(positions),
+            'min_date': part_dates.min().strftime('%Y-%m-%d') if len(part_dates) else None,
+            'max_date': part_dates.max().strftime('%Y-%m-%d') if len(part_dates) else None,
+            'bytes': len(data),
+            'sha256': digest,
+        })
+
+    if uploads:
+        with ThreadPoolExecutor(max_workers=min(IO_THREADS, len(uploads))) as pool:
+            list(pool.map(lambda key: store.put(key, uploads[key]), uploads))
+
+    manifest = {
+        'name': name,
+        'format': 'parquet',
+        'partition_by': partition_by,
+        'date_column': DATE_COLUMN,
+        'rows': len(frame),
+        'dtypes': {str(column): str(dtype) for column, dtype in frame.dtypes.items()},
+        'version': hashlib.sha256("".join(p['sha256'] for p in partitions).encode()).hexdigest()[:16],
+        'partitions': partitions,
+    }
+    store.put(f"{name}/{MANIFEST}", json.dumps(manifest, indent=1).encode())
+
+    current = {f"{name}/{partition['path']}" for partition in partitions}
+    for key in existing:
+        if key.endswith('.parquet') and key not in current:
+            store.delete(key)
+    return manifest
+
+
+def load_manifest(store: ObjectStore, name: str) -> dict:
+    return json.loads(store.get(f"{name}/{MANIFEST}"))
+
+
+def parse_filter(text: str, columns: Optional[Iterable[str]] = None) -> Filter:
+    """
+    'Date>=2024-01-01', 'weight_class==Lightweight' or 'year in 2023,2024';
+    with `columns` (a manifest's), a filter on any other column is rejected
+    """
+    match = FILTER_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Cannot parse filter: {text!r}")
+    column, op, value = match.groups()
+    if columns is not None:
+        _check_column(column, columns)
+    return column, op, value.split(',') if op == 'in' else value
+
+
+def _check_column(column: str, columns: Iterable[str]):
+    known = set(columns) | set(PARTITION_KEYS)
+    if column not in known:
+        raise ValueError(f"Unknown filter column {column!r}")
+
+
+def _coerce(column: str, value, dtypes: Dict[str, str]):
+    """A filter value as the column's stored type (values parsed from text arrive as strings)"""
+    if isinstance(value, (list, tuple, set)):
+        return [_coerce(column, v, dtypes) for v in value]
+    if column == DATE_COLUMN:
+        return pd.Timestamp(value)
+    if column == 'year':
+        return int(value)
+    dtype = dtypes.get(column, 'object')
+    if not isinstance(value, str) or dtype == 'object':
+        return value
+    try:
+        if dtype == 'bool':
+            if value.lower() not in ('true', 'false'):
+                raise ValueError(value)
+            return value.lower() == 'true'
+        if pd.api.types.is_numeric_dtype(dtype):
+            return pd.to_numeric(value)
+        return pd.Series([value]).astype(dtype)[0]
+    except (TypeError, ValueError):
+        raise ValueError(f"Filter value {value!r} is not a valid {dtype} for {column}") from None
+
+
+def _may_match(low, high, op: str, value) -> bool:
+    """Whether some value in [low, high] can satisfy `op value` (missing values only satisfy !=, as in pandas)"""
+    if low is None:
+        return op == '!='
+    if op == 'in':
+        return any(low <= v <= high for v in value)
+    if op == '==':
+        return low <= value <= high
+    if op == '!=':
+        return not low == high == value
+    return {'<': low < value, '<=': low <= value, '>': high > value, '>=': high >= value}[op]
+
+
+def prune(manifest: dict, filters: Iterable[Filter]) -> List[dict]:
+    """Partitions that can hold rows matching every filter (ValueError for an unknown column or bad value)"""
+    filters = list(filters)
+    dtypes = manifest['dtypes']
+    for column, _, _ in filters:
+        _check_column(column, dtypes)
+    filters = [(column, op, _coerce(column, value, dtypes)) for column, op, value in filters]
+    date_column = manifest['date_column']
+    selected = []
+    for partition in manifest['partitions']:
+        keep = True
+        for column, op, value in filters:
+            if column in partition['values']:
+                partition_value = partition['values'][column]
+                keep = _may_match(partition_value, partition_value, op, value)
+            elif column == date_column:
+                low, high = partition['min_date'], partition['max_date']
+                if low is not None:
+                    low, high = pd.Timestamp(low), pd.Timestamp(high)
+                keep = _may_match(low, high, op, value)
+            if not keep:
+                break
+        if keep:
+            selected.append(partition)
+    return selected
+
+
+def _read_partition(store: ObjectStore, name: str, partition: dict, columns: Optional[List[str]]):
+    return pq.ParquetFile(pa.BufferReader(store.get(f"{name}/{partition['path']}"))).read(columns)
+
+
+def _source_columns(column: str) -> List[str]:
+    """Frame columns a filter on `column` is evaluated from"""
+    return {'year': [DATE_COLUMN], 'weight_class': ['WeightClass']}.get(column, [column])
+
+
+def read_dataset(store: ObjectStore, name: str, filters: Iterable[Filter] = (),
+                 columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Rows of dataset `name` matching every (column, op, value) filter, in
+    their original order and with their original index. Filters may use the
+    partition keys (year, weight_class) or any column; only partitions that
+    can match are fetched. `columns` limits the columns read.
+    """
+    manifest = load_manifest(store, name)
+    filters = list(filters)
+    selected = prune(manifest, filters)
+
+    read_columns = None
+    if columns is not None:
+        read_columns = [INDEX_COLUMN] + list(columns)
+        for column, _, _ in filters:
+            read_columns += [c for c in _source_columns(column) if c not in read_columns]
+
+    if not selected:
+        dtypes = manifest['dtypes']
+        return pd.DataFrame({column: pd.Series(dtype=dtypes[column]) for column in (columns or dtypes)})
+
+    with ThreadPoolExecutor(max_workers=min(IO_THREADS, len(selected))) as pool:
+        tables = list(pool.map(lambda partition: _read_partition(store, name, partition, read_columns), selected))
+    frame = pa.concat_tables(tables).to_pandas().set_index(INDEX_COLUMN).rename_axis(None).sort_index()
+    # Parquet nulls come back as None in string columns; read_csv gives NaN
+    for column in frame.columns[frame.dtypes == object]:
+        frame[column] = frame[column].where(frame[column].notna(), np.nan)
+
+    mask = pd.Series(True, index=frame.index)
+    for column, op, value in filters:
+        series = PARTITION_KEYS[column](frame) if column in PARTITION_KEYS else frame[column]
+        if column == manifest['date_column']:
+            series = pd.to_datetime(series)
+        mask &= OPERATORS[op](series, _coerce(column, value, manifest['dtypes']))
+    frame = frame[mask]
+    return frame if columns is None else frame[list(columns)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write, inspect or read a partitioned fight dataset")
+    parser.add_argument("command", choices=['write', 'show', 'read'])
+    parser.add_argument("args", nargs="+", help="write: <csv> <name>; show/read: <name>")
+    parser.add_argument("--store", default=DATASET_URL, help="Directory, file:// or s3://bucket/prefix")
+    parser.add_argument("--filter", nargs="+", default=[], help="e.g. Date>=2024-01-01 weight_class==Lightweight")
+    parser.add_argument("--columns", nargs="+")
+    parser.add_argument("--output", help="read: CSV to write (default: print a summary)")
+    args = parser.parse_args()
+
+    store = open_store(args.store)
+    manifest = load_manifest(store, args.args[0]) if args.command != 'write' else None
+    try:
+        filters = [parse_filter(text, manifest['dtypes'] if manifest else None) for text in args.filter]
+        selected = prune(manifest, filters) if manifest else []
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.command == 'write':
+        if len(args.args) != 2:
+            parser.error("write needs <csv> <name>")
+        csv_path, name = args.args
+        manifest = write_dataset(pd.read_csv(csv_path), store, name)
+        print(f"Wrote {manifest['rows']} rows in {len(manifest['partitions'])} partitions "
+              f"to {store}/{name} (version {manifest['version']})")
+    elif args.command == 'show':
+        print(f"{manifest['name']} {manifest['version']}: {manifest['rows']} rows, "
+              f"{len(manifest['partitions'])} partitions by {', '.join(manifest['partition_by'])}")
+        if filters:
+            rows = sum(partition['rows'] for partition in selected)
+            print(f"Filter reads {len(selected)} partitions ({rows} rows)")
+        print(f"{'partition':<52} {'rows':>6} {'from':>11} {'to':>11} {'KiB':>8}")
+        for partition in selected:
+            print(f"{partition_directory(partition['values']):<52} {partition['rows']:>6} "
+                  f"{partition['min_date'] or '-':>11} {partition['max_date'] or '-':>11} "
+                  f"{partition['bytes'] / 1024:>8.1f}")
+    else:
+        frame = read_dataset(store, args.args[0], filters, args.columns)
+        if args.output:
+            frame.to_csv(args.output, index=False)
+            print(f"Wrote {len(frame)} rows to {args.output}")
+        else:
+            print(f"{len(frame)} rows, {len(frame.columns)} columns")
+            if DATE_COLUMN in frame and len(frame):
+                print(f"{pd.to_datetime(frame[DATE_COLUMN]).min():%Y-%m-%d} to "
+                      f"{pd.to_datetime(frame[DATE_COLUMN]).max():%Y-%m-%d}")
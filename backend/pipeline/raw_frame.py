@@ -0,0 +1,124 @@
+"""
+Typed, compact loader for the raw fight CSV (ufc-master-raw.csv)
+pd.read_csv's defaults keep every string as a Python object and every number
+as 64-bit; this loader reads the same file into:
+    category          repeated strings (fighters, dates, locations, stances, ...)
+    Sparse[float32]   the per-division R*Rank / B*Rank columns, which are mostly empty
+    int8/16/32        integer columns, downcast to the smallest type that holds them
+    float32           float columns whose values survive the round trip exactly
+                      (anything else stays float64, so no value changes)
+expand() turns a compact frame back into read_csv's dtypes, which is what
+gets written out, so outputs are identical to working on the default frame.
+Integer columns are narrow: widen them before arithmetic that can overflow.
+
+Usage (from the backend directory):
+    python pipeline/raw_frame.py ../ufc-master-raw.csv
+"""
+import argparse
+import re
+import sys
+from pathlib import Path
+from typing import Callable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+CATEGORY_COLUMNS = [
+    'RedFighter', 'BlueFighter', 'Date', 'Location', 'Country', 'Winner', 'WeightClass', 'Gender',
+    'BlueStance', 'RedStance', 'BetterRank', 'Finish', 'FinishDetails', 'FinishRoundTime',
+]
+BOOL_COLUMNS = ['TitleBout']
+RANK_PATTERN = re.compile(r"^[RB]\w+Rank$")
+
+RANK_DTYPE = pd.SparseDtype(np.float32, np.nan)
+
+
+def is_rank_column(column: str) -> bool:
+    return bool(RANK_PATTERN.match(column)) and column not in CATEGORY_COLUMNS
+
+
+def _downcast(series: pd.Series) -> pd.Series:
+    """Smallest dtype that represents every value of a numeric column exactly"""
+    if series.dtype.kind in 'iu':
+        return pd.to_numeric(series, downcast='integer')
+    if series.dtype == np.float64:
+        narrow = series.astype(np.float32)
+        if np.array_equal(narrow.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True):
+            return narrow
+    return series
+
+
+def load_raw_frame(path: Union[str, Path], usecols: Optional[Union[Sequence[str], Callable]] = None) -> pd.DataFrame:
+    """Read the raw CSV into compact dtypes (see the module docstring)"""
+    header = pd.read_csv(path, nrows=0).columns
+    dtypes = {column: 'category' for column in CATEGORY_COLUMNS if column in header}
+    dtypes.update({column: bool for column in BOOL_COLUMNS if column in header})
+    frame = pd.read_csv(path, usecols=usecols, dtype=dtypes)
+
+    for column in frame.columns:
+        if is_rank_column(column):
+            frame[column] = frame[column].astype(np.float32).astype(RANK_DTYPE)
+        elif frame[column].dtype.kind in 'iuf':
+            frame[column] = _downcast(frame[column])
+    return frame
+
+
+def expand(frame: pd.DataFrame) -> pd.DataFrame:
+    """The frame with read_csv's default dtypes (object strings, dense 64-bit numbers)"""
+    columns = {}
+    for column in frame.columns:
+        series = frame[column]
+        if isinstance(series.dtype, pd.SparseDtype):
+            series = series.sparse.to_dense().astype(np.float64)
+        elif isinstance(series.dtype, pd.CategoricalDtype):
+            # object for strings; datetime64 for a parsed date column (to_datetime keeps it categorical)
+            series = series.astype(series.cat.categories.dtype)
+        elif series.dtype.kind in 'iu':
+            series = series.astype(np.int64)
+        elif series.dtype == np.float32:
+            series = series.astype(np.float64)
+        columns[column] = series
+    return pd.DataFrame(columns, index=frame.index)
+
+
+def fill_missing(series: pd.Series, value) -> pd.Series:
+    """fillna that also works on categorical columns (adds `value` as a category)"""
+    if isinstance(series.dtype, pd.CategoricalDtype) and value not in series.cat.categories:
+        series = series.cat.add_categories([value])
+    return series.fillna(value)
+
+
+def memory_report(default: pd.DataFrame, compact: pd.DataFrame) -> pd.DataFrame:
+    """Bytes per column (deep) before and after, largest saving first"""
+    before = default.memory_usage(deep=True, index=False)
+    after = compact.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'default_dtype': default.dtypes.astype(str),
+        'compact_dtype': compact.dtypes.astype(str),
+        'default_bytes': before,
+        'compact_bytes': after,
+    })
+    report['saved_bytes'] = report['default_bytes'] - report['compact_bytes']
+    return report.sort_values('saved_bytes', ascending=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-column memory of the raw CSV: default vs compact dtypes")
+    parser.add_argument("csv_path")
+    parser.add_argument("--top", type=int, default=30, help="Columns to list (0 = all)")
+    args = parser.parse_args()
+
+    default = pd.read_csv(args.csv_path)
+    compact = load_raw_frame(args.csv_path)
+    report = memory_report(default, compact)
+
+    rows = report if not args.top else report.head(args.top)
+    print(f"{'column':<28} {'default':>10} {'compact':>16} {'before KiB':>11} {'after KiB':>10}")
+    for column, row in rows.iterrows():
+        print(f"{column:<28} {row.default_dtype:>10} {row.compact_dtype:>16} "
+              f"{row.default_bytes / 1024:>11.1f} {row.compact_bytes / 1024:>10.1f}")
+    total_before, total_after = report['default_bytes'].sum(), report['compact_bytes'].sum()
+    print(f"\n{len(report)} columns: {total_before / 2 ** 20:.2f} MiB -> {total_after / 2 ** 20:.2f} MiB "
+          f"({total_before / total_after:.1f}x smaller)")
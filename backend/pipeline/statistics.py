@@ -0,0 +1,277 @@
+"""
+Mergeable, persisted column statistics for odds imputation and scaling
+Each odds column keeps a count, null count, exact min/max and a quantile
+sketch. Summaries are fitted one chunk at a time and merge with each other,
+so a file is never loaded whole, partitions can be fitted separately, and
+new rows are folded into stored statistics instead of refitting history.
+The fitted statistics are saved as JSON with a version hash of their
+content; imputation (median) and min-max scaling are applied from that file,
+so the pipeline and anything scoring new rows transform odds identically.
+
+Usage (from the backend directory):
+    python pipeline/statistics.py fit ../ufc-master-raw.csv
+    python pipeline/statistics.py update new-card.csv
+    python pipeline/statistics.py show
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+STATISTICS_PATH = Path(os.getenv("ODDS_STATISTICS_PATH", Path(__file__).parent.parent / "statistics" / "odds.json"))
+
+ODDS_COLUMNS = ['RedOdds', 'BlueOdds', 'RedExpectedValue', 'BlueExpectedValue', 'RSubOdds', 'BSubOdds',
+                'RKOOdds', 'BKOOdds', 'RedDecOdds', 'BlueDecOdds']
+
+# Values held per sketch level; quantiles are exact until a column has more
+# non-null values than this, then accurate to roughly one part in SKETCH_CAPACITY
+SKETCH_CAPACITY = 8192
+
+FIT_CHUNK_ROWS = 100_000
+
+
+class QuantileSketch:
+    """
+    Deterministic KLL-style sketch: level h holds values of weight 2**h. A
+    level over capacity is sorted and every other value (alternating the
+    starting offset) is promoted to the next level, so memory stays
+    O(capacity * log(n / capacity)) and two sketches merge by concatenating
+    their levels. The same inputs in the same order give the same sketch.
+    """
+
+    def __init__(self, capacity: int = SKETCH_CAPACITY):
+        self.capacity = capacity
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self.offsets: List[int] = [0]
+
+    @property
+    def count(self) -> int:
+        return int(sum(len(level) << height for height, level in enumerate(self.levels)))
+
+    def update(self, values: np.ndarray):
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype=np.float64)])
+        self._compact()
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+            self.offsets.append(0)
+        for height, level in enumerate(other.levels):
+            self.levels[height] = np.concatenate([self.levels[height], level])
+        self._compact()
+        return self
+
+    def _compact(self):
+        height = 0
+        while height < len(self.levels):
+            level = self.levels[height]
+            if len(level) > self.capacity:
+                level = np.sort(level)
+                # An odd value out stays behind so the total weight is preserved
+                kept, paired = (level[:1], level[1:]) if len(level) % 2 else (level[:0], level)
+                promoted = paired[self.offsets[height]::2]
+                self.offsets[height] ^= 1
+                self.levels[height] = kept
+                if height + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                    self.offsets.append(0)
+                self.levels[height + 1] = np.concatenate([self.levels[height + 1], promoted])
+            height += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Linearly interpolated quantile (numpy's default method when the sketch is exact)"""
+        if not any(len(level) for level in self.levels):
+            return None
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 1 << height) for height, level in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        values, cumulative = values[order], np.cumsum(weights[order])
+
+        position = q * (cumulative[-1] - 1)
+        low = int(np.floor(position))
+        fraction = position - low
+        lower = values[np.searchsorted(cumulative, low, side='right')]
+        if not fraction:
+            return float(lower)
+        upper = values[np.searchsorted(cumulative, low + 1, side='right')]
+        if fraction == 0.5:
+            # Same arithmetic as median(): mean of the two middle values
+            return float((lower + upper) / 2)
+        return float(lower + (upper - lower) * fraction)
+
+    def to_dict(self) -> dict:
+        return {'capacity': self.capacity, 'offsets': self.offsets, 'levels': [level.tolist() for level in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketch":
+        sketch = cls(data['capacity'])
+        sketch.levels = [np.asarray(level, dtype=np.float64) for level in data['levels']]
+        sketch.offsets = list(data['offsets'])
+        return sketch
+
+
+class ColumnSummary:
+    def __init__(self, capacity: int = SKETCH_CAPACITY):
+        self.count = 0
+        self.nulls = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.sketch = QuantileSketch(capacity)
+
+    def update(self, column: pd.Series):
+        values = pd.to_numeric(column, errors='coerce').to_numpy(dtype=np.float64)
+        present = values[~np.isnan(values)]
+        self.nulls += len(values) - len(present)
+        if not len(present):
+            return
+        self.count += len(present)
+        low, high = float(present.min()), float(present.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        self.sketch.update(present)
+
+    def merge(self, other: "ColumnSummary") -> "ColumnSummary":
+        self.count += other.count
+        self.nulls += other.nulls
+        for bound, pick in (('min', min), ('max', max)):
+            values = [v for v in (getattr(self, bound), getattr(other, bound)) if v is not None]
+            setattr(self, bound, pick(values) if values else None)
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def median(self) -> Optional[float]:
+        return self.sketch.quantile(0.5)
+
+    def to_dict(self) -> dict:
+        return {'count': self.count, 'nulls': self.nulls, 'min': self.min, 'max': self.max,
+                'sketch': self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ColumnSummary":
+        summary = cls()
+        summary.count, summary.nulls, summary.min, summary.max = data['count'], data['nulls'], data['min'], data['max']
+        summary.sketch = QuantileSketch.from_dict(data['sketch'])
+        return summary
+
+
+class OddsStatistics:
+    """Per-column summaries plus the median imputation and min-max scaling derived from them"""
+
+    def __init__(self, columns: Iterable[str] = ODDS_COLUMNS, capacity: int = SKETCH_CAPACITY):
+        self.summaries: Dict[str, ColumnSummary] = {column: ColumnSummary(capacity) for column in columns}
+
+    @property
+    def version(self) -> str:
+        """Content hash: equal statistics have equal versions"""
+        payload = json.dumps({column: summary.to_dict() for column, summary in self.summaries.items()},
+                             sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def update(self, frame: pd.DataFrame) -> "OddsStatistics":
+        for column, summary in self.summaries.items():
+            if column in frame:
+                summary.update(frame[column])
+        return self
+
+    def merge(self, other: "OddsStatistics") -> "OddsStatistics":
+        for column, summary in other.summaries.items():
+            if column in self.summaries:
+                self.summaries[column].merge(summary)
+            else:
+                self.summaries[column] = summary
+        return self
+
+    def impute(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Missing odds filled with the column medians"""
+        frame = frame.copy()
+        medians = {column: summary.median for column, summary in self.summaries.items()
+                   if column in frame and summary.median is not None}
+        frame[list(medians)] = frame[list(medians)].fillna(medians)
+        return frame
+
+    def scale(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Odds min-max scaled to [0, 1], with MinMaxScaler's arithmetic"""
+        frame = frame.copy()
+        for column, summary in self.summaries.items():
+            if column not in frame or summary.min is None:
+                continue
+            data_range = summary.max - summary.min
+            scale = 1.0 / data_range if data_range else 1.0
+            values = frame[column].to_numpy(dtype=np.float64) * scale
+            values += -summary.min * scale
+            frame[column] = values
+        return frame
+
+    def save(self, path: Path = STATISTICS_PATH) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            'version': self.version,
+            'columns': {column: summary.to_dict() for column, summary in self.summaries.items()},
+        }
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path = STATISTICS_PATH) -> "OddsStatistics":
+        """Raises ValueError if the file's content does not match its version"""
+        data = json.loads(Path(path).read_text())
+        statistics = cls(columns=())
+        statistics.summaries = {column: ColumnSummary.from_dict(summary) for column, summary in data['columns'].items()}
+        if statistics.version != data['version']:
+            raise ValueError(f"{path}: statistics do not match version {data['version']}")
+        return statistics
+
+
+def fit_csv(path: Path, columns: Iterable[str] = ODDS_COLUMNS, chunk_rows: int = FIT_CHUNK_ROWS,
+            capacity: int = SKETCH_CAPACITY) -> OddsStatistics:
+    """Statistics of one CSV, read chunk by chunk and only for the odds columns"""
+    columns = list(columns)
+    statistics = OddsStatistics(columns, capacity)
+    for chunk in pd.read_csv(path, usecols=lambda column: column in columns, chunksize=chunk_rows):
+        statistics.update(chunk)
+    return statistics
+
+
+def fit_partitions(paths: Iterable[Path], **kwargs) -> OddsStatistics:
+    """Fit each file separately and merge the results, in the order given"""
+    statistics = None
+    for path in paths:
+        fitted = fit_csv(path, **kwargs)
+        statistics = fitted if statistics is None else statistics.merge(fitted)
+    return statistics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit, update or inspect the odds statistics")
+    parser.add_argument("command", choices=['fit', 'update', 'show'])
+    parser.add_argument("csv_paths", nargs="*")
+    parser.add_argument("--output", default=str(STATISTICS_PATH))
+    args = parser.parse_args()
+
+    output = Path(args.output)
+    if args.command in ('fit', 'update'):
+        if not args.csv_paths:
+            parser.error(f"{args.command} needs at least one CSV")
+        statistics = fit_partitions(Path(p) for p in args.csv_paths)
+        if args.command == 'update':
+            statistics = OddsStatistics.load(output).merge(statistics)
+        print(f"Saved statistics {statistics.version} to {statistics.save(output)}")
+
+    statistics = OddsStatistics.load(output)
+    print(f"version {statistics.version}")
+    print(f"{'column':<18} {'count':>8} {'nulls':>7} {'min':>10} {'median':>10} {'max':>10}")
+    for column, summary in statistics.summaries.items():
+        print(f"{column:<18} {summary.count:>8} {summary.nulls:>7} {summary.min or 0:>10.2f} "
+              f"{summary.median or 0:>10.2f} {summary.max or 0:>10.2f}")
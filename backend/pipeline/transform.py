@@ -0,0 +1,165 @@
+"""
+The raw-to-transformed fight CSV pipeline (datapipeline.ipynb) as cached stages
+    load_raw -> fill_odds -> parse_date -> time_to_seconds -> scale_odds
+    -> win_percentage -> save
+with odds_statistics (pipeline/statistics.py) fitted from the raw file in
+chunks and feeding both fill_odds and scale_odds. raw_dataset and
+transformed_dataset publish the loaded and the transformed frames as
+partitioned datasets (pipeline/dataset.py), and serving_database loads the
+saved CSV and builds the read-only serving SQLite file from it
+(database/serving.py). Only stages whose code,
+parameters or inputs changed are re-run; the rest come from the stage
+cache (pipeline/dag.py).
+
+Usage (from the backend directory):
+    python pipeline/transform.py --explain
+    python pipeline/transform.py
+    python pipeline/transform.py --force scale_odds
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database import entity_resolution, migrate_csv_to_db, serving, validation
+from database.entity_resolution import ALIASES_PATH, AliasMap, load_aliases
+from database.migrate_csv_to_db import migrate_csv_data
+from database.schema import Base
+from database.serving import SERVING_PATH, build_serving_database
+from pipeline import dataset, raw_frame, statistics
+from pipeline.dag import CACHE_DIR, FileInput, Pipeline, Stage
+from pipeline.dataset import DATASET_URL, open_store, write_dataset
+from pipeline.raw_frame import expand, fill_missing, load_raw_frame
+from pipeline.statistics import FIT_CHUNK_ROWS, ODDS_COLUMNS, STATISTICS_PATH, OddsStatistics, fit_csv
+
+ROOT_DIR = Path(__file__).parent.parent.parent
+RAW_CSV = ROOT_DIR / "ufc-master-raw.csv"
+TRANSFORMED_CSV = ROOT_DIR / "ufc-master-transformed.csv"
+
+
+def load_raw(path: Path) -> pd.DataFrame:
+    """Compact dtypes (pipeline/raw_frame.py) for every stage downstream"""
+    return load_raw_frame(path)
+
+
+def odds_statistics(raw_path: Path, path: Path, odds_columns: list, chunk_rows: int):
+    fit_csv(raw_path, odds_columns, chunk_rows).save(path)
+
+
+def fill_odds(df: pd.DataFrame, statistics_path: Path, finish_details_default: str) -> pd.DataFrame:
+    """Missing odds -> stored column median, missing FinishDetails -> a placeholder"""
+    df = OddsStatistics.load(statistics_path).impute(df)
+    df['FinishDetails'] = fill_missing(df['FinishDetails'], finish_details_default)
+    return df
+
+
+def parse_date(df: pd.DataFrame, date_format: str) -> pd.DataFrame:
+    df = df.copy()
+    df['Date'] = pd.to_datetime(df['Date'], format=date_format)
+    return df
+
+
+def time_to_seconds(df: pd.DataFrame, round_seconds: int) -> pd.DataFrame:
+    """FinishRoundTime (MM:SS) in seconds, and the total fight duration"""
+    df = df.copy()
+    parts = df['FinishRoundTime'].str.split(':', expand=True).astype(float)
+    df['FinishRoundTimeSecs'] = parts[0] * 60 + parts[1]
+    df['TotalFightDurationSecs'] = ((df['FinishRound'] - 1) * round_seconds) + df['FinishRoundTimeSecs']
+    return df
+
+
+def scale_odds(df: pd.DataFrame, statistics_path: Path) -> pd.DataFrame:
+    """Odds min-max scaled with the stored statistics"""
+    return OddsStatistics.load(statistics_path).scale(df)
+
+
+def win_percentage(df: pd.DataFrame) -> pd.DataFrame:
+    """Running win percentage of each fighter per corner (0 before their first fight)"""
+    df = df.copy()
+    df['RedWin'] = df['Winner'] == 'Red'
+    df['BlueWin'] = df['Winner'] == 'Blue'
+    red, blue = df.groupby('RedFighter', observed=True), df.groupby('BlueFighter', observed=True)
+    df['RedWinPercentage'] = red['RedWin'].cumsum() / red.cumcount()
+    df['BlueWinPercentage'] = blue['BlueWin'].cumsum() / blue.cumcount()
+    df['RedWinPercentage'] = df['RedWinPercentage'].fillna(0)
+    df['BlueWinPercentage'] = df['BlueWinPercentage'].fillna(0)
+    return df
+
+
+def save(df: pd.DataFrame, path: Path):
+    """Written with read_csv's default dtypes, as the notebook wrote it"""
+    expand(df).to_csv(path, index=False)
+
+
+def publish_dataset(df: pd.DataFrame, path: Path, store_url: str, name: str):
+    """Partitioned dataset `name` in the store; path keeps a copy of its manifest"""
+    manifest = write_dataset(expand(df), open_store(store_url), name)
+    path.write_text(json.dumps(manifest, indent=1))
+
+
+def serving_database(csv_path: Path, aliases_path: Path, path: Path):
+    """The saved CSV loaded into a scratch SQLite database, then copied into the serving artifact"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source_url = f"sqlite:///{Path(tmp) / 'load.db'}"
+        engine = create_engine(source_url)
+        try:
+            Base.metadata.create_all(bind=engine)
+            migrate_csv_data(str(csv_path), aliases=AliasMap(load_aliases(aliases_path)), bind=engine)
+        finally:
+            engine.dispose()
+        build_serving_database(source_url, path)
+
+
+def build_pipeline(raw_csv: Path = RAW_CSV, output: Path = TRANSFORMED_CSV, cache_dir: Path = CACHE_DIR,
+                   statistics_path: Path = STATISTICS_PATH, dataset_url: str = DATASET_URL,
+                   serving_path: Path = SERVING_PATH, aliases_path: Path = ALIASES_PATH) -> Pipeline:
+    manifests = Path(cache_dir) / "datasets"
+    return Pipeline([
+        Stage('load_raw', load_raw, [FileInput(raw_csv)], code_deps=[raw_frame]),
+        Stage('odds_statistics', odds_statistics, [FileInput(raw_csv)], target=statistics_path,
+              params={'odds_columns': ODDS_COLUMNS, 'chunk_rows': FIT_CHUNK_ROWS}, code_deps=[statistics]),
+        Stage('fill_odds', fill_odds, ['load_raw', 'odds_statistics'],
+              params={'finish_details_default': 'Unknown'}, code_deps=[raw_frame, statistics]),
+        Stage('parse_date', parse_date, ['fill_odds'], params={'date_format': '%Y-%m-%d'}),
+        Stage('time_to_seconds', time_to_seconds, ['parse_date'], params={'round_seconds': 300}),
+        Stage('scale_odds', scale_odds, ['time_to_seconds', 'odds_statistics'], code_deps=[statistics]),
+        Stage('win_percentage', win_percentage, ['scale_odds']),
+        Stage('save', save, ['win_percentage'], target=output, code_deps=[raw_frame]),
+        Stage('raw_dataset', publish_dataset, ['load_raw'], target=manifests / "raw.json",
+              params={'store_url': dataset_url, 'name': 'raw'}, code_deps=[raw_frame, dataset]),
+        Stage('transformed_dataset', publish_dataset, ['win_percentage'], target=manifests / "transformed.json",
+              params={'store_url': dataset_url, 'name': 'transformed'}, code_deps=[raw_frame, dataset]),
+        Stage('serving_database', serving_database, ['save', FileInput(aliases_path)], target=serving_path,
+              code_deps=[migrate_csv_to_db, validation, entity_resolution, serving]),
+    ], cache_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the fight CSV transformation with stage caching")
+    parser.add_argument("--raw", default=str(RAW_CSV))
+    parser.add_argument("--output", default=str(TRANSFORMED_CSV))
+    parser.add_argument("--cache-dir", default=str(CACHE_DIR))
+    parser.add_argument("--statistics", default=str(STATISTICS_PATH))
+    parser.add_argument("--datasets", default=DATASET_URL, help="Directory, file:// or s3:// URL for the partitioned datasets")
+    parser.add_argument("--serving", default=str(SERVING_PATH), help="Read-only serving SQLite file to build")
+    parser.add_argument("--aliases", default=str(ALIASES_PATH))
+    parser.add_argument("--target", nargs="+", help="Stages to bring up to date (default: all)")
+    parser.add_argument("--force", nargs="+", default=[], help="Stages to re-run even if cached")
+    parser.add_argument("--explain", action="store_true", help="Show what would be recomputed, and why, then exit")
+    args = parser.parse_args()
+
+    pipeline = build_pipeline(Path(args.raw), Path(args.output), Path(args.cache_dir), Path(args.statistics),
+                              args.datasets, Path(args.serving), Path(args.aliases))
+    if args.explain:
+        print(pipeline.explain(args.target, args.force))
+    else:
+        start = time.perf_counter()
+        pipeline.run(args.target, args.force)
+        print(f"Done in {time.perf_counter() - start:.2f}s")
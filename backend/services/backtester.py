@@ -0,0 +1,380 @@
+"""
+Walk-forward betting backtester over historical odds
+Replays the fight history in date order, prices every fight with only the
+information available before it, and measures what the value-bet rules in
+find_betting_value / _get_betting_recommendation would have returned
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from pipeline.dataset import open_store, parse_filter, read_dataset
+from services.ml_predictor import CONFIDENCE_TIERS, rule_based_red_probability
+from services.ratings import EloRatingEngine, expected_score
+
+HISTORY_COLUMNS = ['date', 'red', 'blue', 'winner', 'finish_method', 'red_odds', 'blue_odds']
+# Their source columns in the UFC master CSV
+MASTER_COLUMNS = ['Date', 'RedFighter', 'BlueFighter', 'Winner', 'Finish', 'RedOdds', 'BlueOdds']
+
+TIER_NAMES = ['avoid', 'low', 'moderate', 'high']
+
+# Worker-process copy of the features, set once by the pool initializer
+_worker_features: Optional[Dict[str, np.ndarray]] = None
+
+
+def load_history_from_csv(csv_path: str) -> pd.DataFrame:
+    """
+    Load fight history from a UFC master CSV
+    Use the raw CSV: the transformed one stores min-max scaled odds
+    """
+    return _history(pd.read_csv(csv_path, usecols=MASTER_COLUMNS))
+
+
+def load_history_from_dataset(store_url: str, name: str = 'raw', filters: Iterable[tuple] = ()) -> pd.DataFrame:
+    """
+    Load fight history from a partitioned dataset (pipeline/dataset.py):
+    only the history columns, and only partitions that can match `filters`
+    """
+    return _history(read_dataset(open_store(store_url), name, filters, MASTER_COLUMNS))
+
+
+def _history(df: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({
+        'date': pd.to_datetime(df['Date']),
+        'red': df['RedFighter'],
+        'blue': df['BlueFighter'],
+        'winner': df['Winner'],
+        'finish_method': df['Finish'],
+        'red_odds': df['RedOdds'],
+        'blue_odds': df['BlueOdds'],
+    })
+
+
+def load_history_from_db(db) -> pd.DataFrame:
+    """Load fight history from the fights table"""
+    from database.schema import Fight
+
+    rows = db.query(
+        Fight.date, Fight.red_fighter_id, Fight.blue_fighter_id, Fight.winner,
+        Fight.finish_method, Fight.red_odds, Fight.blue_odds
+    ).all()
+    return pd.DataFrame(rows, columns=HISTORY_COLUMNS)
+
+
+def american_to_decimal(odds: np.ndarray) -> np.ndarray:
+    """Convert American odds to decimal odds (stake included)"""
+    odds = np.asarray(odds, dtype=np.float64)
+    positive = odds > 0
+    decimal = np.empty_like(odds)
+    decimal[positive] = 1 + odds[positive] / 100
+    decimal[~positive] = 1 + 100 / np.abs(odds[~positive])
+    return decimal
+
+
+def implied_probabilities(odds: np.ndarray) -> np.ndarray:
+    """Array version of MLPredictor.odds_to_probability (vig included)"""
+    odds = np.asarray(odds, dtype=np.float64)
+    # Each branch only on its own values: np.where would also divide the other side's odds
+    positive = odds > 0
+    probability = np.empty_like(odds)
+    probability[positive] = 100 / (odds[positive] + 100)
+    favourite = np.abs(odds[~positive])
+    probability[~positive] = favourite / (favourite + 100)
+    return probability
+
+
+def vig_free_probabilities(red_odds: np.ndarray, blue_odds: np.ndarray):
+    """
+    Implied probabilities for both corners with the bookmaker margin removed
+    Returns (red_probability, blue_probability, overround)
+    """
+    red_implied = implied_probabilities(red_odds)
+    blue_implied = implied_probabilities(blue_odds)
+    overround = red_implied + blue_implied
+    return red_implied / overround, blue_implied / overround, overround
+
+
+def build_walk_forward_features(history: pd.DataFrame) -> pd.DataFrame:
+    """
+    Point-in-time predictor features for every fight with a result
+    Career stats, last-5 form and Elo only count fights strictly before each one
+    """
+    df = history[history['winner'].isin(['Red', 'Blue', 'Draw'])]
+    df = df.sort_values('date', kind='mergesort').reset_index(drop=True)
+    n = len(df)
+
+    codes, _ = pd.factorize(pd.concat([df['red'], df['blue']], ignore_index=True))
+    red_ids, blue_ids = codes[:n], codes[n:]
+
+    # Pre-fight Elo from a single chronological replay
+    red_scores = np.select([df['winner'] == 'Red', df['winner'] == 'Blue'], [1.0, 0.0], default=0.5)
+    snapshots = EloRatingEngine().replay_arrays(red_ids, blue_ids, red_scores)
+
+    # One row per (fighter, fight) so cumulative stats can be taken per fighter
+    method = df['finish_method'].fillna('').str.upper()
+    is_ko = method.str.contains('KO').to_numpy()
+    is_sub = (~method.str.contains('KO') & method.str.contains('SUB')).to_numpy()
+    red_won = (df['winner'] == 'Red').to_numpy()
+    blue_won = (df['winner'] == 'Blue').to_numpy()
+
+    long = pd.DataFrame({
+        'fight': np.concatenate([np.arange(n), np.arange(n)]),
+        'corner': np.repeat([0, 1], n),
+        'fighter': codes,
+        'won': np.concatenate([red_won, blue_won]).astype(np.int64),
+        'ko': np.concatenate([red_won & is_ko, blue_won & is_ko]).astype(np.int64),
+        'sub': np.concatenate([red_won & is_sub, blue_won & is_sub]).astype(np.int64),
+    }).sort_values(['fighter', 'fight'], kind='mergesort')
+
+    grouped = long.groupby('fighter', sort=False)
+    cum = grouped[['won', 'ko', 'sub']].cumsum()
+    prior_fights = grouped.cumcount().to_numpy()
+    prior_wins = (cum['won'] - long['won']).to_numpy()
+    prior_ko = (cum['ko'] - long['ko']).to_numpy()
+    prior_sub = (cum['sub'] - long['sub']).to_numpy()
+
+    # Wins in the previous five fights: difference of shifted cumulative wins
+    cum_wins = cum['won'].groupby(long['fighter'], sort=False)
+    last5_wins = (cum_wins.shift(1).fillna(0) - cum_wins.shift(6).fillna(0)).to_numpy()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        win_pct = np.where(prior_fights > 0, prior_wins / prior_fights * 100, 0.0)
+        ko_rate = np.where(prior_fights > 0, prior_ko / prior_fights * 100, 0.0)
+        sub_rate = np.where(prior_fights > 0, prior_sub / prior_fights * 100, 0.0)
+        form = np.where(prior_fights > 0, last5_wins / np.minimum(prior_fights, 5), 0.0)
+
+    per_corner = pd.DataFrame({
+        'fight': long['fight'].to_numpy(), 'corner': long['corner'].to_numpy(),
+        'win_percentage': win_pct, 'total_fights': prior_fights,
+        'ko_rate': ko_rate, 'sub_rate': sub_rate, 'recent_form': form,
+    }).sort_values(['corner', 'fight'])
+    red = per_corner[per_corner['corner'] == 0].reset_index(drop=True)
+    blue = per_corner[per_corner['corner'] == 1].reset_index(drop=True)
+
+    features = pd.DataFrame({
+        'date': df['date'],
+        'winner': df['winner'],
+        'red_odds': df['red_odds'].astype(np.float64),
+        'blue_odds': df['blue_odds'].astype(np.float64),
+        'red_recent_form': red['recent_form'],
+        'blue_recent_form': blue['recent_form'],
+        'red_ko_rate': red['ko_rate'],
+        'red_sub_rate': red['sub_rate'],
+        'blue_ko_rate': blue['ko_rate'],
+        'blue_sub_rate': blue['sub_rate'],
+        'win_percentage_diff': red['win_percentage'] - blue['win_percentage'],
+        'experience_diff': red['total_fights'] - blue['total_fights'],
+        'red_elo': snapshots[:, 0],
+        'blue_elo': snapshots[:, 1],
+    })
+    features['red_elo_win_probability'] = expected_score(features['red_elo'], features['blue_elo'])
+    features['red_model_probability'] = rule_based_red_probability(features)
+    return features
+
+
+def _features_to_arrays(features: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Reduce the feature frame to the arrays the simulation needs"""
+    red_odds = features['red_odds'].to_numpy(dtype=np.float64)
+    blue_odds = features['blue_odds'].to_numpy(dtype=np.float64)
+
+    # American odds are never inside (-100, 100); anything else is missing or scaled
+    valid = (np.abs(red_odds) >= 100) & (np.abs(blue_odds) >= 100)
+    red_odds = np.where(valid, red_odds, -100.0)
+    blue_odds = np.where(valid, blue_odds, -100.0)
+
+    red_market, blue_market, _ = vig_free_probabilities(red_odds, blue_odds)
+    red_model = features['red_model_probability'].to_numpy(dtype=np.float64)
+
+    return {
+        'valid': valid,
+        'red_model': red_model,
+        'red_market': red_market,
+        'blue_market': blue_market,
+        'red_decimal': american_to_decimal(red_odds),
+        'blue_decimal': american_to_decimal(blue_odds),
+        'winner': features['winner'].map({'Red': 0, 'Blue': 1}).fillna(2).to_numpy(dtype=np.int8),
+        'confidence': np.abs(2 * red_model - 1) * 100,
+    }
+
+
+def _confidence_tiers(confidence: np.ndarray) -> np.ndarray:
+    """Index into TIER_NAMES for each confidence score"""
+    return np.searchsorted(np.asarray(CONFIDENCE_TIERS), confidence, side='right')
+
+
+def simulate(
+    arrays: Dict[str, np.ndarray],
+    min_value_percentage: float = 5.0,
+    staking: str = 'flat',
+    kelly_fraction: float = 0.25,
+    flat_stake: float = 1.0,
+    initial_bankroll: float = 100.0,
+    tiers: Optional[Iterable[str]] = None
+) -> dict:
+    """
+    Run one backtest over precomputed arrays
+    Bets follow find_betting_value: back red if its edge clears the threshold,
+    otherwise blue. Draws are settled as a push. Flat staking stops once the
+    bankroll cannot cover a stake (bankrupt), so it never goes below zero.
+    """
+    red_model = arrays['red_model']
+    red_edge = (red_model - arrays['red_market']) * 100
+    blue_edge = ((1 - red_model) - arrays['blue_market']) * 100
+
+    bet_red = arrays['valid'] & (red_edge >= min_value_percentage)
+    bet_blue = arrays['valid'] & ~bet_red & (blue_edge >= min_value_percentage)
+
+    tier = _confidence_tiers(arrays['confidence'])
+    if tiers is not None:
+        allowed = np.isin(tier, [TIER_NAMES.index(name) for name in tiers])
+        bet_red &= allowed
+        bet_blue &= allowed
+
+    placed = bet_red | bet_blue
+    side = np.where(bet_red, 0, 1)[placed]
+    decimal = np.where(bet_red, arrays['red_decimal'], arrays['blue_decimal'])[placed]
+    probability = np.where(bet_red, red_model, 1 - red_model)[placed]
+    winner = arrays['winner'][placed]
+
+    won = winner == side
+    push = winner == 2
+    # Return per unit staked: +(decimal - 1) on a win, -1 on a loss, 0 on a push
+    unit_return = np.where(won, decimal - 1, np.where(push, 0.0, -1.0))
+
+    bankrupt = False
+    if staking == 'flat':
+        bankroll_before = initial_bankroll + np.concatenate([[0.0], np.cumsum(flat_stake * unit_return)[:-1]])
+        broke = bankroll_before < flat_stake
+        if broke.any():
+            # Everything from the first bet the bankroll cannot cover is never placed
+            bankrupt = True
+            kept = int(np.argmax(broke))
+            placed[np.flatnonzero(placed)[kept:]] = False
+            won, push, unit_return = won[:kept], push[:kept], unit_return[:kept]
+        stakes = np.full(len(unit_return), flat_stake)
+        profits = stakes * unit_return
+        equity = initial_bankroll + np.cumsum(profits)
+    elif staking == 'kelly':
+        b = decimal - 1
+        kelly = np.clip((b * probability - (1 - probability)) / b, 0, 1) * kelly_fraction
+        growth = np.cumprod(1 + kelly * unit_return)
+        bankroll_before = initial_bankroll * np.concatenate([[1.0], growth[:-1]])
+        stakes = kelly * bankroll_before
+        profits = stakes * unit_return
+        equity = initial_bankroll * growth
+    else:
+        raise ValueError(f"Unknown staking strategy '{staking}'")
+
+    total_staked = float(stakes.sum())
+    profit = float(profits.sum())
+    curve = np.concatenate([[initial_bankroll], equity])
+    peak = np.maximum.accumulate(curve)
+    drawdown = peak - curve
+    settled = int((~push).sum())
+
+    by_tier = {}
+    placed_tier = tier[placed]
+    for index, name in enumerate(TIER_NAMES):
+        in_tier = placed_tier == index
+        staked = float(stakes[in_tier].sum())
+        by_tier[name] = {
+            'bets': int(in_tier.sum()),
+            'profit': float(profits[in_tier].sum()),
+            'roi': float(profits[in_tier].sum()) / staked if staked else 0.0,
+        }
+
+    return {
+        'min_value_percentage': min_value_percentage,
+        'staking': staking,
+        'kelly_fraction': kelly_fraction if staking == 'kelly' else None,
+        'fights_evaluated': int(arrays['valid'].sum()),
+        'bets': int(placed.sum()),
+        'hit_rate': float(won.sum()) / settled if settled else 0.0,
+        'total_staked': total_staked,
+        'profit': profit,
+        'roi': profit / total_staked if total_staked else 0.0,
+        'final_bankroll': float(equity[-1]) if len(equity) else initial_bankroll,
+        'bankrupt': bankrupt,
+        'max_drawdown': float(drawdown.max()),
+        'max_drawdown_percentage': float((drawdown / peak).max()) * 100,
+        'by_tier': by_tier,
+    }
+
+
+def _init_worker(arrays: Dict[str, np.ndarray]):
+    global _worker_features
+    _worker_features = arrays
+
+
+def _simulate_in_worker(params: dict) -> dict:
+    return simulate(_worker_features, **params)
+
+
+def sweep(
+    features: pd.DataFrame,
+    thresholds: Iterable[float],
+    kelly_fractions: Iterable[float] = (),
+    include_flat: bool = True,
+    max_workers: Optional[int] = None
+) -> List[dict]:
+    """
+    Backtest every (threshold, staking) combination across a process pool
+    Features are shipped to each worker once, not once per task
+    """
+    arrays = _features_to_arrays(features)
+
+    grid = []
+    for threshold in thresholds:
+        if include_flat:
+            grid.append({'min_value_percentage': threshold, 'staking': 'flat'})
+        for fraction in kelly_fractions:
+            grid.append({'min_value_percentage': threshold, 'staking': 'kelly', 'kelly_fraction': fraction})
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(arrays,)) as pool:
+        return list(pool.map(_simulate_in_worker, grid))
+
+
+def run_backtest(features: pd.DataFrame, **params) -> dict:
+    """Single backtest in the current process"""
+    return simulate(_features_to_arrays(features), **params)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward betting backtest")
+    parser.add_argument("--csv", default="../ufc-master-raw.csv", help="UFC master CSV with American odds")
+    parser.add_argument("--dataset", help="Read the raw partitioned dataset from this store instead of --csv")
+    parser.add_argument("--filter", nargs="+", default=[],
+                        help="With --dataset: only these fights, e.g. Date>=2018-01-01 weight_class==Lightweight")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.0, 2.5, 5.0, 7.5, 10.0])
+    parser.add_argument("--kelly", type=float, nargs="*", default=[0.1, 0.25, 0.5])
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.dataset:
+        try:
+            history = load_history_from_dataset(args.dataset, filters=[parse_filter(text) for text in args.filter])
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        history = load_history_from_csv(args.csv)
+    features = build_walk_forward_features(history)
+    print(f"Walk-forward features for {len(features)} fights "
+          f"({features['date'].min():%Y-%m-%d} to {features['date'].max():%Y-%m-%d})")
+
+    results = sweep(features, args.thresholds, args.kelly, max_workers=args.workers)
+
+    print(f"\n{'edge%':>6} {'staking':>12} {'bets':>6} {'hit':>6} {'roi':>8} {'drawdown':>10} {'bankroll':>10}")
+    for result in results:
+        staking = result['staking'] if result['staking'] == 'flat' else f"kelly {result['kelly_fraction']}"
+        print(f"{result['min_value_percentage']:>6.1f} {staking:>12} {result['bets']:>6} "
+              f"{result['hit_rate']:>6.1%} {result['roi']:>8.1%} {result['max_drawdown_percentage']:>9.1f}% "
+              f"{result['final_bankroll']:>10.1f}")
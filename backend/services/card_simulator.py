@@ -0,0 +1,192 @@
+"""
+Monte Carlo simulator for whole fight cards and parlays
+"""
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.ml_predictor import MLPredictor
+
+# Outcome index order used by every simulation array
+OUTCOMES = ('red_ko', 'red_sub', 'red_dec', 'blue_ko', 'blue_sub', 'blue_dec')
+
+# Simulations drawn per chunk; bounds memory to a few arrays of chunk x fights
+DEFAULT_CHUNK_SIZE = 250_000
+
+# Parlay legs may pick a corner or a corner + method
+SELECTIONS = ('red', 'blue') + OUTCOMES
+
+
+class CardSimulator:
+    """
+    Draws complete card outcomes (winner + method for every fight)
+
+    Fights are independent unless `correlation` is set. Correlated draws use a
+    common shock: each fight reuses the simulation-wide uniform with probability
+    sqrt(correlation), so favourites tend to win (or lose) together while every
+    fight keeps its own marginal probabilities.
+    """
+
+    def __init__(
+        self,
+        fight_probabilities: Sequence[Dict[str, float]],
+        correlation: float = 0.0,
+        seed: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ):
+        if not fight_probabilities:
+            raise ValueError("A card needs at least one fight")
+        if not 0.0 <= correlation <= 1.0:
+            raise ValueError("correlation must be between 0 and 1")
+
+        probabilities = np.array(
+            [[fight[outcome] for outcome in OUTCOMES] for fight in fight_probabilities],
+            dtype=np.float64
+        )
+        if (probabilities < 0).any():
+            raise ValueError("Outcome probabilities must be non-negative")
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+
+        self.probabilities = probabilities
+        self.correlation = correlation
+        self.seed = seed
+        self.chunk_size = chunk_size
+
+        self.red_win = probabilities[:, :3].sum(axis=1)
+        self.favorite_is_red = self.red_win >= 0.5
+        self.favorite_win = np.where(self.favorite_is_red, self.red_win, 1 - self.red_win)
+
+        # Cumulative method split conditional on each corner winning
+        with np.errstate(divide='ignore', invalid='ignore'):
+            red_split = np.nan_to_num(probabilities[:, :3] / self.red_win[:, None], nan=1 / 3)
+            blue_split = np.nan_to_num(probabilities[:, 3:] / (1 - self.red_win)[:, None], nan=1 / 3)
+        self.red_method_cdf = np.cumsum(red_split, axis=1)[:, :2]
+        self.blue_method_cdf = np.cumsum(blue_split, axis=1)[:, :2]
+
+    @property
+    def fight_count(self) -> int:
+        return len(self.probabilities)
+
+    def _draw_chunk(self, rng: np.random.Generator, size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Simulate `size` cards
+        Returns (outcome index per fight, favourite-won mask), both (size, fights)
+        """
+        n = self.fight_count
+        u_win = rng.random((size, n), dtype=np.float32)
+
+        if self.correlation > 0:
+            common = rng.random((size, 1), dtype=np.float32)
+            shocked = rng.random((size, n), dtype=np.float32) < math.sqrt(self.correlation)
+            u_win = np.where(shocked, common, u_win)
+
+        favorite_won = u_win < self.favorite_win
+        red_won = favorite_won == self.favorite_is_red
+
+        u_method = rng.random((size, n), dtype=np.float32)[:, :, None]
+        method_cdf = np.where(red_won[:, :, None], self.red_method_cdf, self.blue_method_cdf)
+        method = (u_method > method_cdf).sum(axis=2)
+
+        outcome = np.where(red_won, 0, 3) + method
+        return outcome.astype(np.int8), favorite_won
+
+    @staticmethod
+    def _leg_mask(outcome: np.ndarray, fight_index: int, selection: str) -> np.ndarray:
+        column = outcome[:, fight_index]
+        if selection == 'red':
+            return column < 3
+        if selection == 'blue':
+            return column >= 3
+        return column == OUTCOMES.index(selection)
+
+    def validate_parlay(self, legs: Sequence[Tuple[int, str]]):
+        """Raise ValueError for legs that do not refer to a fight/selection on this card"""
+        if not legs:
+            raise ValueError("A parlay needs at least one leg")
+        for fight_index, selection in legs:
+            if not 0 <= fight_index < self.fight_count:
+                raise ValueError(f"Fight index {fight_index} is not on this card")
+            if selection not in SELECTIONS:
+                raise ValueError(f"Unknown selection '{selection}', expected one of {', '.join(SELECTIONS)}")
+
+    def run(self, simulations: int, parlays: Sequence[Sequence[Tuple[int, str]]] = ()) -> dict:
+        """
+        Run `simulations` card draws in chunks
+        Parlays are lists of (fight_index, selection) legs
+        """
+        for legs in parlays:
+            self.validate_parlay(legs)
+
+        rng = np.random.default_rng(self.seed)
+        n = self.fight_count
+        outcome_counts = np.zeros(n * len(OUTCOMES), dtype=np.int64)
+        favorite_counts = np.zeros(n + 1, dtype=np.int64)
+        parlay_hits = np.zeros(len(parlays), dtype=np.int64)
+        offsets = np.arange(n, dtype=np.int64) * len(OUTCOMES)
+
+        remaining = simulations
+        while remaining > 0:
+            size = min(self.chunk_size, remaining)
+            outcome, favorite_won = self._draw_chunk(rng, size)
+
+            outcome_counts += np.bincount((outcome + offsets).ravel(), minlength=len(outcome_counts))
+            favorite_counts += np.bincount(favorite_won.sum(axis=1), minlength=n + 1)
+
+            for index, legs in enumerate(parlays):
+                hit = np.ones(size, dtype=bool)
+                for fight_index, selection in legs:
+                    hit &= self._leg_mask(outcome, fight_index, selection)
+                parlay_hits[index] += int(hit.sum())
+
+            remaining -= size
+
+        outcome_probabilities = outcome_counts.reshape(n, len(OUTCOMES)) / simulations
+        favorite_distribution = favorite_counts / simulations
+
+        fights = []
+        for index in range(n):
+            fights.append({
+                'fight_index': index,
+                'red_win_probability': float(outcome_probabilities[index, :3].sum()),
+                'blue_win_probability': float(outcome_probabilities[index, 3:].sum()),
+                'outcomes': dict(zip(OUTCOMES, outcome_probabilities[index].tolist())),
+            })
+
+        parlay_results = []
+        for legs, hits in zip(parlays, parlay_hits.tolist()):
+            probability = hits / simulations
+            parlay_results.append({
+                'legs': [list(leg) for leg in legs],
+                'probability': probability,
+                'standard_error': math.sqrt(probability * (1 - probability) / simulations),
+                'fair_decimal_odds': 1 / probability if probability > 0 else None,
+                'fair_american_odds': (
+                    MLPredictor.probability_to_odds(probability) if 0 < probability < 1 else None
+                ),
+            })
+
+        return {
+            'simulations': simulations,
+            'correlation': self.correlation,
+            'seed': self.seed,
+            'fights': fights,
+            'favorites_won': {
+                'expected': float(np.dot(np.arange(n + 1), favorite_distribution)),
+                'distribution': favorite_distribution.tolist(),
+            },
+            'parlays': parlay_results,
+        }
+
+
+def card_probabilities(predictor: MLPredictor, fights: List, db) -> List[Dict[str, float]]:
+    """Per-fight outcome probabilities for Fight rows, taken from the predictor"""
+    probabilities = []
+    for fight in fights:
+        prediction = predictor.predict_fight(fight.red_fighter, fight.blue_fighter, db)
+        probabilities.append(predictor.predict_method_probabilities(
+            fight.red_fighter, fight.blue_fighter, prediction.red_win_probability
+        ))
+    return probabilities
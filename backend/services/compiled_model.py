@@ -0,0 +1,130 @@
+"""
+Dependency-light runtime for compiled prediction models
+Scores batches from plain NumPy arrays (see services/model_export.py) so
+workers never import scikit-learn or unpickle code at startup
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# Supported model kinds
+LINEAR = 'linear'
+FOREST = 'forest'
+BOOSTING = 'boosting'
+
+# Rows walked through the trees at once; keeps the (rows, trees) node arrays cache-sized
+TREE_BATCH_ROWS = 2048
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class CompiledModel:
+    """
+    Binary classifier evaluated from coefficient or flattened tree arrays
+
+    Trees are stored as one set of node arrays for the whole ensemble
+    (children, split feature, threshold, leaf value) with each tree's root
+    offset, so a batch walks every tree level-by-level with array indexing.
+    Leaf nodes are their own children, so max_depth steps always end on a leaf.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        version = int(arrays['format_version'])
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled model format {version}, expected {FORMAT_VERSION}")
+
+        self.kind = str(arrays['kind'])
+        self.feature_names: List[str] = [str(name) for name in arrays['feature_names']]
+        self.scaler_mean = arrays.get('scaler_mean')
+        self.scaler_scale = arrays.get('scaler_scale')
+
+        if self.kind == LINEAR:
+            self.coef = arrays['coef']
+            self.intercept = float(arrays['intercept'])
+        elif self.kind in (FOREST, BOOSTING):
+            self.left = arrays['left']
+            self.right = arrays['right']
+            self.feature = arrays['feature']
+            self.threshold = arrays['threshold']
+            self.leaf_value = arrays['leaf_value']
+            self.tree_roots = arrays['tree_roots']
+            self.max_depth = int(arrays['max_depth'])
+            self.learning_rate = float(arrays['learning_rate'])
+            self.baseline = float(arrays['baseline'])
+        else:
+            raise ValueError(f"Unknown compiled model kind '{self.kind}'")
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'CompiledModel':
+        """Load a compiled .npz model (no pickled objects are accepted)"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def save(self, path: Union[str, Path]):
+        """Write the model back out in the compiled format"""
+        arrays = {
+            'format_version': np.array(FORMAT_VERSION),
+            'kind': np.array(self.kind),
+            'feature_names': np.array(self.feature_names),
+        }
+        if self.scaler_mean is not None:
+            arrays['scaler_mean'] = self.scaler_mean
+            arrays['scaler_scale'] = self.scaler_scale
+        if self.kind == LINEAR:
+            arrays.update(coef=self.coef, intercept=np.array(self.intercept))
+        else:
+            arrays.update(
+                left=self.left, right=self.right, feature=self.feature, threshold=self.threshold,
+                leaf_value=self.leaf_value, tree_roots=self.tree_roots,
+                max_depth=np.array(self.max_depth), learning_rate=np.array(self.learning_rate),
+                baseline=np.array(self.baseline)
+            )
+        np.savez(path, **arrays)
+
+    def vectorize(self, features: Sequence[dict]) -> np.ndarray:
+        """Turn feature dicts (as built by MLPredictor._extract_features) into a matrix"""
+        return np.array(
+            [[row[name] for name in self.feature_names] for row in features],
+            dtype=np.float64
+        )
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Probability of the positive class (red corner wins) for each row"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        if self.scaler_mean is not None:
+            X = (X - self.scaler_mean) / self.scaler_scale
+
+        if self.kind == LINEAR:
+            return _sigmoid(X @ self.coef + self.intercept)
+
+        leaf_values = np.concatenate([
+            self._leaf_values(X[start:start + TREE_BATCH_ROWS])
+            for start in range(0, max(len(X), 1), TREE_BATCH_ROWS)
+        ])
+        if self.kind == FOREST:
+            return leaf_values.mean(axis=1)
+        return _sigmoid(self.baseline + self.learning_rate * leaf_values.sum(axis=1))
+
+    def _leaf_values(self, X: np.ndarray) -> np.ndarray:
+        """Walk every tree for every row; returns (rows, trees) leaf values"""
+        n_features = X.shape[1]
+        # sklearn trees compare float32 features (against float64 thresholds); a float64
+        # value just above a threshold can round down to it and go left there too
+        flat_X = X.astype(np.float32).ravel()
+        row_offsets = (np.arange(len(X)) * n_features)[:, None]
+        nodes = np.broadcast_to(self.tree_roots, (len(X), len(self.tree_roots))).copy()
+
+        for _ in range(self.max_depth):
+            go_left = flat_X[row_offsets + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return self.leaf_value[nodes]
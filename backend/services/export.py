@@ -0,0 +1,187 @@
+"""
+Bulk export of fights and fighters as NDJSON, CSV or Arrow
+Rows are read through a server-side cursor (stream_results + yield_per) and
+encoded one batch at a time, so memory stays flat regardless of how many
+rows are exported and the first bytes leave as soon as the first batch is read
+"""
+from __future__ import annotations
+
+import csv
+import io
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, exists, select
+from sqlalchemy.orm import aliased
+
+from database.config import get_read_sessionmaker
+from database.schema import Fight, Fighter, FighterFight
+from services.serialization import dumps
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: Arrow exports are unavailable without it
+    pa = None
+
+# Rows fetched from the cursor (and encoded) per batch
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+MEDIA_TYPES = {
+    'ndjson': "application/x-ndjson",
+    'csv': "text/csv",
+    'arrow': "application/vnd.apache.arrow.stream",
+}
+FILE_EXTENSIONS = {'ndjson': "ndjson", 'csv': "csv", 'arrow': "arrows"}
+
+_RedFighter = aliased(Fighter)
+_BlueFighter = aliased(Fighter)
+
+
+def fight_columns() -> Dict[str, object]:
+    """Exportable fight columns: every fights column plus both fighters' names"""
+    columns = {column.key: getattr(Fight, column.key) for column in Fight.__table__.columns}
+    columns['red_fighter_name'] = _RedFighter.name.label('red_fighter_name')
+    columns['blue_fighter_name'] = _BlueFighter.name.label('blue_fighter_name')
+    return columns
+
+
+def fighter_columns() -> Dict[str, object]:
+    return {column.key: getattr(Fighter, column.key) for column in Fighter.__table__.columns}
+
+
+def select_columns(available: Dict[str, object], requested: Optional[str]) -> List[str]:
+    """Column names from a comma-separated list (all columns when empty); ValueError for unknown names"""
+    if not requested:
+        return list(available)
+    names = [name.strip() for name in requested.split(",") if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    return list(dict.fromkeys(names))
+
+
+def _date_range(column, start_date: Optional[date], end_date: Optional[date]) -> list:
+    """Conditions on a fight date column for an inclusive [start_date, end_date] range"""
+    conditions = []
+    if start_date is not None:
+        conditions.append(column >= datetime.combine(start_date, time.min))
+    if end_date is not None:
+        conditions.append(column < datetime.combine(end_date + timedelta(days=1), time.min))
+    return conditions
+
+
+def fights_statement(names: Sequence[str], start_date: Optional[date] = None, end_date: Optional[date] = None):
+    available = fight_columns()
+    statement = select(*(available[name] for name in names)).select_from(Fight)
+    if 'red_fighter_name' in names:
+        statement = statement.join(_RedFighter, Fight.red_fighter_id == _RedFighter.id)
+    if 'blue_fighter_name' in names:
+        statement = statement.join(_BlueFighter, Fight.blue_fighter_id == _BlueFighter.id)
+    return statement.where(*_date_range(Fight.date, start_date, end_date)).order_by(Fight.id)
+
+
+def fighters_statement(names: Sequence[str], start_date: Optional[date] = None, end_date: Optional[date] = None):
+    """Fighters; with a date range, only those who fought within it"""
+    available = fighter_columns()
+    statement = select(*(available[name] for name in names))
+    conditions = _date_range(FighterFight.date, start_date, end_date)
+    if conditions:
+        statement = statement.where(exists().where(FighterFight.fighter_id == Fighter.id, *conditions))
+    return statement.order_by(Fighter.id)
+
+
+def stream_batches(statement, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[list]:
+    """
+    Row batches from a server-side cursor. The session is opened here rather
+    than taken from the request, because streaming outlives the route's dependencies.
+    """
+    db = get_read_sessionmaker()()
+    try:
+        result = db.execute(statement.execution_options(stream_results=True, yield_per=batch_size))
+        for batch in result.partitions():
+            yield batch
+    finally:
+        db.close()
+
+
+def encode_ndjson(names: Sequence[str], batches: Iterator[list]) -> Iterator[bytes]:
+    for batch in batches:
+        yield b"".join(dumps(dict(zip(names, row))) + b"\n" for row in batch)
+
+
+def _csv_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def encode_csv(names: Sequence[str], batches: Iterator[list]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(names)
+    yield buffer.getvalue().encode("utf-8")
+
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(value) for value in row] for row in batch)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def arrow_schema(names: Sequence[str], columns: Dict[str, object]):
+    def arrow_type(column):
+        sql_type = column.type
+        if isinstance(sql_type, Boolean):
+            return pa.bool_()
+        if isinstance(sql_type, Integer):
+            return pa.int64()
+        if isinstance(sql_type, Float):
+            return pa.float64()
+        if isinstance(sql_type, DateTime):
+            return pa.timestamp('us')
+        return pa.string()
+
+    return pa.schema([pa.field(name, arrow_type(columns[name])) for name in names])
+
+
+def encode_arrow(names: Sequence[str], batches: Iterator[list], schema) -> Iterator[bytes]:
+    """Arrow IPC stream: the schema message, then one record batch per cursor batch"""
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, schema)
+
+    def drain() -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    yield drain()
+    for batch in batches:
+        arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*batch), schema)]
+        writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+        yield drain()
+    writer.close()
+    yield drain()
+
+
+def export_stream(kind: str, fmt: str, columns: Optional[str] = None,
+                  start_date: Optional[date] = None, end_date: Optional[date] = None) -> Iterator[bytes]:
+    """
+    Encoded chunks of a 'fights' or 'fighters' export
+    Arguments are validated before anything is read: ValueError for unknown
+    columns or an empty date range, RuntimeError when Arrow is unavailable
+    """
+    available = fight_columns() if kind == 'fights' else fighter_columns()
+    names = select_columns(available, columns)
+    if start_date is not None and end_date is not None and start_date > end_date:
+        raise ValueError("start_date must not be after end_date")
+    if fmt == 'arrow' and pa is None:
+        raise RuntimeError("Arrow export requires pyarrow")
+
+    build_statement = fights_statement if kind == 'fights' else fighters_statement
+    batches = stream_batches(build_statement(names, start_date, end_date))
+
+    if fmt == 'arrow':
+        return encode_arrow(names, batches, arrow_schema(names, available))
+    if fmt == 'csv':
+        return encode_csv(names, batches)
+    return encode_ndjson(names, batches)
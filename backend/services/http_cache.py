@@ -0,0 +1,225 @@
+"""
+HTTP caching for heavy read endpoints: strong ETags, conditional GET and
+response compression
+ETags combine the dataset version with the request path and query, so a
+matching If-None-Match is answered with 304 before routing, i.e. without
+touching the database or serializing anything
+"""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import Optional
+
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Seconds a computed dataset version is trusted before it is re-read
+DATASET_VERSION_TTL = float(os.getenv("DATASET_VERSION_TTL", "5"))
+
+# How long clients may reuse a response without revalidating
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/x-ndjson")
+
+# Route templates whose responses only change with the dataset; 'private' for premium routes
+CACHEABLE_ROUTES = {
+    "/api/v1/fighters/{fighter_id}": "public",
+    "/api/v1/fighters/name/{fighter_name}": "public",
+    "/api/v1/fighters/{fighter_id}/stats/timeline": "public",
+    "/api/v1/predictions/fight-card/{event_name}": "private",
+}
+
+
+def _route_pattern(template: str):
+    # {..._id} parameters are integers, so /fighters/search does not match /fighters/{fighter_id}
+    pattern = re.sub(r"\{\w+_id\}", r"\\d+", template)
+    pattern = re.sub(r"\{\w+\}", "[^/]+", pattern)
+    return re.compile(f"^{pattern}$")
+
+
+_ROUTE_PATTERNS = [(_route_pattern(template), scope) for template, scope in CACHEABLE_ROUTES.items()]
+
+
+def _cache_scope(path: str) -> Optional[str]:
+    for pattern, scope in _ROUTE_PATTERNS:
+        if pattern.match(path):
+            return scope
+    return None
+
+
+class DatasetVersion:
+    """
+    Fingerprint of the fighters and fights tables - the dataset_revision
+    counter every write to them bumps, one row read - plus the mapped
+    snapshot, which carries model weights; re-read at most every
+    DATASET_VERSION_TTL seconds
+    """
+
+    def __init__(self, ttl: float = DATASET_VERSION_TTL):
+        self.ttl = ttl
+        self._value: Optional[str] = None
+        self._read_at = float('-inf')
+        self._lock = threading.Lock()
+
+    def compute(self) -> str:
+        from database.config import get_sessionmaker
+        from database.schema import dataset_revision
+        from services.snapshot import get_snapshot
+
+        db = get_sessionmaker()()
+        try:
+            revision = dataset_revision(db.connection())
+        finally:
+            db.close()
+
+        snapshot = get_snapshot()
+        parts = [revision, snapshot.version if snapshot is not None else None]
+        return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+    def fresh(self) -> bool:
+        return self._value is not None and time.monotonic() - self._read_at < self.ttl
+
+    def get(self) -> str:
+        if time.monotonic() - self._read_at >= self.ttl:
+            with self._lock:
+                if time.monotonic() - self._read_at >= self.ttl:
+                    self._value = self.compute()
+                    self._read_at = time.monotonic()
+        return self._value
+
+    def invalidate(self):
+        self._read_at = float('-inf')
+
+
+DATASET_VERSION = DatasetVersion()
+
+
+def make_etag(version: str, request) -> str:
+    """Strong ETag for this dataset version, path and (order-independent) query"""
+    query = "&".join(sorted(str(request.query_params).split("&")))
+    digest = hashlib.sha1(f"{version}|{request.url.path}|{query}".encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """Compare ignoring the weak prefix and the -br/-gzip suffix added per encoding"""
+    if if_none_match.strip() == "*":
+        return True
+    base = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip().removeprefix("W/").strip('"')
+        if candidate == base or candidate.rsplit("-", 1)[0] == base:
+            return True
+    return False
+
+
+def _cache_headers(etag: str, scope: str) -> dict:
+    return {
+        'ETag': etag,
+        'Cache-Control': f"{scope}, max-age={HTTP_CACHE_MAX_AGE}, must-revalidate",
+        'Vary': "Accept-Encoding",
+    }
+
+
+async def conditional_get(request, call_next):
+    """
+    Middleware body: 304 for a matching If-None-Match on cacheable routes,
+    otherwise tag the fresh 200 response with ETag and Cache-Control
+    """
+    scope = _cache_scope(request.url.path) if request.method in ("GET", "HEAD") else None
+    if scope is None:
+        return await call_next(request)
+
+    # Refreshing the version queries the database, so do that off the event loop
+    version = DATASET_VERSION.get() if DATASET_VERSION.fresh() else await asyncio.to_thread(DATASET_VERSION.get)
+    etag = make_etag(version, request)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=304, headers=_cache_headers(etag, scope))
+
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.update(_cache_headers(etag, scope))
+    return response
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """'br' or 'gzip' from an Accept-Encoding header (q=0 excluded), preferring brotli"""
+    offered = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip()] = quality
+
+    if brotli is not None and offered.get("br", 0) > 0:
+        return "br"
+    if offered.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+async def compress_response(request, call_next):
+    """
+    Middleware body: gzip or brotli for complete JSON/text responses of at
+    least COMPRESSION_MIN_BYTES. Streaming responses (no Content-Length) and
+    already-encoded ones pass through untouched.
+    """
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is None:
+        return await call_next(request)
+
+    response = await call_next(request)
+    length = response.headers.get("content-length")
+    content_type = response.headers.get("content-type", "")
+    if (
+        length is None
+        or int(length) < COMPRESSION_MIN_BYTES
+        or "content-encoding" in response.headers
+        or not content_type.startswith(COMPRESSIBLE_TYPES)
+    ):
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    compressed = await asyncio.to_thread(compress, body, encoding) if len(body) > 256 * 1024 else compress(body, encoding)
+
+    compressed_response = Response(content=compressed, status_code=response.status_code)
+    replaced = {b'content-length', b'content-encoding', b'vary', b'etag'}
+    raw_headers = [(k, v) for k, v in response.raw_headers if k not in replaced]
+    raw_headers += [
+        (b'content-length', str(len(compressed)).encode()),
+        (b'content-encoding', encoding.encode()),
+        (b'vary', b'Accept-Encoding'),
+    ]
+    etag = response.headers.get('etag')
+    if etag:
+        # A different representation needs a different strong ETag
+        raw_headers.append((b'etag', f'{etag[:-1]}-{encoding}"'.encode()))
+    compressed_response.raw_headers = raw_headers
+    return compressed_response
@@ -0,0 +1,509 @@
+"""
+Live odds: bookmaker feed -> fights.live_red_odds/live_blue_odds -> value re-pricing -> SSE
+Updates are NDJSON lines ({"fight_id": 1, "red_odds": -150, "blue_odds": 130})
+read from a file as it grows or from a TCP feed (LIVE_ODDS_FEED). Whatever
+has queued up while the previous batch was written goes into the next one:
+one bulk UPDATE of the live price columns (the historical red_odds/blue_odds
+are never touched), then only those fights are re-priced against cached
+predictions. Predictions depend on the fighters, not on the odds, so they
+are recomputed only when a fighter row (updated_at, Elo) or the model
+changed. Each re-priced fight is encoded once into an in-memory event log;
+every SSE subscriber is woken by one asyncio.Event and reads the log from
+its own position, and a reconnecting client resumes from Last-Event-ID.
+The ingest runs in the worker(s) started with LIVE_ODDS_FEED set. Run
+`migrate` once for a database created before the live price columns existed.
+
+Usage (from the backend directory):
+    python services/live_odds.py migrate
+    python services/live_odds.py feed odds.ndjson --port 9100 --rate 50   # stand-in bookmaker
+    LIVE_ODDS_FEED=tcp://localhost:9100 uvicorn main:app
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Deque, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.orm import Session, aliased
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database.schema import Fight, Fighter, bump_dataset_revision
+from services.metrics import LIVE_ODDS_LATENCY
+from services.ml_predictor import MLPredictor
+from services.participation import fighters_by_id
+from services.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# Odds feed: a file path (read as it grows) or tcp://host:port; empty disables live odds
+LIVE_ODDS_FEED = os.getenv("LIVE_ODDS_FEED", "")
+
+# Most updates written (and re-priced) together
+LIVE_ODDS_BATCH_SIZE = 500
+
+# Updates read ahead of the database; a slower database pushes back on the feed
+QUEUE_SIZE = 10_000
+
+# Events kept for subscribers that reconnect with Last-Event-ID
+EVENT_BUFFER = int(os.getenv("LIVE_ODDS_EVENT_BUFFER", "4096"))
+
+# Comment line sent to idle subscribers so proxies keep the connection open
+SSE_KEEPALIVE_SECONDS = 15
+
+FILE_POLL_SECONDS = 0.05
+RECONNECT_SECONDS = 1.0
+
+# Update-to-publish latencies kept for /odds/status percentiles
+LATENCY_WINDOW = 10_000
+
+_RedFighter = aliased(Fighter)
+_BlueFighter = aliased(Fighter)
+
+
+class OddsUpdate:
+    """One bookmaker price for a fight, in American odds"""
+    __slots__ = ('fight_id', 'red_odds', 'blue_odds', 'received')
+
+    def __init__(self, fight_id: int, red_odds: float, blue_odds: float, received: Optional[float] = None):
+        self.fight_id = fight_id
+        self.red_odds = red_odds
+        self.blue_odds = blue_odds
+        self.received = time.monotonic() if received is None else received
+
+    @classmethod
+    def parse(cls, line: str) -> "OddsUpdate":
+        """ValueError for anything but {"fight_id": int, "red_odds": odds, "blue_odds": odds}"""
+        try:
+            data = json.loads(line)
+            update = cls(int(data['fight_id']), float(data['red_odds']), float(data['blue_odds']))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid odds update {line.strip()!r}: {e}") from None
+        for odds in (update.red_odds, update.blue_odds):
+            if -100 < odds < 100:
+                raise ValueError(f"Invalid odds update {line.strip()!r}: American odds must be <= -100 or >= 100")
+        return update
+
+
+async def file_lines(path: Path, poll_seconds: float = FILE_POLL_SECONDS) -> AsyncIterator[str]:
+    """Complete lines of a file, from its start, then as they are appended"""
+    with open(path) as f:
+        pending = ""
+        while True:
+            line = f.readline()
+            if not line:
+                await asyncio.sleep(poll_seconds)
+                continue
+            pending += line
+            if pending.endswith("\n"):
+                yield pending
+                pending = ""
+
+
+async def socket_lines(host: str, port: int, reconnect_seconds: float = RECONNECT_SECONDS) -> AsyncIterator[str]:
+    """Lines from a TCP feed, reconnecting whenever it drops"""
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError as e:
+            logger.warning("Odds feed %s:%s unavailable (%s), retrying", host, port, e)
+            await asyncio.sleep(reconnect_seconds)
+            continue
+        try:
+            while line := await reader.readline():
+                yield line.decode()
+        except OSError as e:
+            logger.warning("Odds feed %s:%s failed: %s", host, port, e)
+        finally:
+            writer.close()
+        logger.warning("Odds feed %s:%s closed, reconnecting", host, port)
+        await asyncio.sleep(reconnect_seconds)
+
+
+def feed_lines(feed: str) -> AsyncIterator[str]:
+    if feed.startswith("tcp://"):
+        host, _, port = feed[len("tcp://"):].rpartition(":")
+        return socket_lines(host, int(port))
+    return file_lines(Path(feed))
+
+
+def value_edges(red_probability: float, blue_probability: float,
+                red_odds: float, blue_odds: float) -> Tuple[float, float]:
+    """Model probability minus the odds' implied probability for each corner (find_betting_value's value)"""
+    return (red_probability - MLPredictor.odds_to_probability(red_odds),
+            blue_probability - MLPredictor.odds_to_probability(blue_odds))
+
+
+def current_odds(fight: Fight) -> Tuple[Optional[float], Optional[float]]:
+    """The fight's live prices once the feed has sent some, otherwise its stored odds"""
+    if fight.live_red_odds is not None and fight.live_blue_odds is not None:
+        return fight.live_red_odds, fight.live_blue_odds
+    return fight.red_odds, fight.blue_odds
+
+
+LIVE_ODDS_COLUMNS = {'live_red_odds': 'FLOAT', 'live_blue_odds': 'FLOAT', 'odds_updated_at': 'TIMESTAMP'}
+
+
+def ensure_live_odds_columns(engine) -> List[str]:
+    """Add the live price columns to a database created before them; the names added"""
+    existing = {column['name'] for column in inspect(engine).get_columns(Fight.__tablename__)}
+    added = [name for name in LIVE_ODDS_COLUMNS if name not in existing]
+    if added:
+        with engine.begin() as connection:
+            for name in added:
+                connection.execute(text(f"ALTER TABLE {Fight.__tablename__} ADD COLUMN {name} {LIVE_ODDS_COLUMNS[name]}"))
+    return added
+
+
+class PricedFight:
+    """A fight's prediction, valid while both fighters' rows and the model are unchanged"""
+    __slots__ = ('fight_id', 'date', 'red_fighter_name', 'blue_fighter_name',
+                 'red_probability', 'blue_probability', 'stamp')
+
+    def __init__(self, fight_id: int, date: datetime, red_fighter_name: str, blue_fighter_name: str,
+                 red_probability: float, blue_probability: float, stamp: tuple):
+        self.fight_id = fight_id
+        self.date = date
+        self.red_fighter_name = red_fighter_name
+        self.blue_fighter_name = blue_fighter_name
+        self.red_probability = red_probability
+        self.blue_probability = blue_probability
+        self.stamp = stamp
+
+    def price(self, update: OddsUpdate) -> dict:
+        """The event payload for this fight at the update's odds"""
+        red_value, blue_value = value_edges(self.red_probability, self.blue_probability,
+                                            update.red_odds, update.blue_odds)
+        # The implied probabilities sum to at least 1, so at most one corner has an edge
+        recommended = 'Red' if red_value > 0 else 'Blue' if blue_value > 0 else 'Pass'
+        return {
+            'fight_id': self.fight_id,
+            'red_fighter_name': self.red_fighter_name,
+            'blue_fighter_name': self.blue_fighter_name,
+            'date': self.date,
+            'red_odds': update.red_odds,
+            'blue_odds': update.blue_odds,
+            'red_probability': self.red_probability,
+            'blue_probability': self.blue_probability,
+            'red_value_percentage': red_value * 100,
+            'blue_value_percentage': blue_value * 100,
+            'recommended_bet': recommended,
+            'value_percentage': max(red_value, blue_value) * 100,
+        }
+
+
+class PredictionCache:
+    """Predictions per fight id for the ingest task (not shared between threads)"""
+
+    def __init__(self, predictor: MLPredictor):
+        self.predictor = predictor
+        self._entries: Dict[int, PricedFight] = {}
+        self._model = None
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, db: Session, fight_ids: Iterable[int]) -> Dict[int, PricedFight]:
+        """Priced fights for the ids that exist; stale or missing predictions are recomputed"""
+        model = self.predictor.model
+        if model is not self._model:
+            self._entries.clear()
+            self._model = model
+
+        rows = db.execute(
+            select(Fight.id, Fight.date, Fight.red_fighter_id, Fight.blue_fighter_id,
+                   _RedFighter.name, _BlueFighter.name,
+                   _RedFighter.updated_at, _RedFighter.elo_rating, _BlueFighter.updated_at, _BlueFighter.elo_rating)
+            .join(_RedFighter, _RedFighter.id == Fight.red_fighter_id)
+            .join(_BlueFighter, _BlueFighter.id == Fight.blue_fighter_id)
+            .where(Fight.id.in_(list(fight_ids)))
+        ).all()
+
+        stale = []
+        for row in rows:
+            entry = self._entries.get(row[0])
+            if entry is not None and entry.stamp == tuple(row[6:]):
+                self.hits += 1
+            else:
+                stale.append(row)
+
+        if stale:
+            self.misses += len(stale)
+            fighters = {fighter.id: fighter for fighter in fighters_by_id(db, {
+                fighter_id for row in stale for fighter_id in (row[2], row[3])
+            })}
+            for fight_id, date, red_id, blue_id, red_name, blue_name, *stamp in stale:
+                prediction = self.predictor.predict_fight(fighters[red_id], fighters[blue_id], db)
+                self._entries[fight_id] = PricedFight(
+                    fight_id, date, red_name, blue_name,
+                    prediction.red_win_probability, prediction.blue_win_probability, tuple(stamp)
+                )
+
+        return {row[0]: self._entries[row[0]] for row in rows}
+
+
+# Sent to a subscriber whose Last-Event-ID is no longer buffered: reload /betting-value
+RESET_FRAME = b"id: %d\nevent: reset\ndata: {}\n\n"
+
+
+class EventLog:
+    """
+    The last `capacity` published events as (id, payload, SSE frame), ids
+    increasing by one. Publishing encodes each event once and sets a single
+    asyncio.Event, so its cost does not grow with the number of subscribers;
+    one shared timer wakes them all for keepalives. Only used from the event
+    loop.
+    """
+
+    def __init__(self, capacity: int = EVENT_BUFFER, keepalive: float = SSE_KEEPALIVE_SECONDS):
+        self.events: Deque[Tuple[int, dict, bytes]] = deque(maxlen=capacity)
+        self.keepalive = keepalive
+        self.last_id = 0
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+        self._ticker: Optional[asyncio.Task] = None
+
+    def publish(self, payloads: Iterable[dict]):
+        for payload in payloads:
+            self.last_id += 1
+            frame = b"id: %d\nevent: odds\ndata: %s\n\n" % (self.last_id, dumps(payload))
+            self.events.append((self.last_id, payload, frame))
+        self._wake()
+
+    def _wake(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def _tick(self):
+        while self.subscribers:
+            await asyncio.sleep(self.keepalive)
+            self._wake()
+        self._ticker = None
+
+    def since(self, event_id: int) -> List[Tuple[int, dict, bytes]]:
+        """Buffered events after event_id"""
+        if not self.events or event_id >= self.last_id:
+            return []
+        start = max(0, event_id - self.events[0][0] + 1)
+        return list(itertools.islice(self.events, start, None))
+
+    async def subscribe(self, last_event_id: Optional[int] = None) -> AsyncIterator[List[Tuple[int, Optional[dict], bytes]]]:
+        """
+        Events published after last_event_id (after now when None), as
+        everything the subscriber is behind on at once; an empty list on a
+        keepalive tick, and [(id, None, reset frame)] instead when events it
+        missed are no longer buffered
+        """
+        cursor = self.last_id if last_event_id is None else last_event_id
+        self.subscribers += 1
+        if self._ticker is None:
+            self._ticker = asyncio.create_task(self._tick())
+        try:
+            if cursor > self.last_id:
+                # An id from before a restart: what the client missed is unknown
+                cursor = self.last_id
+                yield [(cursor, None, RESET_FRAME % cursor)]
+            while True:
+                if cursor < self.last_id:
+                    oldest = self.events[0][0] if self.events else self.last_id + 1
+                    reset = [(self.last_id, None, RESET_FRAME % self.last_id)] if cursor < oldest - 1 else []
+                    events = reset or self.since(cursor)
+                    cursor = self.last_id
+                    yield events
+                    continue
+                await self._changed.wait()
+                if cursor == self.last_id:
+                    yield []
+        finally:
+            self.subscribers -= 1
+
+
+class OddsIngester:
+    """Reads the feed, writes odds in batches and publishes the re-priced fights"""
+
+    def __init__(self, feed: str, predictor: MLPredictor, events: EventLog,
+                 batch_size: int = LIVE_ODDS_BATCH_SIZE):
+        self.feed = feed
+        self.feed_kind = 'tcp' if feed.startswith("tcp://") else 'file'
+        self.events = events
+        self.cache = PredictionCache(predictor)
+        self.batch_size = batch_size
+        self.updates = 0
+        self.rejected = 0
+        self.unknown_fights = 0
+        self.batches = 0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    async def run(self):
+        queue: asyncio.Queue = asyncio.Queue(QUEUE_SIZE)
+        reader = asyncio.create_task(self._read(queue))
+        try:
+            while True:
+                batch = [await queue.get()]
+                while len(batch) < self.batch_size and not queue.empty():
+                    batch.append(queue.get_nowait())
+                try:
+                    payloads = await asyncio.to_thread(self.apply, batch)
+                except Exception:
+                    logger.exception("Could not apply %d odds updates", len(batch))
+                    continue
+                self.events.publish(payloads)
+
+                published = time.monotonic()
+                for update in batch:
+                    latency = published - update.received
+                    self.latencies.append(latency)
+                    LIVE_ODDS_LATENCY.observe((self.feed_kind,), latency)
+        finally:
+            reader.cancel()
+
+    async def _read(self, queue: asyncio.Queue):
+        async for line in feed_lines(self.feed):
+            if not line.strip():
+                continue
+            try:
+                update = OddsUpdate.parse(line)
+            except ValueError as e:
+                self.rejected += 1
+                logger.warning("%s", e)
+                continue
+            self.updates += 1
+            await queue.put(update)
+
+    def apply(self, batch: List[OddsUpdate]) -> List[dict]:
+        """Write the batch's live prices (last update per fight wins) and re-price those fights"""
+        from database.config import get_sessionmaker
+        from services.http_cache import DATASET_VERSION
+
+        latest = {update.fight_id: update for update in batch}
+        db = get_sessionmaker()()
+        try:
+            priced = self.cache.get_many(db, latest)
+            self.unknown_fights += len(latest) - len(priced)
+            updated_at = datetime.utcnow()
+            db.bulk_update_mappings(Fight, [
+                {'id': fight_id, 'live_red_odds': latest[fight_id].red_odds,
+                 'live_blue_odds': latest[fight_id].blue_odds, 'odds_updated_at': updated_at}
+                for fight_id in priced
+            ])
+            bump_dataset_revision(db.connection())
+            db.commit()
+        finally:
+            db.close()
+        self.batches += 1
+        # ETags of routes that show odds change with them (this worker at once, others within the TTL)
+        DATASET_VERSION.invalidate()
+        return [priced[fight_id].price(latest[fight_id]) for fight_id in priced]
+
+    def prime(self, limit: int = 50) -> int:
+        """Predict the fights find_betting_value looks at, before the first update arrives"""
+        from database.config import get_sessionmaker
+
+        db = get_sessionmaker()()
+        try:
+            fight_ids = db.scalars(
+                select(Fight.id).where(Fight.red_odds.isnot(None), Fight.blue_odds.isnot(None))
+                .order_by(Fight.date.desc()).limit(limit)
+            ).all()
+            return len(self.cache.get_many(db, fight_ids))
+        finally:
+            db.close()
+
+    def status(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(q: float) -> Optional[float]:
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else None
+
+        return {
+            'feed': self.feed_kind,
+            'updates': self.updates,
+            'rejected': self.rejected,
+            'unknown_fights': self.unknown_fights,
+            'batches': self.batches,
+            'prediction_cache': {'hits': self.cache.hits, 'misses': self.cache.misses},
+            'latency_ms': {'p50': percentile(0.5), 'p99': percentile(0.99), 'max': percentile(1.0)},
+        }
+
+
+EVENTS = EventLog()
+INGESTER: Optional[OddsIngester] = None
+
+
+async def _run_ingester(ingester: OddsIngester):
+    try:
+        primed = await asyncio.to_thread(ingester.prime)
+        logger.info("Live odds: %d fights priced, reading %s", primed, ingester.feed)
+    except Exception:
+        logger.exception("Live odds: could not prime the prediction cache")
+    await ingester.run()
+
+
+def start(predictor: MLPredictor, feed: Optional[str] = None) -> Optional[asyncio.Task]:
+    """Lifespan hook: start ingesting LIVE_ODDS_FEED (if set); returns the task"""
+    global INGESTER
+    feed = LIVE_ODDS_FEED if feed is None else feed
+    if not feed:
+        return None
+    INGESTER = OddsIngester(feed, predictor, EVENTS)
+    return asyncio.create_task(_run_ingester(INGESTER))
+
+
+def status() -> dict:
+    return {
+        'ingesting': INGESTER is not None,
+        'subscribers': EVENTS.subscribers,
+        'last_event_id': EVENTS.last_id,
+        **(INGESTER.status() if INGESTER is not None else {}),
+    }
+
+
+async def serve_feed(path: Path, host: str, port: int, rate: float):
+    """Stand-in bookmaker: send the file's lines to every client, `rate` lines per second"""
+    lines = [line for line in path.read_text().splitlines() if line.strip()]
+
+    async def send(reader, writer):
+        try:
+            for line in lines:
+                writer.write(line.encode() + b"\n")
+                await writer.drain()
+                if rate:
+                    await asyncio.sleep(1 / rate)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(send, host, port)
+    print(f"Serving {len(lines)} odds updates on tcp://{host}:{port} at {rate or 'max'}/s")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live odds columns and a stand-in bookmaker feed")
+    parser.add_argument("command", choices=['migrate', 'feed'])
+    parser.add_argument("path", nargs="?", help="NDJSON odds updates (feed only)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--rate", type=float, default=10, help="Updates per second (0 = as fast as possible)")
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        from database.config import engine
+
+        added = ensure_live_odds_columns(engine)
+        print(f"Added {', '.join(added)}" if added else "Live odds columns already present")
+    else:
+        if not args.path:
+            parser.error("feed needs the NDJSON file to serve")
+        asyncio.run(serve_feed(Path(args.path), args.host, args.port, args.rate))
@@ -0,0 +1,110 @@
+"""
+Fighter pairs (fights.pair_key): head-to-head history and "have they met?"
+Every fight stores fighter_pair_key(red, blue), the same for both corner
+orders, indexed with the date. A pair's history is one range scan on
+idx_fight_pair_date, and a whole card is checked with one IN over its keys,
+instead of an OR of both corner orders per pair. New fights get the key
+from the column default; run this script once for a database created
+before the column existed (it adds the column and index and fills them).
+
+Usage (from the backend directory):
+    python services/matchups.py
+"""
+from __future__ import annotations
+
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import case, inspect, select, text, update
+from sqlalchemy.orm import Session, aliased
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database.schema import Fight, Fighter, fighter_pair_key
+
+# Keys per IN (...) list when checking many pairs
+KEY_BATCH_SIZE = 500
+
+_RedFighter = aliased(Fighter)
+_BlueFighter = aliased(Fighter)
+
+
+def previous_matchups(db: Session, fighter_id: int, other_fighter_id: int) -> List[dict]:
+    """Every fight between two fighters, newest first, with both names (FightSummary fields)"""
+    rows = db.execute(
+        select(Fight.id, Fight.date, _RedFighter.name.label('red_fighter_name'),
+               _BlueFighter.name.label('blue_fighter_name'), Fight.winner, Fight.finish_method,
+               Fight.finish_round, Fight.location)
+        .join(_RedFighter, _RedFighter.id == Fight.red_fighter_id)
+        .join(_BlueFighter, _BlueFighter.id == Fight.blue_fighter_id)
+        .where(Fight.pair_key == fighter_pair_key(fighter_id, other_fighter_id))
+        .order_by(Fight.date.desc())
+    )
+    return [dict(row._mapping) for row in rows]
+
+
+def meetings(db: Session, pairs: Iterable[Tuple[int, int]]) -> Dict[int, List[Tuple[int, object]]]:
+    """(fight id, date) of every fight of each pair, oldest first, by pair key; pairs that never met are absent"""
+    keys = sorted({fighter_pair_key(a, b) for a, b in pairs})
+    found: Dict[int, List[Tuple[int, object]]] = defaultdict(list)
+    for start in range(0, len(keys), KEY_BATCH_SIZE):
+        rows = db.execute(
+            select(Fight.pair_key, Fight.id, Fight.date)
+            .where(Fight.pair_key.in_(keys[start:start + KEY_BATCH_SIZE]))
+            .order_by(Fight.pair_key, Fight.date)
+        )
+        for key, fight_id, date in rows:
+            found[key].append((fight_id, date))
+    return dict(found)
+
+
+def previous_meetings(db: Session, fights: Iterable[Fight]) -> Dict[int, int]:
+    """Earlier fights between the same two fighters, per fight id (one query for a whole card)"""
+    fights = list(fights)
+    found = meetings(db, ((fight.red_fighter_id, fight.blue_fighter_id) for fight in fights))
+    counts = {}
+    for fight in fights:
+        earlier = found.get(fighter_pair_key(fight.red_fighter_id, fight.blue_fighter_id), ())
+        counts[fight.id] = sum(1 for fight_id, date in earlier if date < fight.date)
+    return counts
+
+
+def rebuild_pair_keys(db: Session) -> int:
+    """Set pair_key on every fight with one UPDATE (after Core writes that bypassed the column default)"""
+    print("Rebuilding fighter pair keys...")
+    low = case((Fight.red_fighter_id <= Fight.blue_fighter_id, Fight.red_fighter_id), else_=Fight.blue_fighter_id)
+    high = case((Fight.red_fighter_id <= Fight.blue_fighter_id, Fight.blue_fighter_id), else_=Fight.red_fighter_id)
+    # low * 2**32 + high, as fighter_pair_key (shifts are not portable SQL)
+    updated = db.execute(update(Fight).values(pair_key=low * 4294967296 + high)).rowcount
+    db.commit()
+    print(f"Keyed {updated} fights")
+    return updated
+
+
+def ensure_pair_key_column(engine) -> bool:
+    """Add fights.pair_key and its index to a database created before them; True if added"""
+    if 'pair_key' in {column['name'] for column in inspect(engine).get_columns(Fight.__tablename__)}:
+        return False
+    with engine.begin() as connection:
+        connection.execute(text(f"ALTER TABLE {Fight.__tablename__} ADD COLUMN pair_key BIGINT"))
+        for index in Fight.__table__.indexes:
+            if 'pair_key' in index.columns:
+                index.create(connection, checkfirst=True)
+    return True
+
+
+if __name__ == "__main__":
+    from database.config import SessionLocal, engine
+
+    if ensure_pair_key_column(engine):
+        print("Added fights.pair_key")
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        rebuild_pair_keys(db)
+        print(f"Done in {time.perf_counter() - start:.2f}s")
+    finally:
+        db.close()
@@ -0,0 +1,240 @@
+"""
+Request instrumentation: per-route latency histograms, per-request SQL
+query accounting and an optional query budget
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Prometheus' default latency buckets (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+FEED_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Statements allowed per request (0 disables the budget) and what to do when exceeded
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "0"))
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "log")  # 'log' or 'fail'
+
+# Connections checked out of each engine's pool
+_pool_checkouts: Dict[object, int] = {}
+_pool_lock = threading.Lock()
+
+# Stats for the request currently being served (shared with the threadpool running sync routes)
+_current_request: ContextVar[Optional['RequestStats']] = ContextVar('current_request', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a request issues more SQL statements than QUERY_BUDGET allows"""
+
+    def __init__(self, budget: int, route: str):
+        super().__init__(f"Query budget of {budget} statements exceeded on {route}")
+        self.budget = budget
+        self.route = route
+
+
+class RequestStats:
+    """SQL activity of a single request"""
+
+    def __init__(self, route: str = 'unmatched', budget: int = 0, fail_over_budget: bool = False):
+        self.route = route
+        self.budget = budget
+        self.fail_over_budget = fail_over_budget
+        self.query_count = 0
+        self.db_seconds = 0.0
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values"""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # bucket counts, +Inf count, sum
+                series = self._series[labels] = [[0] * len(self.buckets), 0, 0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: (list(buckets), count, total) for labels, (buckets, count, total) in self._series.items()}
+
+        for labels, (buckets, count, total) in sorted(snapshot.items()):
+            label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            for bound, bucket_count in zip(self.buckets, buckets):
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {total}')
+            lines.append(f'{self.name}_count{{{label_text}}} {count}')
+        return "\n".join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route and status",
+    ("method", "route", "status"), LATENCY_BUCKETS
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements issued per HTTP request",
+    ("method", "route"), QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_duration_seconds", "Time spent in SQL per HTTP request",
+    ("method", "route"), LATENCY_BUCKETS
+)
+LIVE_ODDS_LATENCY = Histogram(
+    "live_odds_publish_latency_seconds", "Odds update received to re-priced event published",
+    ("feed",), FEED_LATENCY_BUCKETS
+)
+
+
+def render_pool_metrics() -> str:
+    """Connection pool gauges and checkout counters for every engine created so far"""
+    from database.config import created_engines
+
+    gauges = {
+        'db_pool_size': ("Configured pool size", 'size'),
+        'db_pool_checked_out': ("Connections currently checked out", 'checkedout'),
+        'db_pool_checked_in': ("Idle connections held by the pool", 'checkedin'),
+        'db_pool_overflow': ("Connections open beyond the pool size", 'overflow'),
+    }
+    engines = created_engines()
+    lines = []
+    for name, (help_text, method) in gauges.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        for pool_name, engine in engines.items():
+            # Pools other than QueuePool (e.g. SQLite :memory:) lack some of these
+            value = getattr(engine.pool, method, None)
+            if value is not None:
+                lines.append(f'{name}{{pool="{pool_name}"}} {value()}')
+
+    lines += ["# HELP db_pool_checkouts_total Connections handed out by the pool",
+              "# TYPE db_pool_checkouts_total counter"]
+    with _pool_lock:
+        for pool_name, engine in engines.items():
+            lines.append(f'db_pool_checkouts_total{{pool="{pool_name}"}} {_pool_checkouts.get(engine, 0)}')
+    return "\n".join(lines)
+
+
+def render_metrics() -> str:
+    """All metrics in Prometheus text exposition format"""
+    histograms = [h.render() for h in (REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_DB_TIME, LIVE_ODDS_LATENCY)]
+    return "\n".join(histograms + [render_pool_metrics()]) + "\n"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_request.get()
+    if stats is None:
+        return
+    if stats.budget and stats.fail_over_budget and stats.query_count >= stats.budget:
+        raise QueryBudgetExceeded(stats.budget, stats.route)
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_request.get()
+    starts = conn.info.get('query_start_time')
+    if stats is None or not starts:
+        return
+    stats.query_count += 1
+    stats.db_seconds += time.perf_counter() - starts.pop()
+
+
+def _on_engine_connect(conn):
+    with _pool_lock:
+        _pool_checkouts[conn.engine] = _pool_checkouts.get(conn.engine, 0) + 1
+
+
+def instrument_engine(engine):
+    """Attach query accounting hooks to a SQLAlchemy engine, or the Engine class (idempotent)"""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'engine_connect', _on_engine_connect)
+
+
+def _route_template(request) -> str:
+    """Matched route path (e.g. /api/v1/fighters/{fighter_id}); keeps label cardinality bounded"""
+    route = request.scope.get('route')
+    return getattr(route, 'path', 'unmatched')
+
+
+async def _finish_after(body_iterator, finish):
+    try:
+        async for chunk in body_iterator:
+            yield chunk
+    finally:
+        finish()
+
+
+async def instrument_request(request, call_next, budget: Optional[int] = None, mode: Optional[str] = None):
+    """
+    Middleware body: time the request, count its SQL statements, enforce the
+    query budget and expose the numbers as response headers. A streamed body
+    (exports: no Content-Length) runs its queries while it is sent, so its
+    stats are recorded when the stream ends and it gets no X-DB-* headers.
+    """
+    budget = QUERY_BUDGET if budget is None else budget
+    mode = QUERY_BUDGET_MODE if mode is None else mode
+
+    stats = RequestStats(route=request.url.path, budget=budget, fail_over_budget=(mode == 'fail'))
+    token = _current_request.set(stats)
+    start = time.perf_counter()
+    try:
+        # The endpoint and its streamed body run in a task that copied this context,
+        # so their statements are counted after the reset below as well
+        response = await call_next(request)
+    finally:
+        _current_request.reset(token)
+
+    route = _route_template(request)
+
+    def finish() -> float:
+        elapsed = time.perf_counter() - start
+        REQUEST_LATENCY.observe((request.method, route, str(response.status_code)), elapsed)
+        REQUEST_QUERIES.observe((request.method, route), stats.query_count)
+        REQUEST_DB_TIME.observe((request.method, route), stats.db_seconds)
+        if budget and stats.query_count > budget:
+            logger.warning("%s %s issued %d SQL statements (budget %d)",
+                           request.method, route, stats.query_count, budget)
+        return elapsed
+
+    if 'content-length' not in response.headers:
+        response.body_iterator = _finish_after(response.body_iterator, finish)
+        return response
+
+    elapsed = finish()
+    response.headers['X-DB-Query-Count'] = str(stats.query_count)
+    response.headers['X-DB-Time-Ms'] = f"{stats.db_seconds * 1000:.2f}"
+    response.headers['Server-Timing'] = (
+        f"db;dur={stats.db_seconds * 1000:.2f}, total;dur={elapsed * 1000:.2f}"
+    )
+    return response
@@ -5,10 +5,68 @@ import numpy as np
 from sqlalchemy.orm import Session
 from typing import Tuple
 import pickle
+import threading
 from pathlib import Path
 
-from database.schema import Fighter, Fight
+from database.schema import Fighter, FighterFight
 from models.schemas import PredictionResponse
+from services.compiled_model import CompiledModel
+from services.ratings import DEFAULT_RATING, expected_score
+from services.snapshot import get_snapshot
+
+
+# Feature order used by trained models that were not fitted on a DataFrame
+MODEL_FEATURES = [
+    'red_win_percentage', 'red_total_fights', 'red_ko_rate', 'red_sub_rate', 'red_recent_form', 'red_elo',
+    'blue_win_percentage', 'blue_total_fights', 'blue_ko_rate', 'blue_sub_rate', 'blue_recent_form', 'blue_elo',
+    'win_percentage_diff', 'experience_diff', 'ko_rate_diff', 'elo_diff', 'red_elo_win_probability',
+]
+
+# Confidence cut-offs (0-100) separating the betting recommendation tiers
+CONFIDENCE_TIERS = (10, 20, 30)
+
+
+def rule_based_red_probability(features):
+    """
+    Red corner win probability from the rule-based score system
+    Accepts scalar features or NumPy arrays of features (one entry per fight)
+    """
+
+    # Score system
+    red_score = 50.0  # Start neutral
+    blue_score = 50.0
+
+    # Win percentage impact (±15 points max)
+    win_perc_impact = (features['win_percentage_diff'] / 100) * 15
+    red_score += win_perc_impact
+    blue_score -= win_perc_impact
+
+    # Recent form impact (±10 points max)
+    form_diff = features['red_recent_form'] - features['blue_recent_form']
+    form_impact = form_diff * 10
+    red_score += form_impact
+    blue_score -= form_impact
+
+    # Experience impact (±5 points max)
+    exp_diff = np.clip(features['experience_diff'], -10, 10)
+    exp_impact = (exp_diff / 10) * 5
+    red_score += exp_impact
+    blue_score -= exp_impact
+
+    # Finishing ability (±8 points max)
+    red_finish_rate = features['red_ko_rate'] + features['red_sub_rate']
+    blue_finish_rate = features['blue_ko_rate'] + features['blue_sub_rate']
+    finish_impact = ((red_finish_rate - blue_finish_rate) / 100) * 8
+    red_score += finish_impact
+    blue_score -= finish_impact
+
+    # Elo rating impact (±10 points max)
+    elo_impact = (features['red_elo_win_probability'] - 0.5) * 20
+    red_score += elo_impact
+    blue_score -= elo_impact
+
+    # Normalize to probabilities
+    return red_score / (red_score + blue_score)
 
 
 class MLPredictor:
@@ -18,17 +76,66 @@ class MLPredictor:
     """
 
     def __init__(self):
-        self.model = None
+        self._model = None
+        self._model_loaded = False
+        self._model_snapshot = None
+        self._load_lock = threading.Lock()
         self.model_path = Path(__file__).parent.parent / "ml" / "model.pkl"
-
-        # Try to load pre-trained model
-        if self.model_path.exists():
-            try:
-                with open(self.model_path, 'rb') as f:
-                    self.model = pickle.load(f)
-            except Exception as e:
-                print(f"Could not load model: {e}")
-                self.model = None
+        self.compiled_model_path = self.model_path.with_suffix(".npz")
+
+    @property
+    def model(self):
+        """Trained model, loaded on first use (or by load_model() during warmup)"""
+        if not self._model_loaded:
+            self.load_model()
+        elif self._model_snapshot is not None and get_snapshot() is not self._model_snapshot:
+            # The shared snapshot was rebuilt; pick up the weights it carries
+            self._model_loaded = False
+            self.load_model()
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
+        self._model_loaded = True
+        self._model_snapshot = None
+
+    def load_model(self):
+        """Load the trained model from disk once; None means the rule-based fallback is used"""
+        with self._load_lock:
+            if self._model_loaded:
+                return self._model
+
+            model = None
+            # Weights in the shared snapshot are mapped once for all workers
+            snapshot = get_snapshot()
+            self._model_snapshot = None
+            if snapshot is not None:
+                try:
+                    model = snapshot.compiled_model()
+                except Exception as e:
+                    print(f"Could not load snapshot model: {e}")
+                if model is not None:
+                    self._model_snapshot = snapshot
+
+            # Prefer the compiled model: plain arrays, no sklearn import or unpickling
+            if model is None and self.compiled_model_path.exists():
+                try:
+                    model = CompiledModel.load(self.compiled_model_path)
+                except Exception as e:
+                    print(f"Could not load compiled model: {e}")
+
+            # Fall back to the pickled pre-trained model
+            if model is None and self.model_path.exists():
+                try:
+                    with open(self.model_path, 'rb') as f:
+                        model = pickle.load(f)
+                except Exception as e:
+                    print(f"Could not load model: {e}")
+
+            self._model = model
+            self._model_loaded = True
+            return model
 
     def predict_fight(self, red_fighter: Fighter, blue_fighter: Fighter, db: Session) -> PredictionResponse:
         """
@@ -41,7 +148,7 @@ class MLPredictor:
 
         if self.model:
             # Use trained ML model
-            prediction = self._predict_with_model(features)
+            prediction = self._predict_with_model(features, red_fighter, blue_fighter)
         else:
             # Use rule-based prediction
             prediction = self._predict_rule_based(features, red_fighter, blue_fighter)
@@ -51,23 +158,14 @@ class MLPredictor:
     def _extract_features(self, red_fighter: Fighter, blue_fighter: Fighter, db: Session) -> dict:
         """Extract features for prediction"""
 
-        # Get recent fight statistics
-        red_recent_fights = db.query(Fight).filter(
-            (Fight.red_fighter_id == red_fighter.id) | (Fight.blue_fighter_id == red_fighter.id)
-        ).order_by(Fight.date.desc()).limit(5).all()
-
-        blue_recent_fights = db.query(Fight).filter(
-            (Fight.red_fighter_id == blue_fighter.id) | (Fight.blue_fighter_id == blue_fighter.id)
-        ).order_by(Fight.date.desc()).limit(5).all()
-
-        # Calculate recent form (last 5 fights)
-        red_recent_wins = sum(1 for f in red_recent_fights
-                              if (f.red_fighter_id == red_fighter.id and f.winner == 'Red') or
-                              (f.blue_fighter_id == red_fighter.id and f.winner == 'Blue'))
-
-        blue_recent_wins = sum(1 for f in blue_recent_fights
-                               if (f.red_fighter_id == blue_fighter.id and f.winner == 'Red') or
-                               (f.blue_fighter_id == blue_fighter.id and f.winner == 'Blue'))
+        # Recent form from the shared snapshot when it is current for both fighters
+        snapshot = get_snapshot()
+        red_form = snapshot.recent_form(red_fighter.id, red_fighter.total_fights) if snapshot else None
+        blue_form = snapshot.recent_form(blue_fighter.id, blue_fighter.total_fights) if snapshot else None
+        if red_form is None:
+            red_form = self._recent_form(red_fighter, db)
+        if blue_form is None:
+            blue_form = self._recent_form(blue_fighter, db)
 
         # Calculate rates first
         red_ko_rate = (red_fighter.ko_tko_wins / red_fighter.total_fights * 100) if red_fighter.total_fights > 0 else 0
@@ -75,67 +173,63 @@ class MLPredictor:
         blue_ko_rate = (blue_fighter.ko_tko_wins / blue_fighter.total_fights * 100) if blue_fighter.total_fights > 0 else 0
         blue_sub_rate = (blue_fighter.submission_wins / blue_fighter.total_fights * 100) if blue_fighter.total_fights > 0 else 0
 
+        # Ratings are maintained on the fighter row, so reading them is O(1)
+        red_elo = red_fighter.elo_rating if red_fighter.elo_rating is not None else DEFAULT_RATING
+        blue_elo = blue_fighter.elo_rating if blue_fighter.elo_rating is not None else DEFAULT_RATING
+
         features = {
             # Red fighter features
             'red_win_percentage': red_fighter.win_percentage,
             'red_total_fights': red_fighter.total_fights,
             'red_ko_rate': red_ko_rate,
             'red_sub_rate': red_sub_rate,
-            'red_recent_form': red_recent_wins / min(5, len(red_recent_fights)) if red_recent_fights else 0,
+            'red_recent_form': red_form,
+            'red_elo': red_elo,
 
             # Blue fighter features
             'blue_win_percentage': blue_fighter.win_percentage,
             'blue_total_fights': blue_fighter.total_fights,
             'blue_ko_rate': blue_ko_rate,
             'blue_sub_rate': blue_sub_rate,
-            'blue_recent_form': blue_recent_wins / min(5, len(blue_recent_fights)) if blue_recent_fights else 0,
+            'blue_recent_form': blue_form,
+            'blue_elo': blue_elo,
 
             # Differential features
             'win_percentage_diff': red_fighter.win_percentage - blue_fighter.win_percentage,
             'experience_diff': red_fighter.total_fights - blue_fighter.total_fights,
             'ko_rate_diff': red_ko_rate - blue_ko_rate,
+            'elo_diff': red_elo - blue_elo,
+            'red_elo_win_probability': expected_score(red_elo, blue_elo),
         }
 
         return features
 
+    def _recent_form(self, fighter: Fighter, db: Session) -> float:
+        """Share of wins in the fighter's last five fights"""
+        recent_results = db.query(FighterFight.result).filter(
+            FighterFight.fighter_id == fighter.id
+        ).order_by(FighterFight.date.desc()).limit(5).all()
+
+        recent_wins = sum(1 for (result,) in recent_results if result == 'W')
+
+        return recent_wins / min(5, len(recent_results)) if recent_results else 0
+
     def _predict_rule_based(self, features: dict, red_fighter: Fighter, blue_fighter: Fighter) -> PredictionResponse:
         """
         Rule-based prediction system
         This is a simple heuristic approach that can be replaced with ML
         """
 
-        # Score system
-        red_score = 50.0  # Start neutral
-        blue_score = 50.0
+        red_prob = float(rule_based_red_probability(features))
+        return self._build_prediction(red_prob, features, red_fighter, blue_fighter)
 
-        # Win percentage impact (±15 points max)
-        win_perc_impact = (features['win_percentage_diff'] / 100) * 15
-        red_score += win_perc_impact
-        blue_score -= win_perc_impact
+    def _build_prediction(self, red_prob: float, features: dict, red_fighter: Fighter, blue_fighter: Fighter) -> PredictionResponse:
+        """Turn a red corner win probability into a full prediction response"""
+        blue_prob = 1 - red_prob
 
-        # Recent form impact (±10 points max)
         form_diff = features['red_recent_form'] - features['blue_recent_form']
-        form_impact = form_diff * 10
-        red_score += form_impact
-        blue_score -= form_impact
-
-        # Experience impact (±5 points max)
-        exp_diff = min(max(features['experience_diff'], -10), 10)
-        exp_impact = (exp_diff / 10) * 5
-        red_score += exp_impact
-        blue_score -= exp_impact
-
-        # Finishing ability (±8 points max)
         red_finish_rate = features['red_ko_rate'] + features['red_sub_rate']
         blue_finish_rate = features['blue_ko_rate'] + features['blue_sub_rate']
-        finish_impact = ((red_finish_rate - blue_finish_rate) / 100) * 8
-        red_score += finish_impact
-        blue_score -= finish_impact
-
-        # Normalize to probabilities
-        total = red_score + blue_score
-        red_prob = red_score / total
-        blue_prob = blue_score / total
 
         # Determine predicted method based on fighter styles
         if red_fighter.ko_tko_wins > red_fighter.submission_wins and red_fighter.ko_tko_wins > red_fighter.decision_wins:
@@ -168,6 +262,12 @@ class MLPredictor:
             else:
                 key_factors.append(f"{blue_fighter.name} has more experience")
 
+        if abs(features['elo_diff']) > 50:
+            if features['elo_diff'] > 0:
+                key_factors.append(f"{red_fighter.name} has higher Elo rating ({features['red_elo']:.0f} vs {features['blue_elo']:.0f})")
+            else:
+                key_factors.append(f"{blue_fighter.name} has higher Elo rating ({features['blue_elo']:.0f} vs {features['red_elo']:.0f})")
+
         if red_finish_rate > 50 or blue_finish_rate > 50:
             if red_finish_rate > blue_finish_rate:
                 key_factors.append(f"{red_fighter.name} has higher finish rate ({red_finish_rate:.1f}%)")
@@ -186,18 +286,45 @@ class MLPredictor:
             betting_recommendation=self._get_betting_recommendation(red_prob, blue_prob, confidence)
         )
 
-    def _predict_with_model(self, features: dict) -> dict:
-        """Use trained ML model for prediction (placeholder for future implementation)"""
-        # TODO: Implement once model is trained
-        pass
+    def predict_method_probabilities(self, red_fighter: Fighter, blue_fighter: Fighter, red_win_probability: float) -> dict:
+        """
+        Split each corner's win probability across KO/TKO, Submission and Decision
+        Uses career win methods with add-one smoothing so new fighters get an even split
+        """
+        probabilities = {}
+        for corner, fighter, win_probability in (
+            ('red', red_fighter, red_win_probability),
+            ('blue', blue_fighter, 1 - red_win_probability)
+        ):
+            ko = (fighter.ko_tko_wins or 0) + 1
+            sub = (fighter.submission_wins or 0) + 1
+            dec = (fighter.decision_wins or 0) + 1
+            total = ko + sub + dec
+            probabilities[f'{corner}_ko'] = win_probability * ko / total
+            probabilities[f'{corner}_sub'] = win_probability * sub / total
+            probabilities[f'{corner}_dec'] = win_probability * dec / total
+
+        return probabilities
+
+    def _predict_with_model(self, features: dict, red_fighter: Fighter, blue_fighter: Fighter) -> PredictionResponse:
+        """Use trained ML model for prediction (compiled arrays or pickled sklearn model)"""
+        if isinstance(self.model, CompiledModel):
+            red_prob = float(self.model.predict_proba(self.model.vectorize([features]))[0])
+        else:
+            feature_names = list(getattr(self.model, 'feature_names_in_', MODEL_FEATURES))
+            row = np.array([[features[name] for name in feature_names]], dtype=np.float64)
+            red_prob = float(self.model.predict_proba(row)[0, 1])
+
+        return self._build_prediction(red_prob, features, red_fighter, blue_fighter)
 
     def _get_betting_recommendation(self, red_prob: float, blue_prob: float, confidence: float) -> str:
         """Generate betting recommendation based on prediction confidence"""
-        if confidence < 10:
+        avoid_below, low_below, moderate_below = CONFIDENCE_TIERS
+        if confidence < avoid_below:
             return "Too close to call - avoid betting"
-        elif confidence < 20:
+        elif confidence < low_below:
             return "Low confidence - small bet only"
-        elif confidence < 30:
+        elif confidence < moderate_below:
             return "Moderate confidence - reasonable bet"
         else:
             winner = "Red" if red_prob > blue_prob else "Blue"
@@ -0,0 +1,146 @@
+"""
+Compile a pickled scikit-learn model into the NumPy format read by
+services/compiled_model.py
+
+Usage (from the backend directory):
+    python -m services.model_export --input ml/model.pkl --output ml/model.npz
+"""
+from __future__ import annotations
+
+import argparse
+import pickle
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.compiled_model import BOOSTING, FOREST, FORMAT_VERSION, LINEAR, CompiledModel
+from services.ml_predictor import MODEL_FEATURES
+
+
+def _flatten_trees(trees: list, leaf_values: list) -> dict:
+    """Concatenate sklearn Tree objects into ensemble-wide node arrays"""
+    left, right, feature, threshold, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+
+    for tree, leaf_value in zip(trees, leaf_values):
+        node_count = tree.node_count
+        is_leaf = tree.children_left < 0
+        own_index = np.arange(node_count) + offset
+        # Leaves point at themselves so a fixed number of steps reaches every leaf
+        left.append(np.where(is_leaf, own_index, tree.children_left + offset))
+        right.append(np.where(is_leaf, own_index, tree.children_right + offset))
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+        values.append(leaf_value)
+        roots.append(offset)
+        max_depth = max(max_depth, tree.max_depth)
+        offset += node_count
+
+    return {
+        'left': np.concatenate(left).astype(np.int32),
+        'right': np.concatenate(right).astype(np.int32),
+        'feature': np.concatenate(feature).astype(np.int32),
+        'threshold': np.concatenate(threshold).astype(np.float64),
+        'leaf_value': np.concatenate(values).astype(np.float64),
+        'tree_roots': np.array(roots, dtype=np.int32),
+        'max_depth': np.array(max_depth),
+    }
+
+
+def _classifier_leaf_probability(tree, positive_index: int) -> np.ndarray:
+    """Positive-class fraction at every node of a classification tree"""
+    value = tree.value[:, 0, :]
+    return value[:, positive_index] / value.sum(axis=1)
+
+
+def compile_model(model, feature_names: Optional[List[str]] = None) -> CompiledModel:
+    """Convert a fitted binary classifier (optionally in a Pipeline with StandardScaler)"""
+    from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier, ExtraTreesClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.tree import DecisionTreeClassifier
+
+    arrays = {'format_version': np.array(FORMAT_VERSION)}
+
+    if isinstance(model, Pipeline):
+        *steps, (_, estimator) = model.steps
+        if len(steps) > 1 or (steps and not isinstance(steps[0][1], StandardScaler)):
+            raise ValueError("Only a StandardScaler may precede the estimator in a Pipeline")
+        if steps:
+            scaler = steps[0][1]
+            arrays['scaler_mean'] = scaler.mean_ if scaler.with_mean else np.zeros_like(scaler.scale_)
+            arrays['scaler_scale'] = scaler.scale_ if scaler.with_std else np.ones_like(scaler.mean_)
+    else:
+        estimator = model
+    names = feature_names or list(getattr(model, 'feature_names_in_', MODEL_FEATURES))
+
+    if len(getattr(estimator, 'classes_', [])) != 2:
+        raise ValueError("Only binary classifiers can be compiled")
+    positive_index = 1
+
+    if isinstance(estimator, LogisticRegression):
+        arrays['kind'] = np.array(LINEAR)
+        arrays['coef'] = estimator.coef_[0].astype(np.float64)
+        arrays['intercept'] = np.array(float(estimator.intercept_[0]))
+    elif isinstance(estimator, (RandomForestClassifier, ExtraTreesClassifier, DecisionTreeClassifier)):
+        trees = [estimator.tree_] if isinstance(estimator, DecisionTreeClassifier) else [
+            tree.tree_ for tree in estimator.estimators_
+        ]
+        arrays['kind'] = np.array(FOREST)
+        arrays.update(_flatten_trees(trees, [_classifier_leaf_probability(t, positive_index) for t in trees]))
+        arrays['learning_rate'] = np.array(1.0)
+        arrays['baseline'] = np.array(0.0)
+    elif isinstance(estimator, GradientBoostingClassifier):
+        trees = [stage[0].tree_ for stage in estimator.estimators_]
+        arrays['kind'] = np.array(BOOSTING)
+        arrays.update(_flatten_trees(trees, [t.value[:, 0, 0] for t in trees]))
+        arrays['learning_rate'] = np.array(float(estimator.learning_rate))
+        # The init estimator's raw score is constant for the default prior init
+        n_features = estimator.n_features_in_
+        arrays['baseline'] = np.array(float(estimator._raw_predict_init(np.zeros((1, n_features)))[0, 0]))
+    else:
+        raise ValueError(f"Cannot compile model of type {type(estimator).__name__}")
+
+    if len(names) != estimator.n_features_in_:
+        raise ValueError(f"Model expects {estimator.n_features_in_} features, got {len(names)} names")
+    arrays['feature_names'] = np.array(names)
+
+    return CompiledModel(arrays)
+
+
+def export_model(input_path: str, output_path: str, feature_names: Optional[List[str]] = None,
+                 check_rows: Optional[np.ndarray] = None) -> CompiledModel:
+    """Load a pickled model, compile it and write the .npz file"""
+    with open(input_path, 'rb') as f:
+        model = pickle.load(f)
+
+    compiled = compile_model(model, feature_names)
+
+    # Guard against silent divergence from the original model
+    if check_rows is None:
+        check_rows = np.random.default_rng(0).normal(size=(256, len(compiled.feature_names)))
+    expected = model.predict_proba(check_rows)[:, 1]
+    actual = compiled.predict_proba(check_rows)
+    max_error = float(np.abs(expected - actual).max())
+    if max_error > 1e-9:
+        raise ValueError(f"Compiled model differs from the original (max error {max_error:.2e})")
+
+    compiled.save(output_path)
+    print(f"Compiled {compiled.kind} model with {len(compiled.feature_names)} features to {output_path}")
+    return compiled
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile a pickled model to NumPy arrays")
+    parser.add_argument("--input", default="ml/model.pkl")
+    parser.add_argument("--output", default="ml/model.npz")
+    parser.add_argument("--features", nargs="*", default=None, help="Feature names in model column order")
+    args = parser.parse_args()
+
+    export_model(args.input, args.output, args.features)
@@ -0,0 +1,143 @@
+"""
+Per-fighter participation rows (fighter_fights): rebuild and career totals
+ORM writes to fights keep the table in sync through mapper events; rebuild
+it after Core bulk inserts into fights, or once for a database created
+before the table existed. The same events record which fighters a session
+touched (dirty_fighter_ids), so stats can be refreshed for those alone.
+
+Usage (from the backend directory):
+    python services/participation.py
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from sqlalchemy import case, insert, literal, select
+from sqlalchemy.orm import Session
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database.schema import DIRTY_FIGHTERS_KEY, Fight, Fighter, FighterFight
+
+# Ids per IN (...) list when reading a subset of fighters
+ID_BATCH_SIZE = 500
+
+
+def _corner_select(corner: str):
+    """fighter_fights rows for every fight, from one corner's side"""
+    if corner == 'Red':
+        own, opponent, lost = Fight.red_fighter_id, Fight.blue_fighter_id, 'Blue'
+    else:
+        own, opponent, lost = Fight.blue_fighter_id, Fight.red_fighter_id, 'Red'
+    # Same mapping as schema.fight_result
+    result = case(
+        (Fight.winner == corner, 'W'),
+        (Fight.winner == lost, 'L'),
+        (Fight.winner.like('%Draw%'), 'D'),
+        else_=None
+    )
+    return select(own, Fight.id, opponent, literal(corner), result, Fight.date)
+
+
+def rebuild_fighter_fights(db: Session) -> int:
+    """Replace every participation row with two INSERT ... SELECT statements over fights"""
+    print("Rebuilding fighter participation...")
+
+    db.query(FighterFight).delete(synchronize_session=False)
+    columns = ['fighter_id', 'fight_id', 'opponent_id', 'corner', 'result', 'date']
+    for corner in ('Red', 'Blue'):
+        db.execute(insert(FighterFight).from_select(columns, _corner_select(corner)))
+    db.commit()
+
+    rows = db.query(FighterFight).count()
+    print(f"Wrote {rows} participation rows")
+    return rows
+
+
+def empty_totals() -> dict:
+    """Career totals of a fighter without fights"""
+    return {
+        'total_fights': 0, 'wins': 0, 'losses': 0, 'draws': 0,
+        'ko_tko_wins': 0, 'submission_wins': 0, 'decision_wins': 0, 'total_duration': 0,
+    }
+
+
+def dirty_fighter_ids(db: Session) -> Set[int]:
+    """
+    Ids of fighters whose fights were inserted, changed or deleted through
+    this session since the last call (pending changes are flushed first)
+    """
+    db.flush()
+    return db.info.pop(DIRTY_FIGHTERS_KEY, set())
+
+
+def _id_batches(fighter_ids: Iterable[int]) -> Iterator[List[int]]:
+    ids = sorted(set(fighter_ids))
+    for start in range(0, len(ids), ID_BATCH_SIZE):
+        yield ids[start:start + ID_BATCH_SIZE]
+
+
+def fighters_by_id(db: Session, fighter_ids: Iterable[int]) -> List[Fighter]:
+    fighters = []
+    for batch in _id_batches(fighter_ids):
+        fighters.extend(db.query(Fighter).filter(Fighter.id.in_(batch)))
+    return fighters
+
+
+def career_totals(db: Session, fighter_ids: Optional[Iterable[int]] = None) -> Dict[int, dict]:
+    """
+    Results, finishes and fight time per fighter in a single pass over
+    fighter_fights, for every fighter or only `fighter_ids` (a range scan
+    per fighter on the fighter_id index); fighters without fights are absent
+    """
+    totals: Dict[int, dict] = {}
+    query = db.query(
+        FighterFight.fighter_id, FighterFight.result, Fight.finish_method, Fight.total_fight_duration_secs
+    ).join(Fight, Fight.id == FighterFight.fight_id)
+    if fighter_ids is None:
+        rows = query
+    else:
+        rows = (row for batch in _id_batches(fighter_ids)
+                for row in query.filter(FighterFight.fighter_id.in_(batch)))
+
+    for fighter_id, result, finish_method, duration in rows:
+        entry = totals.get(fighter_id)
+        if entry is None:
+            entry = totals[fighter_id] = empty_totals()
+
+        entry['total_fights'] += 1
+        if result == 'W':
+            entry['wins'] += 1
+            if finish_method:
+                method_upper = finish_method.upper()
+                if 'KO' in method_upper or 'TKO' in method_upper:
+                    entry['ko_tko_wins'] += 1
+                elif 'SUB' in method_upper:
+                    entry['submission_wins'] += 1
+                elif 'DEC' in method_upper:
+                    entry['decision_wins'] += 1
+        elif result == 'L':
+            entry['losses'] += 1
+        elif result == 'D':
+            entry['draws'] += 1
+
+        if duration:
+            entry['total_duration'] += duration
+
+    return totals
+
+
+if __name__ == "__main__":
+    from database.config import SessionLocal, engine
+
+    FighterFight.__table__.create(bind=engine, checkfirst=True)
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        rebuild_fighter_fights(db)
+        print(f"Done in {time.perf_counter() - start:.2f}s")
+    finally:
+        db.close()
@@ -0,0 +1,245 @@
+"""
+Opt-in per-request sampling profiler
+A request is profiled when it carries X-Profile: <PROFILE_TOKEN> or is picked
+by PROFILE_SAMPLE_RATE. Stack samples are written as folded stacks
+(flamegraph.pl / speedscope / inferno compatible) plus a JSON summary that
+splits time between SQL, Pydantic serialization and predictor code.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from fastapi.routing import APIRoute
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", str(Path(__file__).parent.parent / "profiles")))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "2"))
+PROFILE_MAX_BYTES = int(os.getenv("PROFILE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+PROFILE_HEADER = "x-profile"
+
+# Path fragments used to attribute a sample; checked from the innermost frame outwards
+SQL_MARKERS = ("/sqlalchemy/", "/psycopg2/", "/asyncpg/", "sqlite3")
+SERIALIZATION_MARKERS = ("/pydantic/", "/pydantic_core/", "/fastapi/encoders.py", "/orjson")
+PREDICTOR_MARKERS = ("/services/ml_predictor.py", "/services/compiled_model.py", "/services/ratings.py")
+
+_current_session: ContextVar[Optional['ProfileSession']] = ContextVar('profile_session', default=None)
+
+_BACKEND_ROOT = str(Path(__file__).parent.parent)
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_BACKEND_ROOT):
+        filename = filename[len(_BACKEND_ROOT) + 1:]
+    else:
+        # Keep library paths short: site-packages/<pkg>/... -> <pkg>/...
+        marker = filename.rfind("site-packages/")
+        if marker >= 0:
+            filename = filename[marker + len("site-packages/"):]
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _categorize(filenames) -> str:
+    """Innermost SQL/serialization frame wins; otherwise predictor code anywhere on the stack"""
+    for filename in filenames:
+        if any(marker in filename for marker in SQL_MARKERS):
+            return 'sql'
+        if any(marker in filename for marker in SERIALIZATION_MARKERS):
+            return 'serialization'
+    for filename in filenames:
+        if any(marker in filename for marker in PREDICTOR_MARKERS):
+            return 'predictor'
+    return 'other'
+
+
+class ProfileSession:
+    """
+    Samples the stacks of the threads serving one request on a background
+    thread: threadpool threads while they run the request's endpoint or
+    response validation, and the event loop thread only while one of the
+    request's tasks is running on it (not while it serves other requests)
+    """
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.interval = interval_ms / 1000
+        self.thread_ids = set()
+        self.tasks = set()
+        self.loop = loop
+        self.loop_thread_id = threading.get_ident() if loop is not None else None
+        self.stacks: Counter = Counter()
+        self.categories: Counter = Counter()
+        self.samples = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        self._sampler.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            thread_ids = set(self.thread_ids)
+            if self.loop is not None and asyncio.current_task(self.loop) in self.tasks:
+                thread_ids.add(self.loop_thread_id)
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self._record(frame)
+
+    def _record(self, frame):
+        codes = []
+        while frame is not None:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+
+        # An event loop waiting in select() is idle, not serving this request
+        if codes[0].co_filename.endswith("selectors.py"):
+            return
+
+        self.samples += 1
+        self.stacks[";".join(_frame_label(code) for code in reversed(codes))] += 1
+        self.categories[_categorize([code.co_filename for code in codes])] += 1
+
+    def summary(self) -> dict:
+        total = max(self.samples, 1)
+        return {
+            'samples': self.samples,
+            'interval_ms': self.interval * 1000,
+            'wall_time_ms': self.elapsed * 1000,
+            'time_split': {
+                category: {'samples': count, 'share': count / total}
+                for category, count in self.categories.most_common()
+            },
+        }
+
+
+def _track_thread(call):
+    """Register the threadpool thread running `call` with the request's profile session, if any"""
+    if asyncio.iscoroutinefunction(call):
+        # Async endpoints run in the request's task, registered by ProfiledRoute's handler
+        return call
+
+    @functools.wraps(call)
+    def tracked(*args, **kwargs):
+        session = _current_session.get()
+        if session is None:
+            return call(*args, **kwargs)
+        thread_id = threading.get_ident()
+        session.thread_ids.add(thread_id)
+        try:
+            return call(*args, **kwargs)
+        finally:
+            session.thread_ids.discard(thread_id)
+    return tracked
+
+
+class ProfiledRoute(APIRoute):
+    """
+    APIRoute that registers what serves a request for profiling: its task on
+    the event loop, and the threadpool threads a sync endpoint and its
+    response_model validation (a separate threadpool call) run on
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The request handler reads dependant.call and the response field's validate at call time
+        self.dependant.call = _track_thread(self.dependant.call)
+        field = self.secure_cloned_response_field
+        if field is not None:
+            field.validate = _track_thread(field.validate)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def profiled_handler(request):
+            session = _current_session.get()
+            if session is None:
+                return await handler(request)
+            task = asyncio.current_task()
+            session.tasks.add(task)
+            try:
+                return await handler(request)
+            finally:
+                session.tasks.discard(task)
+        return profiled_handler
+
+
+def should_profile(request) -> bool:
+    if PROFILE_TOKEN and request.headers.get(PROFILE_HEADER) == PROFILE_TOKEN:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _enforce_disk_limit(directory: Path, max_bytes: int):
+    """Delete the oldest profiles until the directory fits within max_bytes"""
+    files = sorted(directory.glob("*.*"), key=lambda p: p.stat().st_mtime)
+    total = sum(p.stat().st_size for p in files)
+    for path in files:
+        if total <= max_bytes:
+            break
+        total -= path.stat().st_size
+        path.unlink(missing_ok=True)
+
+
+def write_profile(session: ProfileSession, request, status_code: int, directory: Path = PROFILE_DIR) -> str:
+    """Write <id>.folded and <id>.json; returns the profile id"""
+    directory.mkdir(parents=True, exist_ok=True)
+    route = getattr(request.scope.get('route'), 'path', request.url.path)
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", route).strip("-") or "root"
+    profile_id = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{request.method.lower()}-{slug}"
+
+    folded = "\n".join(f"{stack} {count}" for stack, count in session.stacks.most_common())
+    (directory / f"{profile_id}.folded").write_text(folded + "\n")
+    (directory / f"{profile_id}.json").write_text(json.dumps({
+        'profile_id': profile_id,
+        'method': request.method,
+        'path': request.url.path,
+        'route': route,
+        'status': status_code,
+        **session.summary(),
+    }, indent=2))
+
+    _enforce_disk_limit(directory, PROFILE_MAX_BYTES)
+    return profile_id
+
+
+async def profile_request(request, call_next):
+    """Middleware body: profile the request when asked to, otherwise pass straight through"""
+    if not should_profile(request):
+        return await call_next(request)
+
+    session = ProfileSession(loop=asyncio.get_running_loop())
+    token = _current_session.set(session)
+    session.start()
+    try:
+        response = await call_next(request)
+    finally:
+        session.stop()
+        _current_session.reset(token)
+
+    profile_id = await asyncio.to_thread(write_profile, session, request, response.status_code)
+    response.headers['X-Profile-Id'] = profile_id
+    response.headers['X-Profile-Samples'] = str(session.samples)
+    return response
@@ -0,0 +1,239 @@
+"""
+Incremental Elo rating engine over the fight history
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from database.schema import Fighter, Fight, FightRating, bump_dataset_revision
+
+DEFAULT_RATING = 1500.0
+DEFAULT_K_FACTOR = 32.0
+
+# Rows written per bulk insert/update while persisting ratings
+WRITE_BATCH_SIZE = 5000
+
+
+def outcome_score(winner: Optional[str]) -> Optional[float]:
+    """
+    Convert a fight winner into the red corner's Elo score
+    Returns None for fights without a result (no contest / upcoming)
+    """
+    if winner == 'Red':
+        return 1.0
+    if winner == 'Blue':
+        return 0.0
+    if winner and 'Draw' in winner:
+        return 0.5
+    return None
+
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    """Probability that a fighter rated `rating` beats one rated `opponent_rating`"""
+    return 1.0 / (1.0 + 10.0 ** ((opponent_rating - rating) / 400.0))
+
+
+class EloRatingEngine:
+    """
+    Elo ratings for every fighter, updated one fight at a time
+    The engine only holds current ratings, so history is processed in a single
+    chronological pass and new fights are applied on top of the current state
+    """
+
+    def __init__(
+        self,
+        k_factor: float = DEFAULT_K_FACTOR,
+        initial_rating: float = DEFAULT_RATING,
+        ratings: Optional[Dict[int, float]] = None
+    ):
+        self.k_factor = k_factor
+        self.initial_rating = initial_rating
+        self.ratings: Dict[int, float] = dict(ratings) if ratings else {}
+        self.fight_counts: Dict[int, int] = {}
+
+    def rating(self, fighter_id: int) -> float:
+        """Current rating of a fighter (initial rating if never rated)"""
+        return self.ratings.get(fighter_id, self.initial_rating)
+
+    def apply(self, red_id: int, blue_id: int, red_score: float) -> Tuple[float, float, float, float]:
+        """
+        Apply a single fight result
+        Returns (red_before, blue_before, red_after, blue_after)
+        """
+        red_before = self.ratings.get(red_id, self.initial_rating)
+        blue_before = self.ratings.get(blue_id, self.initial_rating)
+
+        delta = self.k_factor * (red_score - expected_score(red_before, blue_before))
+        red_after = red_before + delta
+        blue_after = blue_before - delta
+
+        self.ratings[red_id] = red_after
+        self.ratings[blue_id] = blue_after
+        self.fight_counts[red_id] = self.fight_counts.get(red_id, 0) + 1
+        self.fight_counts[blue_id] = self.fight_counts.get(blue_id, 0) + 1
+
+        return red_before, blue_before, red_after, blue_after
+
+    def replay(self, fights: Iterable[Tuple[int, int, float]]) -> Iterator[Tuple[float, float, float, float]]:
+        """Apply (red_id, blue_id, red_score) fights in order, yielding a snapshot after each"""
+        for red_id, blue_id, red_score in fights:
+            yield self.apply(red_id, blue_id, red_score)
+
+    def replay_arrays(self, red_ids: np.ndarray, blue_ids: np.ndarray, red_scores: np.ndarray) -> np.ndarray:
+        """
+        Apply a chronologically ordered batch of fights held in parallel arrays
+        Returns an (n, 4) array of (red_before, blue_before, red_after, blue_after)
+        """
+        red_before_out = []
+        blue_before_out = []
+        deltas = []
+
+        # Local bindings keep the per-fight loop tight
+        ratings = self.ratings
+        counts = self.fight_counts
+        k = self.k_factor
+        initial = self.initial_rating
+        get_rating = ratings.get
+        get_count = counts.get
+        append_red = red_before_out.append
+        append_blue = blue_before_out.append
+        append_delta = deltas.append
+
+        for red_id, blue_id, red_score in zip(red_ids.tolist(), blue_ids.tolist(), red_scores.tolist()):
+            red_before = get_rating(red_id, initial)
+            blue_before = get_rating(blue_id, initial)
+            delta = k * (red_score - 1.0 / (1.0 + 10.0 ** ((blue_before - red_before) / 400.0)))
+            ratings[red_id] = red_before + delta
+            ratings[blue_id] = blue_before - delta
+            counts[red_id] = get_count(red_id, 0) + 1
+            counts[blue_id] = get_count(blue_id, 0) + 1
+            append_red(red_before)
+            append_blue(blue_before)
+            append_delta(delta)
+
+        snapshots = np.empty((len(deltas), 4), dtype=np.float64)
+        snapshots[:, 0] = red_before_out
+        snapshots[:, 1] = blue_before_out
+        snapshots[:, 2] = snapshots[:, 0] + deltas
+        snapshots[:, 3] = snapshots[:, 1] - deltas
+        return snapshots
+
+
+def _rated_fights_query(db: Session):
+    """Fights with a result (see outcome_score), in the order ratings must be applied"""
+    return db.query(
+        Fight.id, Fight.red_fighter_id, Fight.blue_fighter_id, Fight.winner
+    ).filter(
+        Fight.winner.in_(('Red', 'Blue')) | Fight.winner.like('%Draw%')
+    ).order_by(Fight.date.asc(), Fight.id.asc())
+
+
+def _apply_and_store(db: Session, engine: EloRatingEngine, fights) -> int:
+    """Run fights through the engine and bulk-insert their rating snapshots"""
+    batch = []
+    applied = 0
+
+    for fight_id, red_id, blue_id, winner in fights:
+        score = outcome_score(winner)
+        if score is None:
+            continue
+
+        red_before, blue_before, red_after, blue_after = engine.apply(red_id, blue_id, score)
+        batch.append({
+            'fight_id': fight_id,
+            'red_rating_before': red_before,
+            'blue_rating_before': blue_before,
+            'red_rating_after': red_after,
+            'blue_rating_after': blue_after,
+        })
+        applied += 1
+
+        if len(batch) >= WRITE_BATCH_SIZE:
+            db.bulk_insert_mappings(FightRating, batch)
+            batch = []
+
+    if batch:
+        db.bulk_insert_mappings(FightRating, batch)
+
+    return applied
+
+
+def _store_fighter_ratings(db: Session, engine: EloRatingEngine, fighter_ids: Iterable[int]):
+    """Write the engine's current ratings back onto the fighter rows"""
+    batch = []
+    for fighter_id in fighter_ids:
+        batch.append({
+            'id': fighter_id,
+            'elo_rating': engine.rating(fighter_id),
+            'rated_fights': engine.fight_counts.get(fighter_id, 0),
+        })
+        if len(batch) >= WRITE_BATCH_SIZE:
+            db.bulk_update_mappings(Fighter, batch)
+            batch = []
+
+    if batch:
+        db.bulk_update_mappings(Fighter, batch)
+    # Bulk updates skip the mapper events that bump it
+    bump_dataset_revision(db.connection())
+
+
+def rebuild_ratings(db: Session, k_factor: float = DEFAULT_K_FACTOR) -> int:
+    """
+    Recompute all ratings from scratch in one chronological pass
+    Replaces every fight snapshot and resets fighters without rated fights
+    """
+    print("Rebuilding Elo ratings...")
+
+    db.query(FightRating).delete(synchronize_session=False)
+
+    engine = EloRatingEngine(k_factor=k_factor)
+    applied = _apply_and_store(db, engine, _rated_fights_query(db).yield_per(WRITE_BATCH_SIZE))
+
+    fighter_ids = [fighter_id for (fighter_id,) in db.query(Fighter.id)]
+    _store_fighter_ratings(db, engine, fighter_ids)
+
+    db.commit()
+    print(f"Rated {applied} fights for {len(engine.ratings)} fighters")
+    return applied
+
+
+def apply_new_fights(db: Session, k_factor: float = DEFAULT_K_FACTOR) -> int:
+    """
+    Rate only fights that have no snapshot yet, starting from the stored ratings
+    When one of them goes back before the latest rated fight (back-filled
+    history, or an older fight that only now has a result) ratings after it
+    are out of order, so everything is rebuilt instead
+    """
+    pending_query = _rated_fights_query(db).outerjoin(
+        FightRating, FightRating.fight_id == Fight.id
+    ).filter(FightRating.fight_id.is_(None))
+    pending = pending_query.all()
+
+    if not pending:
+        return 0
+
+    latest_rated = db.query(func.max(Fight.date)).join(FightRating, FightRating.fight_id == Fight.id).scalar()
+    earliest_pending = pending_query.with_entities(func.min(Fight.date)).order_by(None).scalar()
+    if latest_rated is not None and earliest_pending < latest_rated:
+        return rebuild_ratings(db, k_factor)
+
+    fighter_ids = {red_id for _, red_id, _, _ in pending} | {blue_id for _, _, blue_id, _ in pending}
+    rows = db.query(Fighter.id, Fighter.elo_rating, Fighter.rated_fights).filter(
+        Fighter.id.in_(fighter_ids)
+    ).all()
+
+    engine = EloRatingEngine(k_factor=k_factor)
+    for fighter_id, rating, rated_fights in rows:
+        if rating is not None:
+            engine.ratings[fighter_id] = rating
+        engine.fight_counts[fighter_id] = rated_fights or 0
+
+    applied = _apply_and_store(db, engine, pending)
+    _store_fighter_ratings(db, engine, fighter_ids)
+
+    db.commit()
+    return applied
@@ -0,0 +1,52 @@
+"""
+Fast JSON responses for trusted internal data
+Endpoints that build their payload from rows they selected themselves
+return FastJSONResponse: the payload is encoded once with orjson instead of
+being re-validated against response_model and walked by jsonable_encoder.
+The route keeps response_model for the OpenAPI schema.
+"""
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, List, Sequence
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard library encoder
+    orjson = None
+
+
+def _default(value: Any):
+    """Types the standard library encoder does not know (orjson handles these natively)"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return value.item()  # NumPy scalars
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, byte-compatible with FastAPI's JSONResponse for plain data"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response that trusts its content: no validation, no jsonable_encoder pass"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def row_dict(keys: Sequence[str], row: Sequence) -> dict:
+    return dict(zip(keys, row))
+
+
+def row_dicts(keys: Sequence[str], rows: Iterable[Sequence]) -> List[dict]:
+    """Rows selected as plain tuples (no ORM objects) keyed by column name"""
+    return [dict(zip(keys, row)) for row in rows]
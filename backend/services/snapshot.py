@@ -0,0 +1,385 @@
+"""
+Read-only fighter snapshot shared between API workers through mmap
+The builder writes fighter ids and names, career stats, per-fighter
+prediction features and the compiled model weights into one versioned file.
+Every worker maps it read-only, so the page cache holds a single copy no
+matter how many workers run. Builds are atomic (write a temp file, fsync,
+rename) and workers switch to a new build on their next check, without a
+restart.
+
+Usage (from the backend directory):
+    python services/snapshot.py build
+    python services/snapshot.py info
+"""
+from __future__ import annotations
+
+import argparse
+import bisect
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.compiled_model import CompiledModel
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"UFCSNAP\0"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_PREAMBLE = struct.Struct("<8sQ")  # magic, header length
+
+SNAPSHOT_PATH = Path(os.getenv("SNAPSHOT_PATH", str(Path(__file__).parent.parent / "snapshots" / "fighters.snap")))
+
+# Seconds between checks for a newer build
+SNAPSHOT_CHECK_INTERVAL = float(os.getenv("SNAPSHOT_CHECK_INTERVAL", "5"))
+
+# Fighter columns copied from database/schema.py, with their snapshot dtypes
+STAT_COLUMNS = {
+    'total_fights': np.int32,
+    'wins': np.int32,
+    'losses': np.int32,
+    'draws': np.int32,
+    'win_percentage': np.float64,
+    'ko_tko_wins': np.int32,
+    'submission_wins': np.int32,
+    'decision_wins': np.int32,
+    'avg_fight_duration_secs': np.float64,
+    'avg_significant_strikes': np.float64,
+    'avg_takedowns': np.float64,
+    'elo_rating': np.float64,
+    'rated_fights': np.int32,
+}
+
+# Fights that make up "recent form" (matches MLPredictor._extract_features)
+RECENT_FIGHTS = 5
+
+MODEL_PREFIX = "model."
+
+
+def database_fingerprint(database_url: str) -> str:
+    """Identifies the source database without storing its credentials"""
+    return hashlib.sha1(database_url.encode()).hexdigest()[:16]
+
+
+def _string_table(values: List[str], separator: bytes = b"") -> tuple:
+    """UTF-8 blob plus (n + 1) start offsets"""
+    encoded = [value.encode() for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(item) + len(separator) for item in encoded])
+    blob = np.frombuffer(separator.join(encoded) + separator, dtype=np.uint8) if encoded else np.zeros(0, np.uint8)
+    return blob, offsets
+
+
+def collect_arrays(db, model_path: Optional[Path] = None) -> Dict[str, np.ndarray]:
+    """Column arrays for every fighter, ordered by id"""
+    from database.schema import Fight, Fighter
+    from services.ratings import DEFAULT_RATING
+
+    rows = db.query(Fighter.id, Fighter.name, *(getattr(Fighter, c) for c in STAT_COLUMNS)).order_by(Fighter.id).all()
+    arrays: Dict[str, np.ndarray] = {'id': np.array([row[0] for row in rows], dtype=np.int64)}
+
+    names = [row[1] for row in rows]
+    arrays['name_blob'], arrays['name_offsets'] = _string_table(names)
+    # Lowercased names separated by newlines, so substring matches never span two names
+    lower = [name.lower() for name in names]
+    arrays['lower_blob'], arrays['lower_offsets'] = _string_table(lower, separator=b"\n")
+    arrays['name_order'] = np.array(sorted(range(len(lower)), key=lower.__getitem__), dtype=np.int32)
+
+    for index, (column, dtype) in enumerate(STAT_COLUMNS.items(), start=2):
+        default = DEFAULT_RATING if column == 'elo_rating' else 0
+        arrays[column] = np.array([row[index] if row[index] is not None else default for row in rows], dtype=dtype)
+
+    total = np.maximum(arrays['total_fights'], 1)
+    arrays['ko_rate'] = np.where(arrays['total_fights'] > 0, arrays['ko_tko_wins'] / total * 100, 0.0)
+    arrays['sub_rate'] = np.where(arrays['total_fights'] > 0, arrays['submission_wins'] / total * 100, 0.0)
+
+    # Recent form: wins in each fighter's last RECENT_FIGHTS fights, newest first
+    position = {fighter_id: i for i, fighter_id in enumerate(arrays['id'].tolist())}
+    recent_count = np.zeros(len(rows), dtype=np.int32)
+    recent_wins = np.zeros(len(rows), dtype=np.int32)
+    history = db.query(Fight.red_fighter_id, Fight.blue_fighter_id, Fight.winner).order_by(Fight.date.desc())
+    for red_id, blue_id, winner in history:
+        for fighter_id, won in ((red_id, winner == 'Red'), (blue_id, winner == 'Blue')):
+            i = position.get(fighter_id)
+            if i is not None and recent_count[i] < RECENT_FIGHTS:
+                recent_count[i] += 1
+                recent_wins[i] += won
+    arrays['recent_fights'] = recent_count
+    arrays['recent_form'] = np.where(recent_count > 0, recent_wins / np.maximum(recent_count, 1), 0.0)
+
+    if model_path is not None and Path(model_path).exists():
+        with np.load(model_path, allow_pickle=False) as data:
+            for key in data.files:
+                arrays[MODEL_PREFIX + key] = data[key]
+
+    return arrays
+
+
+def write_snapshot(arrays: Dict[str, np.ndarray], path: Path, metadata: Optional[dict] = None) -> Path:
+    """Write arrays to `path` atomically: readers see the old file or the new one, never a partial one"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.require(array, requirements='C')
+        arrays[name] = array
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+
+    header = json.dumps({
+        'format_version': FORMAT_VERSION,
+        'version': time.time_ns(),
+        'created_at': datetime.utcnow().isoformat(),
+        'fighters': int(len(arrays['id'])),
+        'metadata': metadata or {},
+        'arrays': layout,
+    }).encode()
+    data_start = -(-(_PREAMBLE.size + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_PREAMBLE.pack(MAGIC, len(header)))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(data_start + layout[name]['offset'])
+                f.write(array.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return path
+
+
+def build_snapshot(db, path: Path = SNAPSHOT_PATH, model_path: Optional[Path] = None) -> Path:
+    """Snapshot the fighters table (and the compiled model, if present) to `path`"""
+    from database.config import get_database_url
+
+    if model_path is None:
+        model_path = Path(__file__).parent.parent / "ml" / "model.npz"
+    arrays = collect_arrays(db, model_path)
+    return write_snapshot(arrays, path, {'source': database_fingerprint(get_database_url())})
+
+
+def refresh_snapshot(db, path: Path = SNAPSHOT_PATH) -> Optional[Path]:
+    """
+    Rebuild the snapshot after fighter rows changed (ingest, cleanup, ratings),
+    when one built from this database exists; workers switch on their next check
+    """
+    from database.config import get_database_url
+
+    if not path.exists():
+        return None
+    try:
+        source = FighterSnapshot(path).header['metadata'].get('source')
+    except (OSError, ValueError):
+        source = None
+    if source != database_fingerprint(get_database_url()):
+        logger.warning("Not refreshing snapshot %s: built from a different database", path)
+        return None
+    path = build_snapshot(db, path)
+    print(f"Refreshed fighter snapshot {path}")
+    return path
+
+
+class FighterSnapshot:
+    """Read-only view of a snapshot file; all arrays point into one shared mapping"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, header_length = _PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a fighter snapshot")
+        self.header = json.loads(self._mmap[_PREAMBLE.size:_PREAMBLE.size + header_length])
+        if self.header['format_version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format {self.header['format_version']}, expected {FORMAT_VERSION}")
+
+        data_start = -(-(_PREAMBLE.size + header_length) // ALIGNMENT) * ALIGNMENT
+        self._lower_blob_start = data_start + self.header['arrays']['lower_blob']['offset']
+        self.arrays: Dict[str, np.ndarray] = {}
+        for name, spec in self.header['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            count = int(np.prod(spec['shape'], dtype=np.int64))
+            self.arrays[name] = np.frombuffer(
+                self._mmap, dtype=dtype, count=count, offset=data_start + spec['offset']
+            ).reshape(spec['shape'])
+
+        self.version = self.header['version']
+        self.ids = self.arrays['id']
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row(self, fighter_id: int) -> Optional[int]:
+        index = int(np.searchsorted(self.ids, fighter_id))
+        return index if index < len(self.ids) and self.ids[index] == fighter_id else None
+
+    def name(self, row: int) -> str:
+        offsets = self.arrays['name_offsets']
+        return self.arrays['name_blob'][offsets[row]:offsets[row + 1]].tobytes().decode()
+
+    def _lower_name(self, row: int) -> str:
+        offsets = self.arrays['lower_offsets']
+        # Each entry ends with its newline separator
+        return self.arrays['lower_blob'][offsets[row]:offsets[row + 1] - 1].tobytes().decode()
+
+    def find(self, name: str) -> Optional[int]:
+        """Row of the fighter with this name (case-insensitive), by binary search"""
+        order = self.arrays['name_order']
+        target = name.lower()
+
+        class _Names:
+            def __len__(_):
+                return len(order)
+
+            def __getitem__(_, i):
+                return self._lower_name(int(order[i]))
+
+        i = bisect.bisect_left(_Names(), target)
+        if i < len(order) and self._lower_name(int(order[i])) == target:
+            return int(order[i])
+        return None
+
+    def search(self, query: str, limit: int = 10) -> List[int]:
+        """Rows whose name contains `query` (case-insensitive), most fights first"""
+        pattern = re.compile(re.escape(query.lower().encode()))
+        offsets = self.arrays['lower_offsets']
+        start = self._lower_blob_start
+        positions = np.fromiter(
+            (match.start() for match in pattern.finditer(self._mmap, start, start + int(offsets[-1]))),
+            dtype=np.int64
+        )
+        # A name can match more than once; keep each row once
+        matches = np.unique(np.searchsorted(offsets, positions - start, side='right') - 1)
+
+        ranked = matches[np.argsort(-self.arrays['total_fights'][matches], kind='stable')]
+        return ranked[:limit].tolist()
+
+    def stats(self, row: int) -> dict:
+        """Career stats in the shape of models.schemas.FighterStats"""
+        stats = {'id': int(self.ids[row]), 'name': self.name(row)}
+        for column in STAT_COLUMNS:
+            stats[column] = self.arrays[column][row].item()
+        return stats
+
+    def recent_form(self, fighter_id: int, total_fights: int) -> Optional[float]:
+        """
+        Share of wins in the fighter's last five fights, or None when the
+        fighter is missing or has fought since the snapshot was built
+        """
+        row = self.row(fighter_id)
+        if row is None or int(self.arrays['total_fights'][row]) != total_fights:
+            return None
+        return float(self.arrays['recent_form'][row])
+
+    def compiled_model(self) -> Optional[CompiledModel]:
+        """The compiled model stored in the snapshot, backed by the shared mapping"""
+        arrays = {
+            name[len(MODEL_PREFIX):]: array
+            for name, array in self.arrays.items() if name.startswith(MODEL_PREFIX)
+        }
+        if not arrays:
+            return None
+        return CompiledModel(arrays)
+
+
+_lock = threading.Lock()
+_current: Optional[FighterSnapshot] = None
+_current_identity = None
+_checked_at = float('-inf')
+
+
+def get_snapshot(path: Path = SNAPSHOT_PATH) -> Optional[FighterSnapshot]:
+    """
+    The current snapshot for this worker, or None when there is none (callers
+    then fall back to the database). A newer build replaces the mapping on the
+    first call after SNAPSHOT_CHECK_INTERVAL; old mappings are released once
+    nothing references their arrays.
+    """
+    global _current, _current_identity, _checked_at
+
+    now = time.monotonic()
+    if now - _checked_at < SNAPSHOT_CHECK_INTERVAL:
+        return _current
+
+    with _lock:
+        if now - _checked_at < SNAPSHOT_CHECK_INTERVAL:
+            return _current
+        _checked_at = now
+
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            _current, _current_identity = None, None
+            return None
+
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if identity == _current_identity:
+            return _current
+
+        try:
+            snapshot = FighterSnapshot(path)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring snapshot %s: %s", path, e)
+            return _current
+
+        from database.config import get_database_url
+        if snapshot.header['metadata'].get('source') != database_fingerprint(get_database_url()):
+            logger.warning("Ignoring snapshot %s: built from a different database", path)
+            snapshot = None
+        else:
+            logger.info("Mapped snapshot %s (version %s, %d fighters)", path, snapshot.version, len(snapshot))
+
+        _current, _current_identity = snapshot, identity
+        return _current
+
+
+def reset_snapshot_cache():
+    """Forget the mapped snapshot so the next get_snapshot() call re-reads the file"""
+    global _current, _current_identity, _checked_at
+    with _lock:
+        _current, _current_identity, _checked_at = None, None, float('-inf')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or inspect the shared fighter snapshot")
+    parser.add_argument("command", choices=['build', 'info'])
+    parser.add_argument("--path", default=str(SNAPSHOT_PATH))
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        from database.config import SessionLocal
+
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            path = build_snapshot(db, Path(args.path))
+        finally:
+            db.close()
+        print(f"Wrote {path} ({path.stat().st_size / 1024:.0f} KiB) in {time.perf_counter() - start:.2f}s")
+
+    snapshot = FighterSnapshot(Path(args.path))
+    print(f"version {snapshot.version}, built {snapshot.header['created_at']}, {len(snapshot)} fighters")
+    for name, spec in snapshot.header['arrays'].items():
+        print(f"  {name:<28} {spec['dtype']:<6} {spec['shape']}")
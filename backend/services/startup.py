@@ -0,0 +1,154 @@
+"""
+Worker startup: explicit warmup, readiness and time-to-first-request
+Engines and the predictor's model are created lazily on first use; warmup
+front-loads that work (pool connections, snapshot, model, hot queries) so the first
+real request does not pay for it, and /ready reports when it has finished
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 'background': serve liveness immediately and warm up alongside (/ready is 503 until done)
+# 'blocking':   finish warming up before the server accepts connections
+# 'off':        no warmup; everything initializes on first use
+WARMUP_MODE = os.getenv("WARMUP_MODE", "background")
+
+# Pool connections opened during warmup (capped at the pool size)
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", "4"))
+
+# Probe and scrape endpoints do not count as the first request
+PROBE_PATHS = frozenset({"/ready", "/api/v1/health", "/metrics"})
+
+
+class StartupState:
+    """Readiness and startup timings of this worker"""
+
+    def __init__(self):
+        # main imports this module first, so this is close to when the app started loading
+        self.started = time.monotonic()
+        self.ready = False
+        self.warmup_seconds: Dict[str, float] = {}
+        self.warmup_error: Optional[str] = None
+        self.ready_after: Optional[float] = None
+        self.first_request_after: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def mark_ready(self):
+        self.ready_after = time.monotonic() - self.started
+        self.ready = True
+        logger.info("Ready %.3fs after startup", self.ready_after)
+
+    def record_request(self, path: str):
+        """Note when the first non-probe request finished (time-to-first-request)"""
+        if self.first_request_after is not None or path in PROBE_PATHS:
+            return
+        with self._lock:
+            if self.first_request_after is None:
+                self.first_request_after = time.monotonic() - self.started
+                logger.info("First request served %.3fs after startup", self.first_request_after)
+
+    def as_dict(self) -> dict:
+        return {
+            'status': 'ready' if self.ready else 'starting',
+            'warmup_mode': WARMUP_MODE,
+            'warmup_seconds': dict(self.warmup_seconds),
+            'warmup_error': self.warmup_error,
+            'ready_after_seconds': self.ready_after,
+            'first_request_after_seconds': self.first_request_after,
+        }
+
+
+STATE = StartupState()
+
+
+def open_pool_connections(engine, count: int = WARMUP_CONNECTIONS) -> int:
+    """Check out up to `count` connections at once so the pool keeps them open"""
+    pool_size = engine.pool.size() if hasattr(engine.pool, 'size') else count
+    connections = []
+    try:
+        for _ in range(max(1, min(count, pool_size))):
+            connection = engine.connect()
+            connection.exec_driver_sql("SELECT 1")
+            connections.append(connection)
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+
+def prime_queries(db) -> int:
+    """Run the queries behind the busiest routes once (page cache, statement caches, plans)"""
+    from database.schema import Fight, Fighter
+
+    db.query(Fighter).filter(Fighter.name.ilike("%a%")).order_by(Fighter.total_fights.desc()).limit(10).all()
+    db.query(Fighter).count()
+    db.query(Fight).count()
+    recent = db.query(Fight).filter(
+        Fight.red_odds.isnot(None),
+        Fight.blue_odds.isnot(None)
+    ).order_by(Fight.date.desc()).limit(50).all()
+    return len(recent)
+
+
+def prime_predictor(predictor, db) -> bool:
+    """Load the model and run one full prediction (feature queries + scoring)"""
+    from database.schema import Fighter
+
+    predictor.load_model()
+    fighters = db.query(Fighter).filter(Fighter.total_fights > 0).order_by(Fighter.total_fights.desc()).limit(2).all()
+    if len(fighters) < 2:
+        return False
+    predictor.predict_fight(fighters[0], fighters[1], db)
+    return True
+
+
+def warmup(predictor, state: StartupState = STATE) -> Dict[str, float]:
+    """Run every warmup step, timing each; marks the worker ready when all succeed"""
+    from database.config import get_engine, get_replica_engines, get_sessionmaker
+    from services.snapshot import get_snapshot
+
+    def timed(step, func, *args):
+        start = time.perf_counter()
+        func(*args)
+        state.warmup_seconds[step] = time.perf_counter() - start
+
+    try:
+        timed('engine', get_engine)
+        timed('pool', open_pool_connections, get_engine())
+        for index, replica in enumerate(get_replica_engines()):
+            timed(f'replica{index}_pool', open_pool_connections, replica)
+        timed('snapshot', get_snapshot)
+        db = get_sessionmaker()()
+        try:
+            timed('queries', prime_queries, db)
+            timed('predictor', prime_predictor, predictor, db)
+        finally:
+            db.close()
+    except Exception as e:
+        # Lazy initialization still serves traffic; readiness stays false so the worker gets no load yet
+        state.warmup_error = f"{type(e).__name__}: {e}"
+        logger.exception("Warmup failed")
+        return state.warmup_seconds
+
+    logger.info("Warmup finished: %s", ", ".join(f"{k} {v * 1000:.0f}ms" for k, v in state.warmup_seconds.items()))
+    state.mark_ready()
+    return state.warmup_seconds
+
+
+async def start(predictor, mode: Optional[str] = None, state: StartupState = STATE) -> Optional[asyncio.Task]:
+    """Lifespan hook: warm up according to WARMUP_MODE; returns the background task, if any"""
+    mode = mode or WARMUP_MODE
+    if mode == 'off':
+        state.mark_ready()
+        return None
+    if mode == 'blocking':
+        await asyncio.to_thread(warmup, predictor, state)
+        return None
+    return asyncio.create_task(asyncio.to_thread(warmup, predictor, state))